@@ -13,6 +13,7 @@ st.set_page_config(
 
 from utils.database import get_database
 from utils.langchain_gemini_client import get_langchain_gemini_client
+from utils.vector_store import start_vector_store_warmup
 
 if 'session_id' not in st.session_state:
     import uuid
@@ -50,3 +51,8 @@ try:
     st.success("✅ AI model connection ready")
 except Exception as e:
     st.error(f"❌ AI model error: {e}")
+
+try:
+    start_vector_store_warmup()
+except Exception as e:
+    st.warning(f"⚠️ Similarity search unavailable: {e}")
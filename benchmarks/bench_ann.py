@@ -0,0 +1,74 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from utils.vector_store import build_index, train_index, tune_index
+
+def synthetic_embeddings(n: int, dim: int, clusters: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype('float32')
+    points = centers[rng.integers(0, clusters, n)] + 0.35 * rng.standard_normal((n, dim)).astype('float32')
+    points /= np.linalg.norm(points, axis=1, keepdims=True)
+    return points
+
+def recall_at_k(truth: np.ndarray, found: np.ndarray) -> float:
+    hits = sum(len(set(t) & set(f)) for t, f in zip(truth, found))
+    return hits / truth.size
+
+def run(index_type: str, base: np.ndarray, queries: np.ndarray, k: int, truth: np.ndarray, params):
+    t0 = time.perf_counter()
+    index = build_index(index_type, base.shape[1], len(base))
+    train_index(index, base)
+    index.add_with_ids(base, np.arange(len(base), dtype='int64'))  # type: ignore[arg-type]
+    build_s = time.perf_counter() - t0
+    rows = []
+    for nprobe, ef_search in params:
+        tune_index(index, nprobe=nprobe, ef_search=ef_search)
+        t0 = time.perf_counter()
+        _, found = index.search(queries, k)  # type: ignore[arg-type]
+        elapsed = time.perf_counter() - t0
+        rows.append((nprobe, ef_search, recall_at_k(truth, found), len(queries) / elapsed))
+    return build_s, rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall@k and QPS of ANN index types against the flat index")
+    parser.add_argument("--n", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--types", default="ivf_flat,ivf_pq,hnsw")
+    args = parser.parse_args()
+
+    base = synthetic_embeddings(args.n, args.dim, clusters=max(64, args.n // 500), seed=1)
+    queries = synthetic_embeddings(args.queries, args.dim, clusters=max(64, args.n // 500), seed=1)
+    queries = queries + 0.05 * np.random.default_rng(2).standard_normal(queries.shape).astype('float32')
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    t0 = time.perf_counter()
+    flat = build_index("flat", args.dim)
+    flat.add_with_ids(base, np.arange(len(base), dtype='int64'))  # type: ignore[arg-type]
+    flat_build = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    _, truth = flat.search(queries, args.k)  # type: ignore[arg-type]
+    flat_qps = len(queries) / (time.perf_counter() - t0)
+
+    print(f"n={args.n} dim={args.dim} queries={args.queries} k={args.k}")
+    print(f"{'index':>9} | {'nprobe':>6} | {'efSearch':>8} | {'recall@k':>8} | {'QPS':>9} | build")
+    print(f"{'flat':>9} | {'-':>6} | {'-':>8} | {1.0:>8.3f} | {flat_qps:>9.0f} | {flat_build:.1f}s")
+    sweeps = {
+        "ivf_flat": [(1, 0), (4, 0), (16, 0), (64, 0)],
+        "ivf_pq": [(1, 0), (4, 0), (16, 0), (64, 0)],
+        "hnsw": [(0, 16), (0, 32), (0, 64), (0, 128)],
+    }
+    for index_type in args.types.split(","):
+        build_s, rows = run(index_type, base, queries, args.k, truth, sweeps[index_type])
+        for nprobe, ef_search, recall, qps in rows:
+            print(f"{index_type:>9} | {nprobe or '-':>6} | {ef_search or '-':>8} | {recall:>8.3f} | {qps:>9.0f} | {build_s:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import argparse
+import json
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+
+from utils.vector_store import CodeVectorStore, MODEL_NAME
+
+def unique_queries(n: int, seed: int):
+    patterns = json.loads((ROOT / "data/patterns/algorithm_patterns.json").read_text())
+    rng = random.Random(seed)
+    # Every query is distinct so the embedding cache cannot hide the encoder cost.
+    return [rng.choice(patterns).get("code", "") + f"\n# run {seed} request {i}" for i in range(n)]
+
+def run(store: CodeVectorStore, queries, clients: int, k: int):
+    latencies = []
+
+    def one(code):
+        t0 = time.perf_counter()
+        store.find_similar_patterns(code, k)
+        latencies.append((time.perf_counter() - t0) * 1000)
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        list(pool.map(one, queries))
+    elapsed = time.perf_counter() - t0
+    return len(queries) / elapsed, float(np.percentile(latencies, 50)), float(np.percentile(latencies, 95))
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput of coalesced vs per-request similarity queries")
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--backend", default="torch")
+    parser.add_argument("--queries", type=int, default=256)
+    parser.add_argument("--clients", default="1,4,16,32")
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--max-batch", type=int, default=32)
+    args = parser.parse_args()
+
+    patterns = json.loads((ROOT / "data/patterns/algorithm_patterns.json").read_text())
+    stores = {
+        "per-request": CodeVectorStore(index_path=None, model_name=args.model, cache_path=None,
+                                       encoder_backend=args.backend, batch_max_wait=0),
+        "batched": CodeVectorStore(index_path=None, model_name=args.model, cache_path=None,
+                                   encoder_backend=args.backend, batch_max_wait=args.max_wait_ms / 1000,
+                                   batch_max_size=args.max_batch),
+    }
+    for store in stores.values():
+        store.add_code_patterns(patterns, persist=False)
+        store.find_similar_patterns("warm up", args.k)
+
+    print(f"model={args.model} backend={args.backend} queries={args.queries} "
+          f"max_wait={args.max_wait_ms}ms max_batch={args.max_batch}")
+    print(f"{'clients':>7} | {'mode':>11} | {'QPS':>8} | {'p50 ms':>8} | {'p95 ms':>8} | avg batch")
+    for seed, clients in enumerate(int(c) for c in args.clients.split(",")):
+        for mode, store in stores.items():
+            queries = unique_queries(args.queries, seed * 2 + (mode == "batched"))
+            before = (store.batcher.batches, store.batcher.queries) if store.batcher else (0, 0)
+            qps, p50, p95 = run(store, queries, clients, args.k)
+            if store.batcher:
+                batches = store.batcher.batches - before[0]
+                avg_batch = f"{(store.batcher.queries - before[1]) / max(batches, 1):.1f}"
+            else:
+                avg_batch = "1.0"
+            print(f"{clients:>7} | {mode:>11} | {qps:>8.1f} | {p50:>8.1f} | {p95:>8.1f} | {avg_batch}")
+
+if __name__ == "__main__":
+    main()
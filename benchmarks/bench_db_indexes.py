@@ -0,0 +1,83 @@
+import argparse
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from utils.migrations import migrate
+
+RECENT_SQL = """
+SELECT problem_name, code, analysis, feedback, submitted_at
+FROM submissions WHERE session_id = ?
+ORDER BY submitted_at DESC LIMIT ?"""
+
+WEEK_SQL = """
+SELECT COUNT(*) FROM submissions
+WHERE session_id = ? AND submitted_at >= date('now', '-7 days')"""
+
+def grow(conn: sqlite3.Connection, start: int, stop: int, rows_per_session: int):
+    now = datetime.now()
+    def rows():
+        for i in range(start, stop):
+            ts = (now - timedelta(minutes=random.randint(0, 60 * 24 * 90))).isoformat(" ", "seconds")
+            yield (f"session-{i // rows_per_session}", "Two Sum", "def f(): pass", "{}", "ok", ts)
+    conn.executemany("""
+    INSERT INTO submissions (session_id, problem_name, code, analysis, feedback, submitted_at)
+    VALUES (?, ?, ?, ?, ?, ?)""", rows())
+    conn.commit()
+
+def time_query(conn: sqlite3.Connection, sql: str, params_fn, repeats: int) -> float:
+    samples = []
+    for _ in range(repeats):
+        params = params_fn()
+        t0 = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description="Submission query latency with and without session indexes")
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--rows-per-session", type=int, default=20)
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+    sizes = [int(s) for s in args.sizes.split(",")]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        plain = sqlite3.connect(str(Path(tmp) / "plain.db"))
+        indexed = sqlite3.connect(str(Path(tmp) / "indexed.db"))
+        migrate(plain, target=1)
+        migrate(indexed)
+
+        print(f"{'rows':>10} | {'recent (no idx)':>15} | {'recent (idx)':>12} | {'week (no idx)':>13} | {'week (idx)':>10}")
+        total = 0
+        for size in sizes:
+            random.seed(size)
+            grow(plain, total, size, args.rows_per_session)
+            random.seed(size)
+            grow(indexed, total, size, args.rows_per_session)
+            indexed.execute("ANALYZE")
+            total = size
+
+            sessions = max(1, size // args.rows_per_session)
+            pick = lambda: (f"session-{random.randrange(sessions)}",)
+            repeats = args.repeats
+            results = [
+                time_query(plain, RECENT_SQL, lambda: pick() + (5,), repeats),
+                time_query(indexed, RECENT_SQL, lambda: pick() + (5,), repeats),
+                time_query(plain, WEEK_SQL, pick, repeats),
+                time_query(indexed, WEEK_SQL, pick, repeats),
+            ]
+            print(f"{size:>10} | {results[0]:>12.3f} ms | {results[1]:>9.3f} ms | {results[2]:>10.3f} ms | {results[3]:>7.3f} ms")
+
+        plain.close()
+        indexed.close()
+
+if __name__ == "__main__":
+    main()
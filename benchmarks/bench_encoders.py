@@ -0,0 +1,126 @@
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+
+from utils.encoders import ENCODER_BACKENDS, load_encoder
+from utils.vector_store import MODEL_NAME
+
+def rss_mb() -> float:
+    try:
+        for line in Path("/proc/self/status").read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def code_corpus(n: int, seed: int):
+    patterns = json.loads((ROOT / "data/patterns/algorithm_patterns.json").read_text())
+    rng = random.Random(seed)
+    names = ["nums", "arr", "values", "data", "items"]
+    texts = []
+    while len(texts) < n:
+        pattern = rng.choice(patterns)
+        code = pattern.get("code", "").replace("nums", rng.choice(names))
+        lines = code.splitlines()
+        if len(lines) > 2:
+            lines.insert(rng.randrange(1, len(lines)), "    # step %d" % rng.randrange(100))
+        texts.append(pattern.get("description", "") + " " + "\n".join(lines))
+    return texts
+
+def worker(backend: str, args, out_path: str):
+    texts = code_corpus(args.corpus, args.seed)
+    before = rss_mb()
+    t0 = time.perf_counter()
+    encoder = load_encoder(args.model, backend, max_seq_length=args.max_seq_length, threads=args.threads,
+                           fallback=False)
+    load_s = time.perf_counter() - t0
+    encoder.encode(texts[:2], normalize_embeddings=True)
+
+    latencies = []
+    for text in texts[:args.queries]:
+        t0 = time.perf_counter()
+        encoder.encode([text], normalize_embeddings=True)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    t0 = time.perf_counter()
+    embeddings = encoder.encode(texts, batch_size=args.batch_size, normalize_embeddings=True)
+    batch_s = time.perf_counter() - t0
+    np.save(out_path, embeddings)
+    print(json.dumps({
+        "load_s": load_s,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "throughput": len(texts) / batch_s,
+        "rss_mb": rss_mb() - before,
+    }))
+
+def top_k_agreement(reference: np.ndarray, candidate: np.ndarray, queries: int, k: int) -> float:
+    ref_top = np.argsort(-(reference[:queries] @ reference.T), axis=1)[:, 1:k + 1]
+    cand_top = np.argsort(-(candidate[:queries] @ candidate.T), axis=1)[:, 1:k + 1]
+    return sum(len(set(r) & set(c)) for r, c in zip(ref_top, cand_top)) / ref_top.size
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency, memory and top-k agreement of encoder backends")
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--backends", default=",".join(ENCODER_BACKENDS))
+    parser.add_argument("--corpus", type=int, default=512)
+    parser.add_argument("--queries", type=int, default=64)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--max-seq-length", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--out", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker, args, args.out)
+        return
+
+    backends = args.backends.split(",")
+    passthrough = ["--model", args.model, "--corpus", str(args.corpus), "--queries", str(args.queries),
+                   "--batch-size", str(args.batch_size), "--seed", str(args.seed)]
+    if args.threads:
+        passthrough += ["--threads", str(args.threads)]
+    if args.max_seq_length:
+        passthrough += ["--max-seq-length", str(args.max_seq_length)]
+    results, embeddings = {}, {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in backends:
+            # Each backend runs in its own process so resident memory is measured in isolation.
+            out = os.path.join(tmp, f"{backend}.npy")
+            proc = subprocess.run([sys.executable, __file__, *passthrough, "--worker", backend, "--out", out],
+                                  capture_output=True, text=True)
+            if proc.returncode != 0:
+                print(f"{backend}: failed\n{proc.stderr.strip().splitlines()[-1] if proc.stderr else ''}")
+                continue
+            results[backend] = json.loads(proc.stdout.strip().splitlines()[-1])
+            embeddings[backend] = np.load(out)
+
+    if not results:
+        return
+    reference = "torch" if "torch" in embeddings else next(iter(embeddings))
+    print(f"model={args.model} corpus={args.corpus} queries={args.queries} k={args.k} reference={reference}")
+    print(f"{'backend':>10} | {'load':>6} | {'p50 ms':>7} | {'p95 ms':>7} | {'texts/s':>8} | {'RSS MB':>7} | "
+          f"{'cosine':>6} | top-k")
+    for backend, row in results.items():
+        cosine = float((embeddings[backend] * embeddings[reference]).sum(axis=1).mean())
+        agreement = top_k_agreement(embeddings[reference], embeddings[backend], args.queries, args.k)
+        print(f"{backend:>10} | {row['load_s']:>5.1f}s | {row['p50_ms']:>7.1f} | {row['p95_ms']:>7.1f} | "
+              f"{row['throughput']:>8.1f} | {row['rss_mb']:>7.0f} | {cosine:>6.3f} | {agreement:.3f}")
+
+if __name__ == "__main__":
+    main()
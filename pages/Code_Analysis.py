@@ -1,12 +1,15 @@
 import streamlit as st
-import json
 import pandas as pd
+import time
 import uuid
 
-from utils.code_analyzer import analyze_code
+from utils.code_analyzer import analyze_code, ANALYZER_VERSION
 from utils.database import get_database
-from utils.vector_store import get_vector_store
-from utils.langchain_gemini_client import get_langchain_gemini_client
+from utils.orchestrator import Stage, StageOrchestrator
+from utils.result_cache import get_result_cache
+from utils.schemas import feedback_markdown, pattern_markdown
+from utils.vector_store import start_vector_store_warmup
+from utils.langchain_gemini_client import get_langchain_gemini_client, PROMPT_VERSION
 
 st.title("📝 Code Analysis with AI Mentor")
 
@@ -33,16 +36,21 @@ with col2:
     analysis_mode = st.selectbox("Analysis Mode", ["Fast", "Balanced", "Comprehensive"])
 
 st.subheader("🔧 Analysis Options")
-a1, a2, a3 = st.columns(3)
+a1, a2, a3, a4 = st.columns(4)
 with a1: enable_pattern_detection = st.checkbox("🔍 Pattern Detection", value=True)
 with a2: enable_complexity_analysis = st.checkbox("📊 Complexity Analysis", value=True)
 with a3: enable_similarity_search = st.checkbox("🔗 Similar Solutions", value=True)
+with a4: merge_ai_calls = st.checkbox("⚡ Single AI Call", value=False,
+                                      help="Ask for feedback and pattern analysis in one request instead of two.")
 
 thinking_budget = 2048
+PATTERN_TIMEOUT = 90.0
+SIMILARITY_TIMEOUT = 20.0
 
 try:
     db = get_database()
-    vector_store = get_vector_store()
+    result_cache = get_result_cache()
+    vector_loader = start_vector_store_warmup()
     llm_client = get_langchain_gemini_client(analysis_mode=analysis_mode)
     services_loaded = True
 except Exception as e:
@@ -62,10 +70,46 @@ if st.button("🚀 Analyze Code", type="primary", use_container_width=True):
     progress_bar = st.progress(0)
     status = st.empty()
 
+    cached_stages = []
+
+    def cached(stage, compute, problem="", mode="", version="", cacheable=lambda value: True):
+        value, hit = result_cache.get_or_compute(stage, compute, code_input, problem, mode, version, cacheable)
+        if hit:
+            cached_stages.append(stage)
+        return value
+
+    def render_feedback(ai_feedback):
+        st.markdown("### 🤖 AI Mentor Feedback")
+        st.markdown(feedback_markdown(ai_feedback) if isinstance(ai_feedback, dict) else ai_feedback)
+
+    def render_patterns(pattern_analysis):
+        st.markdown("## 🧠 Pattern Analysis")
+
+        if isinstance(pattern_analysis, dict):
+            st.markdown(pattern_markdown(pattern_analysis))
+        elif pattern_analysis:
+            st.markdown(pattern_analysis)
+        else:
+            st.info("No pattern feedback generated.")
+
+    def render_similar(similar_solutions, similarity_note):
+        st.markdown("### 🔗 Similar Solutions")
+        if similar_solutions:
+            for i, (sol, score) in enumerate(similar_solutions):
+                with st.expander(f"Solution {i+1} (Score: {score:.2f})"):
+                    st.code(sol.get("code", ""), language="python")
+                    st.markdown(f"**Description:** {sol.get('description', 'N/A')}")
+                    st.markdown(f"**Use Cases:** {', '.join(sol.get('use_cases', []))}")
+        elif similarity_note:
+            st.info(similarity_note)
+        else:
+            st.info("No similar solutions found.")
+
     try:
         status.text("Step 1/4: Technical analysis...")
-        progress_bar.progress(25)
-        technical_analysis = analyze_code(code_input)
+        progress_bar.progress(10)
+        technical_analysis = cached("static analysis", lambda: analyze_code(code_input), version=ANALYZER_VERSION,
+                                    cacheable=lambda value: 'error' not in value)
 
         if 'error' in technical_analysis:
             st.warning(f"⚠️ Static analysis failed: {technical_analysis['error']}")
@@ -75,56 +119,156 @@ if st.button("🚀 Analyze Code", type="primary", use_container_width=True):
                 'quality_metrics': {'lines': len(code_input.splitlines()), 'characters': len(code_input)}
             })
 
-        pattern_analysis = ""
-        if enable_pattern_detection:
-            status.text("Step 2/4: Detecting patterns...")
-            progress_bar.progress(50)
-            try:
-                patterns = technical_analysis.get('patterns', [])
-                if patterns:
-                    pattern_analysis = llm_client.identify_code_patterns(code_input, patterns)
-                else:
-                    pattern_analysis = "⚠️ No patterns detected in static analysis."
-            except Exception as e:
-                st.warning(f"⚠️ Pattern analysis failed: {e}")
-                pattern_analysis = f"⚠️ Could not analyze patterns. Exception: {str(e)}"
+        tab1, tab2, tab3, tab4 = st.tabs(["🎯 AI Feedback", "📊 Technical", "🔍 Patterns", "🔗 Similar"])
 
-        similar_solutions = []
-        if enable_similarity_search:
-            status.text("Step 3/4: Finding similar solutions...")
-            progress_bar.progress(75)
-            try:
-                similar_solutions = vector_store.find_similar_patterns(code_input, k=3)
-            except Exception as e:
-                st.warning(f"Similarity search failed: {e}")
+        with tab2:
+            st.markdown("### 📊 Static Code Metrics")
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Time", technical_analysis.get('complexity', {}).get('time_complexity', 'N/A'))
+            with col2:
+                st.metric("Space", technical_analysis.get('complexity', {}).get('space_complexity', 'N/A'))
+            with col3:
+                st.metric("Lines", technical_analysis.get('quality_metrics', {}).get('lines', len(code_input.splitlines())))
+            if 'code_structure' in technical_analysis:
+                st.json(technical_analysis['code_structure'])
 
-        status.text("Step 4/4: Generating AI feedback...")
-        progress_bar.progress(90)
+        slots = {"feedback": tab1.empty(), "patterns": tab3.empty(), "similar": tab4.empty()}
+        for slot in slots.values():
+            slot.info("⏳ Working on it...")
 
+        stages = []
+        pattern_analysis = ""
+        patterns = technical_analysis.get('patterns', [])
+        merged = merge_ai_calls and enable_pattern_detection and bool(patterns)
+        if enable_pattern_detection and patterns and not merged:
+            stages.append(Stage("patterns", lambda: cached(
+                "patterns", lambda: llm_client.identify_code_patterns(code_input, patterns),
+                version=f"{PROMPT_VERSION}:{','.join(patterns)}",
+                cacheable=lambda value: isinstance(value, dict)), timeout=PATTERN_TIMEOUT))
+        elif enable_pattern_detection and not patterns:
+            pattern_analysis = "⚠️ No patterns detected in static analysis."
+
+        similarity_note = None
+        if enable_similarity_search:
+            vector_store = vector_loader.get(timeout=0)
+            if vector_store is None:
+                similarity_note = ("⏳ The similarity model is still loading. Try again in a few seconds."
+                                   if vector_loader.status == "loading" else
+                                   f"⚠️ Similarity search is unavailable: {vector_loader.error}")
+            else:
+                stages.append(Stage("similar", lambda: [tuple(item) for item in cached(
+                    "similar solutions", lambda: vector_store.find_similar_patterns(code_input, k=3),
+                    version=str(vector_store.next_id))], timeout=SIMILARITY_TIMEOUT))
+
+        ai_feedback, feedback_data = "", None
+        completed = []
+
+        total_stages = len(stages) + 1
+
+        def mark_complete(name, elapsed):
+            completed.append(name)
+            progress_bar.progress(10 + int(90 * len(completed) / total_stages))
+            status.text(f"Finished {len(completed)}/{total_stages} stages ({name} in {elapsed:.1f}s)...")
+
+        def pattern_value(result):
+            return result.value if result.ok else f"⚠️ Could not analyze patterns. Exception: {result.error}"
+
+        def similar_value(result):
+            return result.value if result.ok else []
+
+        def on_stage_complete(result):
+            mark_complete(result.name, result.elapsed)
+            if result.name == "patterns":
+                if not result.ok:
+                    st.warning(f"⚠️ Pattern analysis failed: {result.error}")
+                with slots["patterns"].container():
+                    render_patterns(pattern_value(result))
+            elif result.name == "similar":
+                if not result.ok:
+                    st.warning(f"Similarity search failed: {result.error}")
+                with slots["similar"].container():
+                    render_similar(similar_value(result), similarity_note)
+
+        status.text(f"Step 2/4: Running {total_stages} stages in parallel...")
+        orchestrator = StageOrchestrator()
+        orchestrator.start(stages)
+
+        def polling(chunks):
+            for chunk in chunks:
+                orchestrator.poll(on_stage_complete)
+                yield chunk
+
+        def stream_feedback():
+            feedback_key = result_cache.key_for("feedback", code_input, problem_name, analysis_mode, PROMPT_VERSION)
+            ai_response = result_cache.get(feedback_key)
+            if ai_response is not None:
+                cached_stages.append("feedback")
+                with slots["feedback"].container():
+                    render_feedback(ai_response)
+            else:
+                stream = llm_client.stream_code_analysis(code_input, problem_name, technical_analysis)
+                with slots["feedback"].container():
+                    st.markdown("### 🤖 AI Mentor Feedback")
+                    preview = st.empty()
+                    for partial in polling(stream):
+                        preview.markdown(feedback_markdown(partial) if isinstance(partial, dict) else partial)
+                ai_response = stream.result
+                if stream.error is None and isinstance(ai_response, dict):
+                    result_cache.put(feedback_key, "feedback", ai_response)
+                    if stream.hit is not None:
+                        tab1.caption(f"♻️ Reused feedback from a near-identical solution "
+                                     f"(similarity {stream.hit.similarity:.2f}, ~{stream.hit.tokens:,} tokens saved)")
+                    else:
+                        tab1.caption(f"⏱️ First token {stream.ttft:.2f}s · full response {stream.total:.2f}s")
+            return ai_response
+
+        def merged_feedback():
+            result = cached("combined", lambda: llm_client.analyze_code_combined(
+                code_input, problem_name, technical_analysis, patterns), problem_name, analysis_mode,
+                f"{PROMPT_VERSION}:{','.join(patterns)}", cacheable=lambda value: "error" not in value)
+            with slots["feedback"].container():
+                render_feedback(result.get("feedback", ""))
+            return result
+
+        results = {}
         try:
-            ai_response = llm_client.analyze_code_with_ai(
-                code=code_input,
-                problem_name=problem_name,
-                analysis=technical_analysis
-            )
-
+            feedback_started = time.perf_counter()
             try:
-                ai_result = json.loads(ai_response)
-                ai_feedback = ai_result.get("feedback", ai_response)
-                category = ai_result.get("category", "Unknown")
-            except json.JSONDecodeError:
-                ai_feedback = ai_response
-                category = "Unknown"
-
-        except Exception as e:
-            ai_feedback = f"⚠️ Failed to generate feedback: {e}"
-            category = "Unknown"
+                if merged:
+                    combined = merged_feedback()
+                    pattern_analysis, ai_response = combined.get("patterns", ""), combined.get("feedback", "")
+                else:
+                    ai_response = stream_feedback()
+                if isinstance(ai_response, dict):
+                    feedback_data, ai_feedback = ai_response, feedback_markdown(ai_response)
+                else:
+                    ai_feedback = ai_response
+            except Exception as e:
+                ai_feedback = f"⚠️ Failed to generate feedback: {e}"
+                with slots["feedback"].container():
+                    render_feedback(ai_feedback)
+            mark_complete("feedback", time.perf_counter() - feedback_started)
+            results = orchestrator.wait(on_stage_complete)
+        finally:
+            orchestrator.cancel()
+
+        if "patterns" in results:
+            pattern_analysis = pattern_value(results["patterns"])
+        else:
+            with slots["patterns"].container():
+                render_patterns(pattern_analysis)
+        if "similar" not in results:
+            with slots["similar"].container():
+                render_similar([], similarity_note)
 
         progress_bar.progress(100)
         status.text("✅ Analysis complete!")
         progress_bar.empty()
         status.empty()
         st.success("✅ Code analyzed successfully!")
+        if cached_stages:
+            st.caption(f"⚡ Served from cache: {', '.join(cached_stages)}")
 
         try:
             db.save_submission(
@@ -132,77 +276,20 @@ if st.button("🚀 Analyze Code", type="primary", use_container_width=True):
                 problem_name.strip(),
                 code_input.strip(),
                 technical_analysis,
-                ai_feedback
+                ai_feedback,
+                structured={"feedback": feedback_data,
+                            "patterns": pattern_analysis if isinstance(pattern_analysis, dict) else None}
             )
         except Exception as e:
             st.warning(f"DB save failed: {e}")
 
-        tab1, tab2, tab3, tab4 = st.tabs(["🎯 AI Feedback", "📊 Technical", "🔍 Patterns", "🔗 Similar"])
-
-        with tab1:
-            st.markdown("### 🤖 AI Mentor Feedback")
-            st.markdown(ai_feedback)
-
-        with tab2:
-            st.markdown("### 📊 Static Code Metrics")
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                st.metric("Time", technical_analysis.get('complexity', {}).get('time_complexity', 'N/A'))
-            with col2:
-                st.metric("Space", technical_analysis.get('complexity', {}).get('space_complexity', 'N/A'))
-            with col3:
-                st.metric("Lines", technical_analysis.get('quality_metrics', {}).get('lines', len(code_input.splitlines())))
-            if 'code_structure' in technical_analysis:
-                st.json(technical_analysis['code_structure'])
-        with tab3:
-            st.markdown("## 🧠 Pattern Analysis")
-
-            if pattern_analysis:
-                import re
-
-                sections = re.split(r"(###.*)", pattern_analysis)
-                rendered = []
-
-                for i in range(1, len(sections), 2):
-                    header = sections[i].strip()
-                    body = sections[i+1].strip() if i+1 < len(sections) else ""
-
-                    if "Primary Pattern" in header:
-                        emoji = "🔍"
-                    elif "Usage Quality" in header:
-                        emoji = "🧪"
-                    elif "Alternative" in header:
-                        emoji = "🔁"
-                    elif "Optimizations" in header:
-                        emoji = "🚀"
-                    elif "Related" in header:
-                        emoji = "🔗"
-                    else:
-                        emoji = "🔸"
-
-                    st.markdown(f"### {emoji} {header.replace('###', '').strip()}")
-                    st.markdown(body)
-
-            else:
-                st.info("No pattern feedback generated.")
-
-        with tab4:
-            st.markdown("### 🔗 Similar Solutions")
-            if similar_solutions:
-                for i, (sol, score) in enumerate(similar_solutions):
-                    with st.expander(f"Solution {i+1} (Score: {score:.2f})"):
-                        st.code(sol.get("code", ""), language="python")
-                        st.markdown(f"**Description:** {sol.get('description', 'N/A')}")
-                        st.markdown(f"**Use Cases:** {', '.join(sol.get('use_cases', []))}")
-            else:
-                st.info("No similar solutions found.")
-
         st.session_state.analysis_history.append({
             "problem_name": problem_name.strip(),
             "code_preview": code_input[:100] + "..." if len(code_input) > 100 else code_input,
             "timestamp": pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S"),
             "ai_feedback": ai_feedback,
-            "category": category,
+            "category": feedback_data.get("category", "Unknown") if feedback_data else "Unknown",
+            "language": technical_analysis.get('language', 'python'),
         })
 
     except Exception as e:
@@ -214,5 +301,5 @@ if st.session_state.analysis_history:
     for entry in reversed(st.session_state.analysis_history[-5:]):
         with st.expander(f"{entry['problem_name']} ({entry.get('category', 'Unknown')})"):
             st.markdown(f"**🕒 Date:** {entry['timestamp']}")
-            st.code(entry['code_preview'], language="python")
+            st.code(entry['code_preview'], language=entry.get('language', 'python'))
             st.markdown(entry["ai_feedback"][:300] + "..." if len(entry["ai_feedback"]) > 300 else entry["ai_feedback"])
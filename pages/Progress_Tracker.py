@@ -34,13 +34,7 @@ if st.sidebar.button("📊 Add Sample Data"):
 if st.sidebar.button("🗑️ Clear All Data"):
     if db_loaded:
         try:
-            import sqlite3
-            conn = sqlite3.connect(db.db_path)
-            c = conn.cursor()
-            c.execute("DELETE FROM progress WHERE session_id = ?", (session_id,))
-            c.execute("DELETE FROM submissions WHERE session_id = ?", (session_id,))
-            conn.commit()
-            conn.close()
+            db.clear_session_data(session_id)
             st.sidebar.success("✅ Data cleared!")
             st.rerun()
         except Exception as e:
@@ -196,6 +190,33 @@ else:
                 st.warning("📈 **Good Progress!** Focus on weak areas")
             else:
                 st.error("💪 **Keep Practicing!** You're improving")
+    st.subheader("🤖 AI Feedback Breakdown")
+    feedback_df = db.get_feedback_breakdown(session_id)
+    if len(feedback_df) > 0:
+        breakdown_col1, breakdown_col2 = st.columns(2)
+        with breakdown_col1:
+            fig_categories = px.bar(
+                feedback_df.groupby('category', as_index=False)['submissions'].sum(),
+                x='category',
+                y='submissions',
+                title="Reviewed Solutions by Category"
+            )
+            st.plotly_chart(fig_categories, use_container_width=True)
+        with breakdown_col2:
+            fig_difficulty = px.pie(
+                feedback_df.groupby('difficulty', as_index=False)['submissions'].sum(),
+                values='submissions',
+                names='difficulty',
+                title="Reviewed Solutions by Difficulty"
+            )
+            st.plotly_chart(fig_difficulty, use_container_width=True)
+        improvements_df = db.get_common_insights(session_id, "improvement", 5)
+        if len(improvements_df) > 0:
+            st.markdown("**Most frequent improvement suggestions:**")
+            for _, row in improvements_df.iterrows():
+                st.markdown(f"- {row['text']} (×{row['occurrences']})")
+    else:
+        st.info("Analyze code in the Code Analysis page to see a breakdown of your AI feedback")
 
 st.sidebar.markdown("### 📈 Quick Stats")
 if user_stats:
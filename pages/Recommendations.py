@@ -2,6 +2,8 @@ import streamlit as st
 from utils.langchain_gemini_client import get_langchain_gemini_client
 from utils.database import get_database
 from utils.leetcode_client import LeetCodeClient
+from utils.problem_catalog import get_problem_catalog
+from utils.recommendation_engine import get_recommendation_engine
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
@@ -36,23 +38,16 @@ def get_daily_seed():
 def get_session_seed(session_id):
     return int(hashlib.md5(session_id.encode()).hexdigest()[:8], 16)
 
-def get_random_problems(problem_list, n=5, seed=None, shuffle_override=False):
-    if not problem_list:
-        return []
-    
-    if shuffle_override and st.session_state.get('problem_shuffle_seed'):
-        seed = st.session_state.problem_shuffle_seed
-    elif seed is None:
-        seed = get_week_seed()
-    
-    random.seed(seed)
-    
-    if len(problem_list) <= n:
-        shuffled = problem_list.copy()
-        random.shuffle(shuffled)
-        return shuffled
-    
-    return random.sample(problem_list, n)
+def get_sampling_seed():
+    return [get_session_seed(st.session_state.session_id), get_week_seed(), st.session_state.problem_shuffle_seed or 0]
+
+@st.cache_data(max_entries=1024, show_spinner=False)
+def sample_problems(session_seed, week, shuffle_seed, category, n):
+    # Cached per (session, week, shuffle seed, category); the private Random leaves other sessions' state alone.
+    catalog = get_problem_catalog()
+    problems = catalog.find(difficulty="Easy") if category == "general" else catalog.by_category(category)
+    rng = random.Random(f"{session_seed}:{week}:{shuffle_seed}:{category}")
+    return rng.sample(problems, min(n, len(problems)))
 
 def shuffle_problems():
     st.session_state.problem_shuffle_seed = random.randint(1, 1000000)
@@ -82,13 +77,7 @@ with col1:
 with col2:
     if st.button("🔄 Reset Data"):
         try:
-            import sqlite3
-            conn = sqlite3.connect("data/mentor.db")
-            c = conn.cursor()
-            c.execute("DELETE FROM submissions WHERE session_id = ?", (st.session_state.session_id,))
-            c.execute("DELETE FROM progress WHERE session_id = ?", (st.session_state.session_id,))
-            conn.commit()
-            conn.close()
+            db.clear_session_data(st.session_state.session_id)
             st.sidebar.success("Data reset!")
             st.rerun()
         except Exception as e:
@@ -180,6 +169,8 @@ def collect_enhanced_user_data():
     except:
         recent_submissions = pd.DataFrame()
     
+    common_improvements = db.get_common_insights(st.session_state.session_id, "improvement", 5)
+    
     problems_solved = user_stats.get('total_problems', 0)
     
     if problems_solved == 0:
@@ -203,6 +194,7 @@ def collect_enhanced_user_data():
         'time_per_day': time_per_day,
         'target_timeline': target_timeline,
         'recent_submissions': recent_submissions.to_dict('records') if not recent_submissions.empty else [],
+        'recurring_improvements': common_improvements['text'].tolist() if not common_improvements.empty else [],
         'experience_note': experience_note,
         'success_rate': user_stats.get('success_rate', 0),
         'user_id': st.session_state.session_id
@@ -398,7 +390,13 @@ if st.button("🚀 Generate My AI Learning Plan", type="primary"):
         
         try:
             if services_loaded:
-                learning_plan = llm_client.generate_learning_path(user_data)
+                stream = llm_client.stream_learning_path(user_data)
+                plan_preview = st.empty()
+                with plan_preview.container():
+                    learning_plan = st.write_stream(stream)
+                plan_preview.empty()
+                if stream.ttft is not None:
+                    st.caption(f"⏱️ First token {stream.ttft:.2f}s · full plan {stream.total:.2f}s")
                 st.session_state.learning_plan = learning_plan
                 st.session_state.user_profile = user_data
                 st.session_state.plan_generated_date = pd.Timestamp.now().strftime('%Y-%m-%d')
@@ -461,82 +459,12 @@ Timeline: {st.session_state.user_profile.get('target_timeline', 'Not specified')
     if st.session_state.plan_generated_date:
         st.caption(f"📅 Generated on: {st.session_state.plan_generated_date}")
 
-def get_all_fallback_problems():
-    return [
-        {"id": "1", "title": "Two Sum", "difficulty": "Easy", "category": "Array/String", "url": "https://leetcode.com/problems/two-sum/"},
-        {"id": "26", "title": "Remove Duplicates from Sorted Array", "difficulty": "Easy", "category": "Array/String", "url": "https://leetcode.com/problems/remove-duplicates-from-sorted-array/"},
-        {"id": "27", "title": "Remove Element", "difficulty": "Easy", "category": "Array/String", "url": "https://leetcode.com/problems/remove-element/"},
-        {"id": "283", "title": "Move Zeroes", "difficulty": "Easy", "category": "Array/String", "url": "https://leetcode.com/problems/move-zeroes/"},
-        {"id": "121", "title": "Best Time to Buy and Sell Stock", "difficulty": "Easy", "category": "Array/String", "url": "https://leetcode.com/problems/best-time-to-buy-and-sell-stock/"},
-        
-        {"id": "122", "title": "Best Time to Buy and Sell Stock II", "difficulty": "Medium", "category": "Array/String", "url": "https://leetcode.com/problems/best-time-to-buy-and-sell-stock-ii/"},
-        {"id": "53", "title": "Maximum Subarray", "difficulty": "Medium", "category": "Array/String", "url": "https://leetcode.com/problems/maximum-subarray/"},
-        {"id": "15", "title": "3Sum", "difficulty": "Medium", "category": "Array/String", "url": "https://leetcode.com/problems/3sum/"},
-        {"id": "238", "title": "Product of Array Except Self", "difficulty": "Medium", "category": "Array/String", "url": "https://leetcode.com/problems/product-of-array-except-self/"},
-        {"id": "11", "title": "Container With Most Water", "difficulty": "Medium", "category": "Array/String", "url": "https://leetcode.com/problems/container-with-most-water/"},
-        
-        {"id": "70", "title": "Climbing Stairs", "difficulty": "Easy", "category": "Dynamic Programming", "url": "https://leetcode.com/problems/climbing-stairs/"},
-        {"id": "746", "title": "Min Cost Climbing Stairs", "difficulty": "Easy", "category": "Dynamic Programming", "url": "https://leetcode.com/problems/min-cost-climbing-stairs/"},
-        
-        {"id": "198", "title": "House Robber", "difficulty": "Medium", "category": "Dynamic Programming", "url": "https://leetcode.com/problems/house-robber/"},
-        {"id": "213", "title": "House Robber II", "difficulty": "Medium", "category": "Dynamic Programming", "url": "https://leetcode.com/problems/house-robber-ii/"},
-        {"id": "322", "title": "Coin Change", "difficulty": "Medium", "category": "Dynamic Programming", "url": "https://leetcode.com/problems/coin-change/"},
-        {"id": "300", "title": "Longest Increasing Subsequence", "difficulty": "Medium", "category": "Dynamic Programming", "url": "https://leetcode.com/problems/longest-increasing-subsequence/"},
-        {"id": "139", "title": "Word Break", "difficulty": "Medium", "category": "Dynamic Programming", "url": "https://leetcode.com/problems/word-break/"},
-        {"id": "62", "title": "Unique Paths", "difficulty": "Medium", "category": "Dynamic Programming", "url": "https://leetcode.com/problems/unique-paths/"},
-        {"id": "72", "title": "Edit Distance", "difficulty": "Hard", "category": "Dynamic Programming", "url": "https://leetcode.com/problems/edit-distance/"},
-        
-        {"id": "206", "title": "Reverse Linked List", "difficulty": "Easy", "category": "Linked Lists", "url": "https://leetcode.com/problems/reverse-linked-list/"},
-        {"id": "21", "title": "Merge Two Sorted Lists", "difficulty": "Easy", "category": "Linked Lists", "url": "https://leetcode.com/problems/merge-two-sorted-lists/"},
-        {"id": "141", "title": "Linked List Cycle", "difficulty": "Easy", "category": "Linked Lists", "url": "https://leetcode.com/problems/linked-list-cycle/"},
-        {"id": "142", "title": "Linked List Cycle II", "difficulty": "Medium", "category": "Linked Lists", "url": "https://leetcode.com/problems/linked-list-cycle-ii/"},
-        {"id": "2", "title": "Add Two Numbers", "difficulty": "Medium", "category": "Linked Lists", "url": "https://leetcode.com/problems/add-two-numbers/"},
-        {"id": "19", "title": "Remove Nth Node From End of List", "difficulty": "Medium", "category": "Linked Lists", "url": "https://leetcode.com/problems/remove-nth-node-from-end-of-list/"},
-        
-        {"id": "94", "title": "Binary Tree Inorder Traversal", "difficulty": "Easy", "category": "Trees & Graphs", "url": "https://leetcode.com/problems/binary-tree-inorder-traversal/"},
-        {"id": "104", "title": "Maximum Depth of Binary Tree", "difficulty": "Easy", "category": "Trees & Graphs", "url": "https://leetcode.com/problems/maximum-depth-of-binary-tree/"},
-        {"id": "226", "title": "Invert Binary Tree", "difficulty": "Easy", "category": "Trees & Graphs", "url": "https://leetcode.com/problems/invert-binary-tree/"},
-        {"id": "102", "title": "Binary Tree Level Order Traversal", "difficulty": "Medium", "category": "Trees & Graphs", "url": "https://leetcode.com/problems/binary-tree-level-order-traversal/"},
-        {"id": "200", "title": "Number of Islands", "difficulty": "Medium", "category": "Trees & Graphs", "url": "https://leetcode.com/problems/number-of-islands/"},
-        {"id": "133", "title": "Clone Graph", "difficulty": "Medium", "category": "Trees & Graphs", "url": "https://leetcode.com/problems/clone-graph/"},
-        
-        {"id": "125", "title": "Valid Palindrome", "difficulty": "Easy", "category": "Two Pointers", "url": "https://leetcode.com/problems/valid-palindrome/"},
-        {"id": "167", "title": "Two Sum II - Input Array Is Sorted", "difficulty": "Medium", "category": "Two Pointers", "url": "https://leetcode.com/problems/two-sum-ii-input-array-is-sorted/"},
-        {"id": "42", "title": "Trapping Rain Water", "difficulty": "Hard", "category": "Two Pointers", "url": "https://leetcode.com/problems/trapping-rain-water/"},
-        
-        {"id": "3", "title": "Longest Substring Without Repeating Characters", "difficulty": "Medium", "category": "Sliding Window", "url": "https://leetcode.com/problems/longest-substring-without-repeating-characters/"},
-        {"id": "76", "title": "Minimum Window Substring", "difficulty": "Hard", "category": "Sliding Window", "url": "https://leetcode.com/problems/minimum-window-substring/"},
-        {"id": "209", "title": "Minimum Size Subarray Sum", "difficulty": "Medium", "category": "Sliding Window", "url": "https://leetcode.com/problems/minimum-size-subarray-sum/"},
-        {"id": "424", "title": "Longest Repeating Character Replacement", "difficulty": "Medium", "category": "Sliding Window", "url": "https://leetcode.com/problems/longest-repeating-character-replacement/"},
-        
-        {"id": "704", "title": "Binary Search", "difficulty": "Easy", "category": "Sorting & Searching", "url": "https://leetcode.com/problems/binary-search/"},
-        {"id": "35", "title": "Search Insert Position", "difficulty": "Easy", "category": "Sorting & Searching", "url": "https://leetcode.com/problems/search-insert-position/"},
-        {"id": "33", "title": "Search in Rotated Sorted Array", "difficulty": "Medium", "category": "Sorting & Searching", "url": "https://leetcode.com/problems/search-in-rotated-sorted-array/"},
-        {"id": "153", "title": "Find Minimum in Rotated Sorted Array", "difficulty": "Medium", "category": "Sorting & Searching", "url": "https://leetcode.com/problems/find-minimum-in-rotated-sorted-array/"},
-        
-        {"id": "46", "title": "Permutations", "difficulty": "Medium", "category": "Backtracking", "url": "https://leetcode.com/problems/permutations/"},
-        {"id": "78", "title": "Subsets", "difficulty": "Medium", "category": "Backtracking", "url": "https://leetcode.com/problems/subsets/"},
-        {"id": "39", "title": "Combination Sum", "difficulty": "Medium", "category": "Backtracking", "url": "https://leetcode.com/problems/combination-sum/"},
-        {"id": "17", "title": "Letter Combinations of a Phone Number", "difficulty": "Medium", "category": "Backtracking", "url": "https://leetcode.com/problems/letter-combinations-of-a-phone-number/"},
-        
-        {"id": "55", "title": "Jump Game", "difficulty": "Medium", "category": "Greedy Algorithms", "url": "https://leetcode.com/problems/jump-game/"},
-        {"id": "45", "title": "Jump Game II", "difficulty": "Medium", "category": "Greedy Algorithms", "url": "https://leetcode.com/problems/jump-game-ii/"},
-        {"id": "134", "title": "Gas Station", "difficulty": "Medium", "category": "Greedy Algorithms", "url": "https://leetcode.com/problems/gas-station/"},
-    ]
-
 def get_fallback_problems(category):
-    all_problems = get_all_fallback_problems()
-    
-    if category == "general":
-        easy_problems = [p for p in all_problems if p["difficulty"] == "Easy"]
-        return get_random_problems(easy_problems, n=8, shuffle_override=True)
-    
-    category_problems = [p for p in all_problems if p["category"] == category]
-    return get_random_problems(category_problems, n=6, shuffle_override=True)
+    return sample_problems(*get_sampling_seed(), category, 8 if category == "general" else 6)
 
 st.subheader("💡 Recommended Problems")
 
-current_seed = st.session_state.get('problem_shuffle_seed', get_week_seed())
+current_seed = st.session_state.problem_shuffle_seed or get_week_seed()
 if st.session_state.get('problem_shuffle_seed'):
     st.info(f"🎲 Showing shuffled problems (Seed: {current_seed})")
 else:
@@ -613,16 +541,25 @@ day_icons = ['🌟', '💪', '🎯', '🚀', '⚡', '🏆', '🔄']
 
 st.markdown("**✨ Personalized Weekly Study Plan**")
 
+if weak_areas:
+    schedule_topics = [weak_areas[i % len(weak_areas)] for i in range(len(days))]
+else:
+    schedule_topics = ["Arrays", "Strings", "Linked Lists", "Trees", "Graphs", "DP", "Mixed Review"]
+schedule_difficulties = ["Easy", "Easy", "Medium", "Medium", "Medium", "Hard", "Review"]
+
+week_plan = get_recommendation_engine().plan(
+    schedule_topics, schedule_difficulties,
+    weak_areas=weak_areas,
+    success_rates=db.get_topic_success_rates(st.session_state.session_id),
+    attempted=db.get_attempted_problems(st.session_state.session_id),
+    seed=get_sampling_seed()
+)
+
 for i, day in enumerate(days):
     with st.expander(f"{day_icons[i]} {day}", expanded=(i==0)):
         
-        if weak_areas:
-            topic = weak_areas[i % len(weak_areas)]
-            difficulty = ["Easy", "Easy", "Medium", "Medium", "Medium", "Hard", "Review"][i]
-        else:
-            topics = ["Arrays", "Strings", "Linked Lists", "Trees", "Graphs", "DP", "Mixed Review"]
-            topic = topics[i]
-            difficulty = ["Easy", "Easy", "Medium", "Medium", "Medium", "Hard", "Review"][i]
+        topic = schedule_topics[i]
+        difficulty = schedule_difficulties[i]
         
         col1, col2 = st.columns([2, 1])
         
@@ -662,9 +599,8 @@ for i, day in enumerate(days):
             
             if topic != "Mixed Review":
                 st.markdown("**🔗 Quick Start**")
-                topic_problems = get_fallback_problems(topic)
-                if topic_problems:
-                    first_problem = topic_problems[0]
+                if week_plan[i]:
+                    first_problem = week_plan[i][0]
                     st.markdown(f"[🚀 {first_problem['title']}]({first_problem.get('url', '#')})")
 
 st.sidebar.markdown("### 📈 Quick Stats")
@@ -1,5 +1,6 @@
 import streamlit as st
 from utils.database import get_database
+from utils.semantic_cache import get_semantic_cache
 
 def main():
     st.title("⚙️ Settings")
@@ -19,5 +20,26 @@ def main():
     st.checkbox("Enable local SQLite persistence", value=True)
     st.markdown("Database path: `data/mentor.db` (read-only display)")
 
+    st.markdown("---")
+    st.markdown("### ♻️ Semantic Response Cache")
+    try:
+        semantic_cache = get_semantic_cache()
+        stats = semantic_cache.stats()
+    except Exception as e:
+        st.warning(f"Semantic cache unavailable: {e}")
+        return
+    st.checkbox("Reuse feedback for near-identical solutions", value=semantic_cache.enabled, disabled=True)
+    st.slider("Similarity Threshold", 0.80, 1.00, float(stats['threshold']), disabled=True)
+    st.number_input("Staleness TTL (hours)", value=float(stats['ttl_hours']), disabled=True)
+    st.caption("Set `SEMANTIC_CACHE_ENABLED`, `SEMANTIC_CACHE_THRESHOLD` and `SEMANTIC_CACHE_TTL_HOURS` in "
+               "`.streamlit/secrets.toml` to change these.")
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Hits", stats['hits'])
+    c2.metric("Misses", stats['misses'])
+    c3.metric("Hit Rate", f"{stats['hit_rate']:.0%}")
+    c4.metric("Tokens Saved", f"{stats.get('saved_tokens_total', stats['saved_tokens']):,}")
+    st.caption(f"{stats['disk_entries']:,} cached responses stored. {stats['rejected']:,} similar solutions were "
+               "analysed afresh because their complexity or patterns differed from the cached one.")
+
 if __name__ == "__main__":
     main()
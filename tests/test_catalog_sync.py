@@ -0,0 +1,117 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from utils.catalog_sync import CatalogSyncer, build_session
+from utils.problem_store import ProblemStore
+
+PROBLEMS = [{"frontend_id": str(i), "title": f"Problem {i}", "title_slug": f"problem-{i}",
+             "difficulty": ["Easy", "Medium", "Hard"][i % 3], "topicTags": [{"name": "Array"}]}
+            for i in range(1, 6)]
+
+class StubServer:
+    def __init__(self):
+        self.requests = []
+        self.limited = {"problem-2"}
+        self.broken = {"problem-3"}
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def reply(self, status, body=b"", headers=None):
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                with stub._lock:
+                    stub.requests.append((self.path, self.headers.get("If-None-Match")))
+                    limited = self.path.rsplit("/", 1)[-1] in stub.limited
+                    stub.limited.discard(self.path.rsplit("/", 1)[-1])
+                if self.path == "/problems":
+                    payload, etag = PROBLEMS, '"list-v1"'
+                elif self.path.startswith("/problem/"):
+                    slug = self.path.rsplit("/", 1)[-1]
+                    if limited:
+                        return self.reply(429, headers={"Retry-After": "1"})
+                    if slug in stub.broken:
+                        return self.reply(503)
+                    payload, etag = {"content": f"<p>About {slug}</p>"}, f'"{slug}-v1"'
+                else:
+                    return self.reply(404)
+                if self.headers.get("If-None-Match") == etag:
+                    return self.reply(304, headers={"ETag": etag})
+                self.reply(200, json.dumps(payload).encode(), {"ETag": etag, "Content-Type": "application/json"})
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def hits(self, path):
+        return [etag for requested, etag in self.requests if requested == path]
+
+@pytest.fixture
+def server():
+    stub = StubServer()
+    stub.thread.start()
+    yield stub
+    stub.server.shutdown()
+    stub.server.server_close()
+
+@pytest.fixture
+def store(tmp_path):
+    store = ProblemStore(tmp_path / "leetcode.db")
+    yield store
+    store.close()
+
+def make_syncer(store, server):
+    return CatalogSyncer(store, server.url, concurrency=2, timeout=5,
+                         session=build_session(2, max_retries=2, backoff_factor=0))
+
+def test_list_is_revalidated_with_etag(store, server):
+    syncer = make_syncer(store, server)
+    assert syncer.sync_list() == len(PROBLEMS)
+    assert syncer.stats['updated'] == 1
+
+    again = make_syncer(store, server)
+    assert again.sync_list() == 0
+    assert again.stats['not_modified'] == 1
+    assert server.hits("/problems") == [None, '"list-v1"']
+    assert store.count() == len(PROBLEMS)
+    assert store.search("Problem 4")[0]["slug"] == "problem-4"
+
+def test_rate_limited_detail_honours_retry_after(store, server):
+    server.broken.clear()
+    syncer = make_syncer(store, server)
+    syncer.sync_list()
+    started = time.monotonic()
+    assert syncer.sync_details() == len(PROBLEMS)
+    assert time.monotonic() - started >= 1.0
+    assert len(server.hits("/problem/problem-2")) == 2
+    assert syncer.stats['failed'] == 0
+    assert "About problem-2" in json.dumps(store.get_problem("problem-2"))
+
+def test_details_are_revalidated_and_failures_counted(store, server):
+    server.limited.clear()
+    syncer = make_syncer(store, server)
+    syncer.sync_list()
+    assert syncer.sync_details() == len(PROBLEMS) - 1
+    assert syncer.stats['failed'] == 1
+    # One attempt plus two retries before the 503 is given up on.
+    assert len(server.hits("/problem/problem-3")) == 3
+
+    again = make_syncer(store, server)
+    assert again.sync_details(max_age_days=0) == len(PROBLEMS) - 1
+    assert again.stats['not_modified'] == len(PROBLEMS) - 1
+    assert server.hits("/problem/problem-1")[-1] == '"problem-1-v1"'
@@ -0,0 +1,95 @@
+import pytest
+
+from utils.code_analyzer import analyze_code, code_fingerprint, detect_language, normalize_code
+
+CPP_SIZE_LOOP = """int countEven(const Numbers& a) {
+    int count = 0;
+    for (int i = 0; i < a.size(); i++) {
+        if (a[i] % 2 == 0) count++;
+    }
+    return count;
+}
+"""
+
+CPP_CLASS = """class Solution {
+public:
+    int maxProfit(vector<int>& prices) {
+        int best = 0, low = prices[0];
+        for (int i = 1; i < prices.size(); i++) {
+            low = min(low, prices[i]);
+            best = max(best, prices[i] - low);
+        }
+        return best;
+    }
+};
+"""
+
+JAVA_PLAIN_CLASS = """class Solution {
+    int maxProfit(int[] prices) {
+        int best = 0, low = prices[0];
+        for (int i = 1; i < prices.length; i++) {
+            low = Math.min(low, prices[i]);
+            best = Math.max(best, prices[i] - low);
+        }
+        return best;
+    }
+}
+"""
+
+JAVA_STRING_METHOD = """class Solution {
+    boolean isPalindrome(String s) {
+        int i = 0, j = s.length() - 1;
+        while (i < j) {
+            if (s.charAt(i++) != s.charAt(j--)) return false;
+        }
+        return true;
+    }
+}
+"""
+
+PYTHON_WITH_HINTS = """def is_number(s: str) -> bool:
+    # String check; returns a bool
+    return s.isdigit()
+"""
+
+PYTHON_WITH_BRACES = """def parse(s: str) -> bool:
+    counts = {}
+    for part in s.split(";"):
+        counts[part] = len(part) // 2
+    return bool(counts)
+"""
+
+@pytest.mark.parametrize("code, language", [
+    (CPP_SIZE_LOOP, 'cpp'),
+    (CPP_CLASS, 'cpp'),
+    (JAVA_PLAIN_CLASS, 'java'),
+    (JAVA_STRING_METHOD, 'java'),
+    (PYTHON_WITH_HINTS, 'python'),
+    (PYTHON_WITH_BRACES, 'python'),
+])
+def test_detect_language(code, language):
+    assert detect_language(code) == language
+
+def test_size_loop_is_analyzed_as_cpp():
+    result = analyze_code(CPP_SIZE_LOOP)
+    assert result['language'] == 'cpp'
+    assert result['complexity']['time_complexity'] == 'O(n)'
+
+def test_valid_python_with_braces_is_analyzed_as_python():
+    result = analyze_code(PYTHON_WITH_BRACES)
+    assert result['language'] == 'python'
+    assert result['code_structure']['functions'] == ['parse']
+    assert result['complexity']['time_complexity'] == 'O(n)'
+
+@pytest.mark.parametrize("first, second", [
+    ("def half(n)\n    return n // 2\n", "def half(n)\n    return n // 3 + 100\n"),
+    ("mid = (lo + hi) // 2 +", "mid = (lo + hi) // 3 +"),
+    ("def f(n):\n    return n // 2\n", "def f(n):\n    return n // 3 + 100\n"),
+])
+def test_floor_division_is_not_a_comment(first, second):
+    assert code_fingerprint(first) != code_fingerprint(second)
+    assert "// 2" in normalize_code(first)
+
+def test_c_family_comments_do_not_change_the_fingerprint():
+    commented = CPP_CLASS.replace("int best = 0", "// track the best sale\n        int best = 0")
+    assert code_fingerprint(commented) == code_fingerprint(CPP_CLASS)
@@ -0,0 +1,24 @@
+import numpy as np
+
+from utils.embedding_cache import EmbeddingCache
+
+def test_overwriting_a_key_does_not_grow_the_disk_count(tmp_path):
+    cache = EmbeddingCache(tmp_path / "embeddings.db", max_memory_entries=2, max_disk_entries=5)
+    for _ in range(20):
+        cache.put("same", np.ones(4))
+    assert cache.stats()['disk_entries'] == 1
+    assert cache.stats()['disk_evictions'] == 0
+    cache.close()
+
+    reopened = EmbeddingCache(tmp_path / "embeddings.db")
+    assert reopened.stats()['disk_entries'] == 1
+    np.testing.assert_array_equal(reopened.get("same"), np.ones(4, dtype='float32'))
+    reopened.close()
+
+def test_disk_is_trimmed_once_new_keys_exceed_the_limit(tmp_path):
+    cache = EmbeddingCache(tmp_path / "embeddings.db", max_memory_entries=2, max_disk_entries=10)
+    for i in range(11):
+        cache.put(str(i), np.full(4, i))
+    assert cache.stats()['disk_entries'] == 9
+    assert cache.stats()['disk_evictions'] == 2
+    cache.close()
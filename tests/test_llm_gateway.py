@@ -0,0 +1,103 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from langchain_core.language_models import FakeListChatModel
+
+from utils.llm_gateway import LLMGateway, TokenBucket, estimate_tokens
+
+class HTTPError(Exception):
+    def __init__(self, status_code: int, message: str = ""):
+        super().__init__(message or f"HTTP {status_code}")
+        self.status_code = status_code
+
+class FlakyChatModel(FakeListChatModel):
+    failures: list = []
+    calls: int = 0
+
+    def _call(self, *args, **kwargs) -> str:
+        self.calls += 1
+        if self.failures:
+            raise self.failures.pop(0)
+        return super()._call(*args, **kwargs)
+
+def make_gateway(**kwargs) -> LLMGateway:
+    options = dict(requests_per_minute=6000, tokens_per_minute=10_000_000, backoff_base=0.01, backoff_max=0.05,
+                   seed=7)
+    options.update(kwargs)
+    return LLMGateway(**options)
+
+def test_request_bucket_throttles_bursts():
+    gateway = make_gateway()
+    # Ten requests a second with no burst allowance beyond a single call.
+    gateway.limiter.requests = TokenBucket(600, capacity=1)
+    model = FakeListChatModel(responses=["ok"])
+    started = time.monotonic()
+    for i in range(4):
+        assert gateway.invoke(model, f"prompt {i}", prompt=f"prompt {i}").content == "ok"
+    assert time.monotonic() - started >= 0.25
+
+def test_token_bucket_waits_for_oversized_requests():
+    bucket = TokenBucket(60, capacity=10)
+    bucket.consume(10)
+    assert bucket.delay_for(1000) == pytest.approx(10.0, rel=0.05)
+    assert estimate_tokens("abcdefghi") == 3
+
+def test_retries_rate_limits_and_server_errors():
+    gateway = make_gateway()
+    model = FlakyChatModel(responses=["done"], failures=[HTTPError(429), HTTPError(503)])
+    assert gateway.invoke(model, "hello", prompt="hello").content == "done"
+    assert model.calls == 3
+    stats = gateway.stats()
+    assert stats['retries'] == 2
+    assert stats['rate_limited'] == 1
+    assert stats['failures'] == 0
+    # The 429 pauses the shared limiter so other callers back off as well.
+    assert gateway.limiter.blocked_until > 0
+
+def test_client_errors_are_not_retried():
+    gateway = make_gateway()
+    model = FlakyChatModel(responses=["done"], failures=[HTTPError(400)])
+    with pytest.raises(HTTPError):
+        gateway.invoke(model, "hello", prompt="hello")
+    assert model.calls == 1
+    assert gateway.stats()['failures'] == 1
+
+def test_gives_up_after_max_retries():
+    gateway = make_gateway(max_retries=2)
+    model = FlakyChatModel(responses=["done"], failures=[HTTPError(500) for _ in range(5)])
+    with pytest.raises(HTTPError):
+        gateway.invoke(model, "hello", prompt="hello")
+    assert model.calls == 3
+
+def test_backoff_uses_full_jitter_and_retry_hints():
+    gateway = LLMGateway(backoff_base=1.0, backoff_max=30.0, seed=3)
+    delays = [gateway.backoff(3) for _ in range(50)]
+    assert all(0 <= delay <= 8.0 for delay in delays)
+    assert len(set(delays)) == len(delays)
+    assert gateway.backoff(0, HTTPError(429, "Quota exceeded, retry in 12s")) >= 12.0
+    assert gateway.backoff(0, HTTPError(429, "retry in 120s")) <= 30.0
+
+def test_identical_concurrent_calls_are_coalesced():
+    gateway = make_gateway()
+    model = FlakyChatModel(responses=["shared"], sleep=0.2)
+    barrier = threading.Barrier(5)
+
+    def call(_):
+        barrier.wait()
+        return gateway.invoke(model, "same prompt", prompt="same prompt").content
+
+    with ThreadPoolExecutor(5) as pool:
+        results = list(pool.map(call, range(5)))
+    assert results == ["shared"] * 5
+    assert model.calls == 1
+    assert gateway.stats()['coalesced'] == 4
+
+def test_different_prompts_are_not_coalesced():
+    gateway = make_gateway()
+    model = FlakyChatModel(responses=["a", "b"])
+    gateway.invoke(model, "first", prompt="first")
+    gateway.invoke(model, "second", prompt="second")
+    assert model.calls == 2
+    assert gateway.stats()['coalesced'] == 0
@@ -0,0 +1,48 @@
+import pytest
+
+from utils.prompt_builder import compact_code, strip_code
+
+BROKEN_BINARY_SEARCH = """def search(nums, target)
+    lo, hi = 0, len(nums) - 1
+    while lo <= hi:
+        mid = (lo + hi) // 2
+"""
+
+VALID_WITH_BRACES = """def parse(s: str) -> bool:
+    counts = {}
+    for part in s.split(";"):
+        counts[part] = len(part) // 2  # half the length
+    return bool(counts)
+"""
+
+JAVA_WITH_COMMENTS = """class Solution {
+    public int half(int n) {
+        // integer division
+        return n / 2; /* rounds down */
+    }
+}
+"""
+
+@pytest.mark.parametrize("code, language", [
+    (BROKEN_BINARY_SEARCH, None),
+    (BROKEN_BINARY_SEARCH, "cpp"),
+    (VALID_WITH_BRACES, None),
+    (VALID_WITH_BRACES, "cpp"),
+])
+def test_floor_division_survives(code, language):
+    assert "// 2" in compact_code(code, language=language)
+
+def test_python_comments_are_stripped_even_when_labelled_cpp():
+    compacted = compact_code(VALID_WITH_BRACES, language="cpp")
+    assert "half the length" not in compacted
+    assert "counts[part] = len(part) // 2" in compacted
+
+def test_unparseable_python_only_loses_whitespace():
+    assert strip_code(BROKEN_BINARY_SEARCH + "\n\n   # note  \n") == \
+        BROKEN_BINARY_SEARCH.rstrip() + "\n   # note"
+
+def test_c_family_comments_are_stripped():
+    compacted = compact_code(JAVA_WITH_COMMENTS)
+    assert "integer division" not in compacted
+    assert "rounds down" not in compacted
+    assert "return n / 2;" in compacted
@@ -0,0 +1,48 @@
+import pytest
+
+from utils.database import DatabaseManager
+from utils.result_cache import ResultCache
+
+HALF = "def half(n)\n    return n // 2\n"
+THIRD = "def half(n)\n    return n // 3 + 100\n"
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseManager(str(tmp_path / "mentor.db"))
+    db.init_database()
+    yield db
+    db.close()
+
+@pytest.mark.parametrize("first, second", [
+    (HALF, THIRD),
+    ("mid = (lo + hi) // 2", "mid = (lo + hi)"),
+    ("def f(n):\n    return n // 2\n", "def f(n):\n    return n // 3 + 100\n"),
+    ("int f(int n) { return n / 2; }", "int f(int n) { return n / 3; }"),
+])
+def test_distinct_code_gets_distinct_keys(first, second):
+    for stage in ("static analysis", "patterns", "similar solutions", "feedback"):
+        assert ResultCache.key_for(stage, first, "Two Sum", "mode", "1") != \
+            ResultCache.key_for(stage, second, "Two Sum", "mode", "1")
+
+def test_formatting_only_changes_share_a_key():
+    assert ResultCache.key_for("feedback", "def f(n):\n    return n // 2  # half\n") == \
+        ResultCache.key_for("feedback", "def f(n):\n\n    return n//2\n")
+
+def test_persisted_result_is_not_served_for_other_code(db):
+    cache = ResultCache(db)
+    value, hit = cache.get_or_compute("feedback", lambda: {"summary": "halves"}, HALF, "Half")
+    assert not hit
+
+    fresh = ResultCache(db)
+    value, hit = fresh.get_or_compute("feedback", lambda: {"summary": "thirds"}, THIRD, "Half")
+    assert (value, hit) == ({"summary": "thirds"}, False)
+    assert fresh.get_or_compute("feedback", lambda: None, HALF, "Half") == ({"summary": "halves"}, True)
+
+def test_overwriting_a_key_does_not_grow_the_disk_count(db):
+    cache = ResultCache(db, max_disk_entries=5)
+    key = cache.key_for("feedback", HALF)
+    for i in range(20):
+        cache.put(key, "feedback", {"attempt": i})
+    assert cache.stats()['disk_entries'] == 1
+    assert cache.stats()['evictions'] == 0
+    assert ResultCache(db).get(key) == {"attempt": 19}
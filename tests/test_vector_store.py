@@ -0,0 +1,80 @@
+import hashlib
+import json
+
+import numpy as np
+import pytest
+
+import utils.vector_store as vector_store
+from utils.vector_store import CodeVectorStore
+
+class HashEncoder:
+    backend = "torch"
+    max_seq_length = 512
+
+    def encode(self, texts, batch_size=32, normalize_embeddings=False):
+        vectors = np.array([np.frombuffer(hashlib.sha256(t.encode()).digest(), dtype=np.uint8)[:16]
+                            for t in texts], dtype='float32') + 1.0
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+@pytest.fixture
+def open_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(vector_store, "load_encoder", lambda *args, **kwargs: HashEncoder())
+
+    def open_store():
+        return CodeVectorStore(tmp_path / "patterns.faiss", cache_path=None, batch_max_wait=0)
+    return open_store
+
+def submissions(start, count):
+    return [{"id": i, "problem_name": f"Problem {i}", "code": f"def solve_{i}(): return {i}"}
+            for i in range(start, start + count)]
+
+def test_periodic_saves_append_records_instead_of_rewriting_the_sidecar(open_store):
+    store = open_store()
+    store.sync_corpus("patterns", [{"name": f"pattern {i}", "code": f"x = {i}"} for i in range(20)])
+    meta = store.meta_path.read_bytes()
+
+    for start in (1, 4, 7):
+        store.index_submissions(submissions(start, 3), persist=True)
+        store.checkpoints["submissions"] = start + 2
+        store.save()
+    assert store.meta_path.read_bytes() == meta
+    lines = store.log_path.read_text().splitlines()
+    assert sum(len(json.loads(line)["records"]) for line in lines) == 9
+
+    reopened = open_store()
+    assert len(reopened.records) == 29
+    assert reopened.next_id == store.next_id
+    assert reopened.checkpoints == {"submissions": 9}
+    assert set(reopened.submission_ids) == set(range(1, 10))
+
+def test_log_is_compacted_into_the_sidecar(open_store):
+    store = open_store()
+    store.sync_corpus("patterns", [{"name": "only", "code": "x = 1"}])
+    for start in range(1, 30, 3):
+        store.index_submissions(submissions(start, 3), persist=True)
+    assert len(json.loads(store.meta_path.read_text())["records"]) > 1
+    reopened = open_store()
+    assert len(reopened.records) == 31
+
+def test_removal_rewrites_the_sidecar_and_drops_stale_log_lines(open_store):
+    store = open_store()
+    store.sync_corpus("patterns", [{"name": f"pattern {i}", "code": f"x = {i}"} for i in range(20)])
+    ids = store.index_submissions(submissions(1, 3), persist=True)
+    stale_log = store.log_path.read_text()
+    store.remove(ids[:1])
+    assert not store.log_path.exists()
+
+    # A log left behind by a crash between the sidecar rewrite and the log cleanup must not be replayed.
+    store.log_path.write_text(stale_log)
+    reopened = open_store()
+    assert len(reopened.records) == 22
+    assert ids[0] not in reopened.records
+
+def test_partial_log_line_falls_back_to_an_empty_store(open_store):
+    store = open_store()
+    store.sync_corpus("patterns", [{"name": f"pattern {i}", "code": f"x = {i}"} for i in range(20)])
+    store.index_submissions(submissions(1, 3), persist=True)
+    store.log_path.write_text(store.log_path.read_text()[:-10])
+    reopened = open_store()
+    assert reopened.index is None
+    assert reopened.records == {}
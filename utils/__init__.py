@@ -1,7 +1,33 @@
-from .code_analyzer import analyze_code
-from .database import get_database, DatabaseManager
-from .leetcode_client import LeetCodeClient
-from .langchain_gemini_client import get_langchain_gemini_client, LangChainGeminiClient
-from .recommendation_engine import RecommendationEngine
-from .vector_store import get_vector_store, CodeVectorStore
+import importlib
 
+_EXPORTS = {
+    "analyze_code": ".code_analyzer",
+    "get_database": ".database",
+    "DatabaseManager": ".database",
+    "LeetCodeClient": ".leetcode_client",
+    "get_langchain_gemini_client": ".langchain_gemini_client",
+    "LangChainGeminiClient": ".langchain_gemini_client",
+    "RecommendationEngine": ".recommendation_engine",
+    "get_recommendation_engine": ".recommendation_engine",
+    "get_problem_catalog": ".problem_catalog",
+    "ProblemCatalog": ".problem_catalog",
+    "get_problem_store": ".problem_store",
+    "ProblemStore": ".problem_store",
+    "get_vector_store": ".vector_store",
+    "start_vector_store_warmup": ".vector_store",
+    "CodeVectorStore": ".vector_store",
+    "get_result_cache": ".result_cache",
+    "ResultCache": ".result_cache",
+    "get_semantic_cache": ".semantic_cache",
+    "SemanticCache": ".semantic_cache",
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
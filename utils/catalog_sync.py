@@ -0,0 +1,165 @@
+import argparse
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .problem_store import ProblemStore, STORE_PATH
+
+BASE_URL = "https://leetcode-api-pied.vercel.app"
+CONCURRENCY = 8
+TIMEOUT = 15.0
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.5
+DETAIL_MAX_AGE_DAYS = 30
+
+logger = logging.getLogger(__name__)
+
+def build_session(concurrency: int = CONCURRENCY, max_retries: int = MAX_RETRIES,
+                  backoff_factor: float = BACKOFF_FACTOR) -> requests.Session:
+    retry = Retry(total=max_retries, backoff_factor=backoff_factor, status_forcelist=(429, 500, 502, 503, 504),
+                  allowed_methods=frozenset({"GET"}), respect_retry_after_header=True, raise_on_status=False)
+    # One pool sized to the worker count, so every worker reuses a kept-alive connection.
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["Accept"] = "application/json"
+    return session
+
+def _tag_names(raw: Dict[str, Any]) -> List[str]:
+    tags = raw.get("topicTags") or raw.get("topic_tags") or raw.get("tags") or []
+    return [(tag.get("name") if isinstance(tag, dict) else str(tag)).lower() for tag in tags
+            if (tag.get("name") if isinstance(tag, dict) else tag)]
+
+def normalize_problem(raw: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    stat = raw.get("stat") if isinstance(raw.get("stat"), dict) else {}
+    slug = raw.get("title_slug") or raw.get("titleSlug") or raw.get("slug") or stat.get("question__title_slug")
+    title = raw.get("title") or stat.get("question__title")
+    if not slug or not title:
+        return None
+    problem_id = (raw.get("frontend_id") or raw.get("questionFrontendId") or raw.get("id")
+                  or stat.get("frontend_question_id"))
+    difficulty = raw.get("difficulty")
+    if isinstance(difficulty, dict):
+        difficulty = {1: "Easy", 2: "Medium", 3: "Hard"}.get(difficulty.get("level"))
+    return {"id": str(problem_id) if problem_id is not None else None, "title": title, "slug": slug,
+            "difficulty": str(difficulty).capitalize() if difficulty else None, "tags": _tag_names(raw),
+            "paid_only": bool(raw.get("paid_only") or raw.get("isPaidOnly") or raw.get("paidOnly"))}
+
+def _problem_list(payload: Any) -> List[Dict[str, Any]]:
+    if isinstance(payload, dict):
+        for key in ("problems", "questions", "stat_status_pairs", "data"):
+            if isinstance(payload.get(key), list):
+                return payload[key]
+        return []
+    return payload if isinstance(payload, list) else []
+
+class CatalogSyncer:
+    def __init__(self, store: ProblemStore, base_url: str = BASE_URL, concurrency: int = CONCURRENCY,
+                 timeout: float = TIMEOUT, session: Optional[requests.Session] = None):
+        self.store = store
+        self.base_url = base_url.rstrip("/")
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.session = session or build_session(concurrency)
+        self.stats = {'requests': 0, 'not_modified': 0, 'updated': 0, 'failed': 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, name: str):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def fetch(self, path: str) -> Tuple[Any, bool]:
+        url = f"{self.base_url}{path}"
+        etag, last_modified, body = self.store.validators(url)
+        headers = {}
+        if body is not None:
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+        self._count('requests')
+        response = self.session.get(url, headers=headers, timeout=self.timeout)
+        if response.status_code == 304 and body is not None:
+            self._count('not_modified')
+            self.store.touch(url)
+            return json.loads(body), False
+        response.raise_for_status()
+        payload = response.json()
+        self.store.save_response(url, response.headers.get("ETag"), response.headers.get("Last-Modified"),
+                                 response.text)
+        self._count('updated')
+        return payload, True
+
+    def sync_list(self) -> int:
+        payload, changed = self.fetch("/problems")
+        if not changed and self.store.count():
+            logger.info("Problem list not modified")
+            return 0
+        problems = [p for p in (normalize_problem(raw) for raw in _problem_list(payload)) if p]
+        logger.info("Storing %d problems", len(problems))
+        return self.store.upsert_problems(problems)
+
+    def _sync_detail(self, slug: str) -> bool:
+        detail, changed = self.fetch(f"/problem/{slug}")
+        if isinstance(detail, dict):
+            self.store.save_detail(slug, detail)
+        return changed
+
+    def sync_details(self, max_age_days: float = DETAIL_MAX_AGE_DAYS, limit: int = 0) -> int:
+        slugs = self.store.stale_details(max_age_days * 86400, limit)
+        if not slugs:
+            return 0
+        logger.info("Refreshing details for %d problems with %d workers", len(slugs), self.concurrency)
+        done = 0
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="catalog-sync") as pool:
+            futures = {pool.submit(self._sync_detail, slug): slug for slug in slugs}
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                    done += 1
+                except Exception as e:
+                    self._count('failed')
+                    logger.warning("Failed to fetch %s: %s", futures[future], e)
+                if done and done % 250 == 0:
+                    logger.info("%d/%d details synced", done, len(slugs))
+        return done
+
+    def close(self):
+        self.session.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Download LeetCode problem metadata into the local store")
+    parser.add_argument("--store", default=str(STORE_PATH))
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY)
+    parser.add_argument("--timeout", type=float, default=TIMEOUT)
+    parser.add_argument("--details", action="store_true", help="also fetch per-problem details")
+    parser.add_argument("--max-age-days", type=float, default=DETAIL_MAX_AGE_DAYS,
+                        help="refetch details older than this many days")
+    parser.add_argument("--limit", type=int, default=0, help="fetch at most this many details (0 = all)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    store = ProblemStore(args.store)
+    syncer = CatalogSyncer(store, args.base_url, args.concurrency, args.timeout)
+    started = time.perf_counter()
+    try:
+        syncer.sync_list()
+        if args.details:
+            syncer.sync_details(args.max_age_days, args.limit)
+        logger.info("Sync finished in %.1fs: %s, %d problems stored", time.perf_counter() - started,
+                    syncer.stats, store.count())
+    finally:
+        syncer.close()
+        store.close()
+
+if __name__ == "__main__":
+    main()
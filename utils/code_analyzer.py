@@ -1,8 +1,689 @@
 import ast
+import hashlib
+import io
 import re
-from typing import Dict, Any, List
+import time
+import tokenize
+from typing import Callable, Dict, Any, List, Optional, Tuple
 
-def analyze_code(code: str) -> Dict[str, Any]:
+ANALYZER_VERSION = "3"
+
+HEAP_CALLS = {'heappush', 'heappop', 'heapify', 'heappushpop', 'heapreplace', 'nlargest', 'nsmallest'}
+MEMO_DECORATORS = {'lru_cache', 'cache'}
+HASH_CONSTRUCTORS = {'dict', 'set', 'Counter', 'defaultdict', 'OrderedDict'}
+CONTAINER_CONSTRUCTORS = HASH_CONSTRUCTORS | {'list', 'deque', 'bytearray'}
+
+Cost = Tuple[int, int]
+
+def _format_cost(cost: Cost, exponential: bool = False) -> str:
+    if exponential:
+        return 'O(2^n)'
+    degree, log = cost
+    parts = []
+    if degree == 1:
+        parts.append('n')
+    elif degree > 1:
+        parts.append(f'n^{degree}')
+    if log == 1:
+        parts.append('log n')
+    elif log > 1:
+        parts.append(f'log^{log} n')
+    return f"O({' '.join(parts) or '1'})"
+
+def _add_cost(a: Cost, b: Cost) -> Cost:
+    return a[0] + b[0], a[1] + b[1]
+
+def _name_of(node: ast.AST) -> Optional[str]:
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    if isinstance(node, ast.Call):
+        return _name_of(node.func)
+    return None
+
+def _is_halving(node: ast.AST) -> bool:
+    if isinstance(node, ast.BinOp):
+        if isinstance(node.op, ast.FloorDiv) and isinstance(node.right, ast.Constant) and node.right.value == 2:
+            return True
+        if isinstance(node.op, ast.RShift) and isinstance(node.right, ast.Constant) and node.right.value == 1:
+            return True
+    if isinstance(node, ast.AugAssign):
+        step = node.value.value if isinstance(node.value, ast.Constant) else None
+        return ((isinstance(node.op, (ast.FloorDiv, ast.Mult)) and step == 2)
+                or (isinstance(node.op, (ast.RShift, ast.LShift)) and step == 1))
+    return False
+
+class _FunctionScope:
+    def __init__(self, name: str, params: int, memoized: bool):
+        self.name = name
+        self.params = params
+        self.memoized = memoized
+        self.self_calls = 0
+        self.self_calls_in_loop = 0
+        self.shrinking_calls = 0
+        self.marks_visited = False
+        self.appended: set = set()
+        self.popped: set = set()
+
+class StructureVisitor(ast.NodeVisitor):
+    def __init__(self):
+        self.patterns: set = set()
+        self.functions: List[str] = []
+        self.classes: List[str] = []
+        self.imports: set = set()
+        self.loops = 0
+        self.max_loop_depth = 0
+        self.recursive: List[_FunctionScope] = []
+        self.time: Cost = (0, 0)
+        self.space: Cost = (0, 0)
+        self._loop_costs: List[Cost] = []
+        self._loop_nodes: List[ast.AST] = []
+        self._traversals: set = set()
+        self._containers: set = set()
+        self._scopes: List[_FunctionScope] = []
+
+    @property
+    def _current(self) -> Cost:
+        cost = (0, 0)
+        for factor in self._loop_costs:
+            cost = _add_cost(cost, factor)
+        return cost
+
+    def _charge(self, extra: Cost = (0, 0)):
+        self.time = max(self.time, _add_cost(self._current, extra))
+
+    def _allocate(self, degree: int):
+        self.space = max(self.space, (degree, 0))
+
+    def _enter_loop(self, node: ast.AST, factor: Cost):
+        self.loops += 1
+        self._loop_costs.append(factor)
+        self._loop_nodes.append(node)
+        self.max_loop_depth = max(self.max_loop_depth, sum(1 for c in self._loop_costs if c != (0, 0)))
+        self._charge()
+        self.generic_visit(node)
+        self._loop_nodes.pop()
+        self._loop_costs.pop()
+
+    def visit_Import(self, node: ast.Import):
+        self.imports.update(alias.name.split('.')[0] for alias in node.names)
+
+    def visit_ImportFrom(self, node: ast.ImportFrom):
+        self.imports.add((node.module or '').split('.')[0])
+
+    def visit_ClassDef(self, node: ast.ClassDef):
+        self.classes.append(node.name)
+        self.generic_visit(node)
+
+    def visit_FunctionDef(self, node):
+        decorators = {_name_of(d) for d in node.decorator_list}
+        params = [a.arg for a in node.args.args + node.args.kwonlyargs if a.arg not in ('self', 'cls')]
+        scope = _FunctionScope(node.name, len(params), bool(decorators & MEMO_DECORATORS))
+        if scope.memoized:
+            self.patterns.add('memoization')
+        self.functions.append(node.name)
+        self._scopes.append(scope)
+        # Loops in an enclosing function do not multiply the cost of a nested helper's body.
+        saved_costs, saved_nodes = self._loop_costs, self._loop_nodes
+        self._loop_costs, self._loop_nodes = [], []
+        self.generic_visit(node)
+        self._loop_costs, self._loop_nodes = saved_costs, saved_nodes
+        self._scopes.pop()
+        if scope.self_calls:
+            self.recursive.append(scope)
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_For(self, node: ast.For):
+        factor: Cost = (1, 0)
+        if (isinstance(node.iter, ast.Call) and _name_of(node.iter) == 'range'
+                and all(isinstance(a, ast.Constant) for a in node.iter.args)):
+            factor = (0, 0)
+        elif self._loop_nodes and id(self._loop_nodes[-1]) in self._traversals:
+            # Neighbour scans inside a queue/stack traversal add up to O(V + E) over the whole walk.
+            factor = (0, 0)
+        self._enter_loop(node, factor)
+
+    visit_AsyncFor = visit_For
+
+    def visit_While(self, node: ast.While):
+        body = list(ast.walk(node))
+        halving = any(_is_halving(n) for n in body)
+        pointers = self._pointer_names(node.test)
+        moved_up = {n.target.id for n in body if isinstance(n, ast.AugAssign) and isinstance(n.op, ast.Add)
+                    and isinstance(n.target, ast.Name)}
+        moved_down = {n.target.id for n in body if isinstance(n, ast.AugAssign) and isinstance(n.op, ast.Sub)
+                      and isinstance(n.target, ast.Name)}
+        factor: Cost = (1, 0)
+        if halving and pointers:
+            self.patterns.add('binary_search')
+            factor = (0, 1)
+        elif halving:
+            factor = (0, 1)
+        elif pointers and (pointers & moved_up) and (pointers & moved_down):
+            self.patterns.add('two_pointers')
+        elif self._loop_nodes and isinstance(self._loop_nodes[-1], ast.For) and moved_up:
+            # The inner pointer only moves forward, so the window loop is amortized O(1) per outer step.
+            self.patterns.add('sliding_window')
+            factor = (0, 0)
+        if any(isinstance(n, ast.Call) and _name_of(n) == 'popleft' for n in body):
+            self.patterns.add('bfs')
+            self._traversals.add(id(node))
+        elif any(isinstance(n, ast.Call) and isinstance(n.func, ast.Attribute) and n.func.attr == 'pop'
+                 and not n.args for n in body) and any(_name_of(n) == 'append' for n in body if isinstance(n, ast.Call)):
+            self.patterns.add('dfs')
+            self._traversals.add(id(node))
+        self._enter_loop(node, factor)
+
+    @staticmethod
+    def _pointer_names(test: ast.AST) -> set:
+        if isinstance(test, ast.Compare) and len(test.comparators) == 1:
+            names = {_name_of(test.left), _name_of(test.comparators[0])}
+            if None not in names and len(names) == 2:
+                return names
+        return set()
+
+    def _visit_comprehension(self, node):
+        if not isinstance(node, ast.GeneratorExp):
+            self._allocate(self._nested_comprehension_depth(node))
+        for _ in node.generators:
+            self._loop_costs.append((1, 0))
+        self._charge()
+        self.generic_visit(node)
+        del self._loop_costs[len(self._loop_costs) - len(node.generators):]
+
+    @staticmethod
+    def _nested_comprehension_depth(node) -> int:
+        depth, inner = 1, getattr(node, 'elt', None)
+        while isinstance(inner, (ast.ListComp, ast.SetComp, ast.GeneratorExp, ast.DictComp)) or (
+                isinstance(inner, ast.BinOp) and isinstance(inner.op, ast.Mult) and isinstance(inner.left, ast.List)):
+            depth += 1
+            inner = getattr(inner, 'elt', None)
+        return depth
+
+    visit_ListComp = visit_SetComp = visit_DictComp = visit_GeneratorExp = _visit_comprehension
+
+    def visit_BinOp(self, node: ast.BinOp):
+        if isinstance(node.op, ast.Mult) and isinstance(node.left, ast.List):
+            self._allocate(1)
+            self.patterns.add('dynamic_programming')
+        self.generic_visit(node)
+
+    def visit_Subscript(self, node: ast.Subscript):
+        if isinstance(node.ctx, ast.Store):
+            if _name_of(node.value) in ('memo', 'cache', 'dp'):
+                self.patterns.add('memoization' if _name_of(node.value) != 'dp' else 'dynamic_programming')
+                self._allocate(1)
+            elif self._loop_costs and _name_of(node.value) in self._containers:
+                self._allocate(1)
+            if self._scopes:
+                self._scopes[-1].marks_visited = True
+        self.generic_visit(node)
+
+    def visit_Call(self, node: ast.Call):
+        name = _name_of(node.func)
+        scope = self._scopes[-1] if self._scopes else None
+        if scope is not None and name == scope.name:
+            scope.self_calls += 1
+            if self._loop_costs:
+                scope.self_calls_in_loop += 1
+            if any(isinstance(a, ast.BinOp) for a in node.args):
+                scope.shrinking_calls += 1
+        if name in HEAP_CALLS:
+            self.patterns.add('heap')
+            self._allocate(1)
+            self._charge((0, 1))
+        elif name in ('bisect', 'bisect_left', 'bisect_right', 'insort'):
+            self.patterns.add('binary_search')
+            self._charge((0, 1))
+        elif name in ('sorted', 'sort'):
+            self.patterns.add('sorting')
+            self._charge((1, 1))
+        elif name == 'deque':
+            self._allocate(1)
+        elif name in CONTAINER_CONSTRUCTORS and (node.args or name != 'list'):
+            self._allocate(1)
+        if name in HASH_CONSTRUCTORS:
+            self.patterns.add('hash_table')
+        if (name in ('append', 'appendleft', 'add') and self._loop_costs
+                and isinstance(node.func, ast.Attribute) and _name_of(node.func.value) in self._containers):
+            self._allocate(1)
+        if scope is not None and isinstance(node.func, ast.Attribute) and isinstance(node.func.value, ast.Name):
+            if name == 'append':
+                scope.appended.add(node.func.value.id)
+            elif name == 'pop' and not node.args:
+                scope.popped.add(node.func.value.id)
+            elif name == 'add':
+                scope.marks_visited = True
+        self.generic_visit(node)
+
+    def visit_Assign(self, node: ast.Assign):
+        values = node.value.elts if isinstance(node.value, ast.Tuple) else [node.value] * len(node.targets)
+        targets = node.targets[0].elts if isinstance(node.targets[0], ast.Tuple) else node.targets
+        for target, value in zip(targets, values):
+            if isinstance(value, (ast.List, ast.Dict, ast.Set)) or (
+                    isinstance(value, ast.Call) and _name_of(value) in CONTAINER_CONSTRUCTORS):
+                if isinstance(target, ast.Name):
+                    self._containers.add(target.id)
+        self.generic_visit(node)
+
+    def visit_Dict(self, node: ast.Dict):
+        self.patterns.add('hash_table')
+        self.generic_visit(node)
+
+    def visit_Set(self, node: ast.Set):
+        self.patterns.add('hash_table')
+        self.generic_visit(node)
+
+    def finish(self) -> Tuple[List[str], Dict[str, str]]:
+        if 'heapq' in self.imports:
+            self.patterns.add('heap')
+        return _resolve_complexity(self.time, self.space, self.recursive, self.patterns)
+
+def _classify_recursion(scope: _FunctionScope, patterns: set) -> str:
+    if scope.memoized or 'memoization' in patterns:
+        return 'memoization'
+    if scope.appended & scope.popped:
+        return 'backtracking'
+    if scope.marks_visited:
+        return 'dfs'
+    if scope.self_calls_in_loop:
+        return 'backtracking'
+    if scope.shrinking_calls > 1:
+        return 'exponential'
+    return 'dfs' if scope.self_calls > 1 else 'recursion'
+
+def _resolve_complexity(time_cost: Cost, space_cost: Cost, recursive: List[_FunctionScope],
+                        patterns: set) -> Tuple[List[str], Dict[str, str]]:
+    exponential = False
+    for scope in recursive:
+        kind = _classify_recursion(scope, patterns)
+        if kind == 'memoization':
+            # Each distinct argument tuple is solved once, so cost tracks the size of the state space.
+            states = (max(1, min(scope.params, 3)), 0)
+            time_cost, space_cost = max(time_cost, states), max(space_cost, states)
+            patterns.add('memoization')
+            continue
+        if kind in ('backtracking', 'exponential'):
+            exponential = True
+        patterns.add('recursion' if kind == 'exponential' else kind)
+        time_cost, space_cost = max(time_cost, (1, 0)), max(space_cost, (1, 0))
+    complexity = {'time_complexity': _format_cost(time_cost, exponential),
+                  'space_complexity': _format_cost(space_cost)}
+    return sorted(patterns), complexity
+
+ANALYZERS: Dict[str, Callable[[str], Dict[str, Any]]] = {}
+
+def register_analyzer(language: str):
+    def decorator(func: Callable[[str], Dict[str, Any]]):
+        ANALYZERS[language] = func
+        return func
+    return decorator
+
+# Only constructs the other language cannot contain count: .size() and .length() exist in both, and C++ access
+# specifiers end in a colon, so "public int" is Java while "public:" is not.
+_LANGUAGE_SIGNALS = {
+    'cpp': re.compile(r"#include\s*<|\bstd::|\busing\s+namespace\b|\bvector\s*<|\bcout\b|\bcin\b"
+                      r"|\bunordered_(?:map|set)\s*<|\bpush_back\s*\(|\bauto\s*[&\w]|\bbool\b|\bnullptr\b"
+                      r"|\w->\w|\bpublic\s*:"),
+    'java': re.compile(r"\bimport\s+java\.|\bSystem\.out\b|\b(?:public|private|protected)\s+\w"
+                       r"|\b(?:ArrayList|HashMap|HashSet|ArrayDeque|PriorityQueue|LinkedList|TreeMap)\s*<"
+                       r"|\b(?:int|long|char|double|boolean|String)\s*\[\]|\bboolean\b|\bString\b"
+                       r"|\.length\b(?!\s*\()|@Override\b"),
+}
+_PYTHON_ONLY_RE = re.compile(r"^\s*(?:def\s+\w+\s*\(|elif\b|except\b|from\s+[\w.]+\s+import\b)", re.M)
+
+def c_family_language(code: str) -> Optional[str]:
+    # Words like bool or String also appear in Python hints and comments, so Python-looking code is never scored.
+    if '{' not in code or ';' not in code or _PYTHON_ONLY_RE.search(code):
+        return None
+    scores = {language: len(pattern.findall(code)) for language, pattern in _LANGUAGE_SIGNALS.items()}
+    language, score = max(scores.items(), key=lambda item: item[1])
+    return language if score else None
+
+def detect_language(code: str) -> str:
+    try:
+        ast.parse(code.strip())
+        return 'python'
+    except (SyntaxError, ValueError, RecursionError):
+        pass
+    language = c_family_language(code)
+    if language:
+        return language
+    if re.search(r"^\s*def\s+\w+\s*\(|^\s*(?:from\s+\w+\s+)?import\s+\w+|:\s*$", code, re.M):
+        return 'python'
+    return 'cpp' if '{' in code and ';' in code else 'python'
+
+@register_analyzer('python')
+def _analyze_python(code: str) -> Dict[str, Any]:
+    tree = ast.parse(code.strip())
+    visitor = StructureVisitor()
+    visitor.visit(tree)
+    patterns, complexity = visitor.finish()
+    return {
+        'complexity': complexity,
+        'patterns': patterns,
+        'code_structure': {
+            'functions': visitor.functions,
+            'classes': visitor.classes,
+            'recursive_functions': [scope.name for scope in visitor.recursive],
+            'loops': visitor.loops,
+            'max_loop_depth': visitor.max_loop_depth,
+            'imports': sorted(i for i in visitor.imports if i),
+        },
+    }
+
+_C_TOKEN_RE = re.compile(r"[A-Za-z_]\w*|\d[\w.]*|::|->|\+\+|--|<<=|>>=|[-+*/%&|^<>=!]=|&&|\|\||<<|>>|\S")
+_C_KEYWORDS = {'if', 'for', 'while', 'switch', 'catch', 'return', 'sizeof', 'else', 'do', 'new', 'synchronized'}
+_C_TYPE_KEYWORDS = {'class', 'struct', 'interface', 'enum', 'record'}
+_C_QUALIFIERS = {'const', 'noexcept', 'override', 'final'}
+
+_C_LIBRARY_PATTERNS = {
+    'heap': {'priority_queue', 'make_heap', 'push_heap', 'pop_heap', 'PriorityQueue'},
+    'hash_table': {'unordered_map', 'unordered_set', 'map', 'set', 'multiset', 'HashMap', 'HashSet',
+                   'TreeMap', 'TreeSet', 'LinkedHashMap', 'Map', 'Set'},
+    'sorting': {'sort', 'stable_sort'},
+    'binary_search': {'lower_bound', 'upper_bound', 'binary_search', 'binarySearch'},
+    'stack': {'stack', 'Stack'},
+}
+_C_CONTAINERS = {'vector', 'deque', 'queue', 'stack', 'priority_queue', 'unordered_map', 'unordered_set', 'map',
+                 'set', 'string', 'ArrayList', 'LinkedList', 'ArrayDeque', 'HashMap', 'HashSet', 'TreeMap',
+                 'TreeSet', 'PriorityQueue', 'StringBuilder'}
+_C_GROW_CALLS = {'push_back', 'emplace_back', 'push', 'emplace', 'insert', 'add', 'offer', 'put', 'append',
+                 'push_front', 'addLast', 'addFirst'}
+_C_QUEUE_POPS = {'front', 'poll', 'pollFirst', 'removeFirst'}
+
+class _CBlock:
+    def __init__(self, kind: str, header: List[str], name: str = '', braced: bool = True):
+        self.kind = kind
+        self.header = header
+        self.name = name
+        self.braced = braced
+        self.tokens: List[str] = []
+        self.children: List["_CBlock"] = []
+
+def _c_tokens(code: str) -> Tuple[List[str], List[str]]:
+    includes = re.findall(r"^\s*#\s*include\s*[<\"]([\w./]+)[>\"]", code, re.M)
+    includes += re.findall(r"^\s*import\s+(?:static\s+)?([\w.]+)", code, re.M)
+    code = re.sub(r"^\s*(?:#|import\s|package\s).*$", "", code, flags=re.M)
+    code = _C_COMMENT_RE.sub(lambda m: '""' if m.group(1) else " ", code)
+    return _C_TOKEN_RE.findall(code), includes
+
+def _read_parens(tokens: List[str], start: int) -> Tuple[List[str], int]:
+    depth, i = 0, start
+    while i < len(tokens):
+        if tokens[i] == '(':
+            depth += 1
+        elif tokens[i] == ')':
+            depth -= 1
+            if depth == 0:
+                return tokens[start + 1:i], i + 1
+        i += 1
+    return tokens[start + 1:], i
+
+def _c_block_tree(tokens: List[str]) -> _CBlock:
+    root = _CBlock('root', [])
+    stack = [root]
+
+    def close_braceless():
+        while len(stack) > 1 and not stack[-1].braced:
+            stack.pop()
+
+    i = 0
+    while i < len(tokens):
+        tok = tokens[i]
+        for block in stack:
+            block.tokens.append(tok)
+        if tok in ('for', 'while') and i + 1 < len(tokens) and tokens[i + 1] == '(':
+            header, j = _read_parens(tokens, i + 1)
+            for block in stack:
+                block.tokens.extend(tokens[i + 1:j])
+            if j < len(tokens) and tokens[j] == ';':
+                # do { ... } while (cond); tail or an empty-bodied loop.
+                i = j
+                continue
+            braced = j < len(tokens) and tokens[j] == '{'
+            loop = _CBlock(tok, header, braced=braced)
+            stack[-1].children.append(loop)
+            stack.append(loop)
+            if braced:
+                for block in stack:
+                    block.tokens.append('{')
+                j += 1
+            i = j
+            continue
+        if tok == 'do' and i + 1 < len(tokens) and tokens[i + 1] == '{':
+            loop = _CBlock('do', [])
+            stack[-1].children.append(loop)
+            stack.append(loop)
+            for block in stack:
+                block.tokens.append('{')
+            i += 2
+            continue
+        if tok == '{':
+            kind, name, header = 'block', '', []
+            k = i - 1
+            window = tokens[max(0, i - 8):i]
+            if 'throws' in window:
+                k = i - len(window) + window.index('throws') - 1
+            while k >= 0 and tokens[k] in _C_QUALIFIERS:
+                k -= 1
+            if k >= 0 and tokens[k] == ')':
+                depth = 0
+                while k >= 0:
+                    depth += tokens[k] == ')'
+                    depth -= tokens[k] == '('
+                    if depth == 0:
+                        break
+                    k -= 1
+                candidate = tokens[k - 1] if k > 0 else ''
+                if re.match(r"[A-Za-z_]\w*$", candidate) and candidate not in _C_KEYWORDS:
+                    kind, name = 'function', candidate
+                    header, _ = _read_parens(tokens, k)
+            else:
+                back = tokens[max(0, i - 6):i]
+                for k, word in enumerate(back):
+                    if word in _C_TYPE_KEYWORDS and k + 1 < len(back):
+                        kind, name = 'class', back[k + 1]
+            block = _CBlock(kind, header, name)
+            stack[-1].children.append(block)
+            stack.append(block)
+            block.tokens.append('{')
+        elif tok == '}':
+            if len(stack) > 1 and stack[-1].braced:
+                stack.pop()
+            close_braceless()
+        elif tok == ';':
+            close_braceless()
+        i += 1
+    return root
+
+def _c_halving(tokens: List[str]) -> bool:
+    text = ' '.join(tokens)
+    return bool(re.search(r"/ 2\b|>> 1\b|/= 2\b|>>= 1\b|\*= 2\b|<<= 1\b", text))
+
+def _c_compared_names(header: List[str]) -> set:
+    for k, tok in enumerate(header):
+        if tok in ('<', '<=', '>', '>=', '!=') and 0 < k < len(header) - 1:
+            left, right = header[k - 1], header[k + 1]
+            if re.match(r"[A-Za-z_]\w*$", left) and re.match(r"[A-Za-z_]\w*$", right):
+                return {left, right}
+    return set()
+
+def _c_moved(tokens: List[str], up: bool) -> set:
+    names = set()
+    inc, aug = ('++', '+=') if up else ('--', '-=')
+    for k, tok in enumerate(tokens):
+        if tok == inc:
+            if k > 0 and re.match(r"[A-Za-z_]\w*$", tokens[k - 1]):
+                names.add(tokens[k - 1])
+            if k + 1 < len(tokens) and re.match(r"[A-Za-z_]\w*$", tokens[k + 1]):
+                names.add(tokens[k + 1])
+        elif tok == aug and k > 0:
+            names.add(tokens[k - 1])
+    return names
+
+class CFamilyAnalyzer:
+    def __init__(self):
+        self.patterns: set = set()
+        self.functions: List[str] = []
+        self.classes: List[str] = []
+        self.recursive: List[_FunctionScope] = []
+        self.loops = 0
+        self.max_loop_depth = 0
+        self.time: Cost = (0, 0)
+        self.space: Cost = (0, 0)
+        self._traversals: set = set()
+
+    def analyze(self, tokens: List[str]):
+        names = set(tokens)
+        for pattern, markers in _C_LIBRARY_PATTERNS.items():
+            if names & markers:
+                self.patterns.add(pattern)
+        if 'sorting' in self.patterns:
+            self.time = max(self.time, (1, 1))
+        self._walk(_c_block_tree(tokens), [], None)
+        if not self.functions:
+            self._allocations(tokens)
+
+    def _allocations(self, body: List[str]):
+        # Only storage created in a body counts; parameter types such as vector<int>& are caller-owned.
+        text = ' '.join(body)
+        if re.search(r"vector < vector <|new \w+ \[ [^\]]+ \] \[|\w+ \[ \] \[ \] \w+ =", text):
+            self.space = max(self.space, (2, 0))
+        elif set(body) & _C_CONTAINERS or re.search(r"new \w+ \[", text):
+            self.space = max(self.space, (1, 0))
+
+    def _loop_factor(self, block: _CBlock, parents: List[_CBlock]) -> Cost:
+        header, body = block.header, block.tokens
+        if block.kind == 'for':
+            if parents and id(parents[-1]) in self._traversals:
+                # Neighbour scans inside a queue/stack traversal add up to O(V + E) over the whole walk.
+                return (0, 0)
+            if ':' in header:
+                return (1, 0)
+            parts = ' '.join(header).split(';')
+            if len(parts) == 3:
+                if _c_halving(parts[2].split()):
+                    return (0, 1)
+                condition = parts[1].split()
+                bound = condition[-1] if condition else ''
+                if bound and bound[0].isdigit():
+                    return (0, 0)
+            return (1, 0)
+        pointers = _c_compared_names(header)
+        if _c_halving(body):
+            if pointers:
+                self.patterns.add('binary_search')
+            return (0, 1)
+        if pointers and pointers & _c_moved(body, True) and pointers & _c_moved(body, False):
+            self.patterns.add('two_pointers')
+            return (1, 0)
+        if parents and parents[-1].kind == 'for' and _c_moved(body, True):
+            self.patterns.add('sliding_window')
+            return (0, 0)
+        return (1, 0)
+
+    def _walk(self, block: _CBlock, costs: List[Cost], scope: Optional[_FunctionScope],
+              parents: Optional[List[_CBlock]] = None):
+        parents = parents or []
+        if block.kind == 'class':
+            self.classes.append(block.name)
+        if block.kind == 'function':
+            scope = self._function_scope(block)
+            self._allocations(block.tokens)
+            costs = []
+        if block.kind in ('for', 'while', 'do'):
+            self.loops += 1
+            body = set(block.tokens)
+            if block.kind != 'for' and body & _C_QUEUE_POPS:
+                self.patterns.add('bfs')
+                self._traversals.add(id(block))
+            elif block.kind != 'for' and 'pop' in body and 'top' in body and 'stack' in self.patterns:
+                self.patterns.add('dfs')
+                self._traversals.add(id(block))
+            costs = costs + [self._loop_factor(block, parents)]
+            self.max_loop_depth = max(self.max_loop_depth, sum(1 for c in costs if c != (0, 0)))
+            current = (sum(c[0] for c in costs), sum(c[1] for c in costs))
+            self.time = max(self.time, current)
+            direct = [t for t in block.tokens if t not in ('{', '}')]
+            if set(direct) & _C_GROW_CALLS:
+                self.space = max(self.space, (1, 0))
+            if 'heap' in self.patterns and set(direct) & {'push', 'pop', 'offer', 'poll', 'add'}:
+                self.time = max(self.time, (current[0], current[1] + 1))
+            if scope is not None and scope.name in block.tokens:
+                scope.self_calls_in_loop += 1
+        for child in block.children:
+            self._walk(child, costs, scope, parents + [block])
+
+    def _function_scope(self, block: _CBlock) -> _FunctionScope:
+        tokens = block.tokens
+        self.functions.append(block.name)
+        scope = _FunctionScope(block.name, 0, False)
+        for k, tok in enumerate(tokens):
+            if tok == block.name and k + 1 < len(tokens) and tokens[k + 1] == '(':
+                scope.self_calls += 1
+                args, _ = _read_parens(tokens, k + 1)
+                if set(args) & {'-', '+'}:
+                    scope.shrinking_calls += 1
+            elif tok in ('memo', 'dp', 'cache') and k + 1 < len(tokens) and tokens[k + 1] in ('[', '.'):
+                scope.memoized = tok != 'dp' or scope.self_calls > 0
+            elif tok in ('push_back', 'add') and k > 1 and tokens[k - 1] == '.':
+                scope.appended.add(tokens[k - 2])
+            elif tok in ('pop_back', 'removeLast') and k > 1 and tokens[k - 1] == '.':
+                scope.popped.add(tokens[k - 2])
+            elif tok == 'remove' and k > 1 and tokens[k - 1] == '.' and 'size' in tokens[k + 1:k + 8]:
+                scope.popped.add(tokens[k - 2])
+            elif tok == '=' and k > 0 and tokens[k - 1] == ']':
+                scope.marks_visited = True
+            elif tok in ('insert', 'add') and k > 1 and tokens[k - 1] == '.' and tokens[k - 2] not in scope.appended:
+                scope.marks_visited = True
+        if scope.self_calls:
+            scope.params = self._param_count(block)
+            self.recursive.append(scope)
+        if 'dp' in tokens:
+            self.patterns.add('dynamic_programming')
+        return scope
+
+    @staticmethod
+    def _param_count(block: _CBlock) -> int:
+        params, current, depth = [], [], 0
+        for tok in block.header + [',']:
+            depth += (tok == '<') - (tok == '>') - 2 * (tok == '>>')
+            if tok == ',' and depth <= 0:
+                params.append(current)
+                current, depth = [], 0
+            else:
+                current.append(tok)
+        # Containers passed by reference (memo tables, the input array) are not part of the state space.
+        return sum(1 for p in params if p and not set(p) & (_C_CONTAINERS | {'[', 'memo', 'dp', 'cache'}))
+
+    def finish(self) -> Tuple[List[str], Dict[str, str]]:
+        return _resolve_complexity(self.time, self.space, self.recursive, self.patterns)
+
+def _analyze_c_family(code: str) -> Dict[str, Any]:
+    tokens, includes = _c_tokens(code)
+    analyzer = CFamilyAnalyzer()
+    analyzer.analyze(tokens)
+    patterns, complexity = analyzer.finish()
+    return {
+        'complexity': complexity,
+        'patterns': patterns,
+        'code_structure': {
+            'functions': analyzer.functions,
+            'classes': analyzer.classes,
+            'recursive_functions': [scope.name for scope in analyzer.recursive],
+            'loops': analyzer.loops,
+            'max_loop_depth': analyzer.max_loop_depth,
+            'imports': sorted(set(includes)),
+        },
+    }
+
+register_analyzer('cpp')(_analyze_c_family)
+register_analyzer('java')(_analyze_c_family)
+
+def analyze_code(code: str, language: Optional[str] = None) -> Dict[str, Any]:
     if not code or not code.strip():
         return {
             'error': 'Empty code provided',
@@ -10,23 +691,31 @@ def analyze_code(code: str) -> Dict[str, Any]:
             'patterns': ['general_algorithm'],
             'quality_metrics': {'lines': 0, 'characters': 0}
         }
-    
+
+    started = time.perf_counter()
+    language = language or detect_language(code)
+    analyzer = ANALYZERS.get(language)
     try:
-        tree = ast.parse(code.strip())
-        return {
-            'complexity': {'time_complexity': 'O(n)', 'space_complexity': 'O(1)'},
-            'patterns': _simple_pattern_detection(code),
-            'quality_metrics': {'lines': len(code.splitlines()), 'characters': len(code)},
-            'status': 'success'
-        }
-    except:
+        if analyzer is None:
+            raise ValueError(f"No analyzer registered for {language}")
+        result = analyzer(code)
+    except (SyntaxError, ValueError, RecursionError):
         return {
-            'complexity': {'time_complexity': 'O(n)', 'space_complexity': 'O(1)'},
+            'complexity': {'time_complexity': 'O(?)', 'space_complexity': 'O(?)'},
             'patterns': _simple_pattern_detection(code),
-            'quality_metrics': {'lines': len(code.splitlines()), 'characters': len(code)},
+            'quality_metrics': _basic_quality_metrics(code),
+            'language': language,
             'status': 'fallback'
         }
 
+    result['patterns'] = result['patterns'] or ['general_algorithm']
+    result['quality_metrics'] = _basic_quality_metrics(code)
+    result['language'] = language
+    result['code_structure']['language'] = language
+    result['code_structure']['analysis_ms'] = round((time.perf_counter() - started) * 1000, 2)
+    result['status'] = 'success'
+    return result
+
 def _simple_pattern_detection(code: str) -> List[str]:
     patterns = []
     code_lower = code.lower()
@@ -48,23 +737,44 @@ class CodeAnalyzer:
     def analyze_code(self, code: str) -> Dict[str, Any]:
         return analyze_code(code)
 
-def _detect_patterns(code: str) -> List[str]:
-    return _simple_pattern_detection(code)
-
-def _detect_patterns_fallback(code: str) -> List[str]:
-    return _simple_pattern_detection(code)
-
-def _detect_patterns_comprehensive(code: str) -> List[str]:
-    return _simple_pattern_detection(code)
-
 def _basic_quality_metrics(code: str) -> Dict[str, Any]:
     return {'lines': len(code.splitlines()), 'characters': len(code)}
 
-def _estimate_complexity_fallback(code: str) -> Dict[str, str]:
-    return {'time_complexity': 'O(n)', 'space_complexity': 'O(1)'}
-
-def _analyze_structure_fallback(code: str) -> Dict[str, Any]:
-    return {'functions': 0, 'classes': 0, 'loops': 0}
-
 def _clean_input_code(code: str) -> str:
     return code.strip() if code else ""
+
+_C_COMMENT_RE = re.compile(r"(\"(?:\\.|[^\"\\])*\"|'(?:\\.|[^'\\])*')|//[^\n]*|/\*.*?\*/", re.S)
+_WHITESPACE_RE = re.compile(r"\s+")
+
+def _normalize_python_tokens(code: str) -> str:
+    parts = []
+    for tok in tokenize.generate_tokens(io.StringIO(code).readline):
+        if tok.type in (tokenize.COMMENT, tokenize.NL, tokenize.ENDMARKER):
+            continue
+        if tok.type == tokenize.INDENT:
+            parts.append("{")
+        elif tok.type == tokenize.DEDENT:
+            parts.append("}")
+        elif tok.type == tokenize.NEWLINE:
+            parts.append(";")
+        else:
+            parts.append(tok.string)
+    return " ".join(parts)
+
+def normalize_code(code: str, canonicalize: bool = False) -> str:
+    code = _clean_input_code(code)
+    if not code:
+        return ""
+    try:
+        tree = ast.parse(code)
+    except (SyntaxError, ValueError, RecursionError):
+        # "//" is floor division in Python, so comments are only stripped from code that is clearly C, C++ or Java.
+        if c_family_language(code):
+            code = _C_COMMENT_RE.sub(lambda m: m.group(1) or " ", code)
+        return _WHITESPACE_RE.sub(" ", code).strip()
+    if canonicalize:
+        return ast.unparse(tree)
+    return _normalize_python_tokens(code)
+
+def code_fingerprint(code: str, canonicalize: bool = False) -> str:
+    return hashlib.sha256(normalize_code(code, canonicalize).encode("utf-8")).hexdigest()
@@ -0,0 +1,24 @@
+import streamlit as st
+import os
+from typing import Any, Optional
+
+TRUE_VALUES = ("1", "true", "yes", "on")
+
+def get_setting(name: str, default: Any = None) -> Any:
+    # Streamlit secrets win over environment variables; outside a Streamlit app only the environment is read.
+    try:
+        return st.secrets.get(name, os.getenv(name, default))
+    except Exception:
+        return os.getenv(name, default)
+
+def get_int_setting(name: str, default: Optional[int] = None) -> Optional[int]:
+    value = get_setting(name)
+    return int(value) if value not in (None, "") else default
+
+def get_float_setting(name: str, default: float) -> float:
+    value = get_setting(name)
+    return float(value) if value not in (None, "") else default
+
+def get_bool_setting(name: str, default: bool = False) -> bool:
+    value = get_setting(name)
+    return str(value).strip().lower() in TRUE_VALUES if value not in (None, "") else default
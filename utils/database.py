@@ -1,156 +1,466 @@
 import sqlite3
 import streamlit as st
 import pandas as pd
+import atexit
 import json
-from typing import Dict, Any
-from datetime import datetime, timedelta
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Any, Iterator, List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
 import random
 
+from .config import get_bool_setting
+from .migrations import migrate
+
 DB_PATH = "data/mentor.db"
+POOL_SIZE = 8
+BUSY_TIMEOUT = 10.0
+CACHE_SIZE_KB = 16384
+MMAP_SIZE = 128 * 1024 * 1024
+WRITE_BATCH_SIZE = 64
+WRITE_FLUSH_INTERVAL = 0.25
+_FLUSH = ("flush", ())
+
+logger = logging.getLogger(__name__)
+
+def _utc_timestamp() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+class ConnectionPool:
+    def __init__(self, db_path: str, size: int = POOL_SIZE, timeout: float = BUSY_TIMEOUT):
+        self.db_path = db_path
+        self.size = size
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue(maxsize=size)
+        self._lock = threading.Lock()
+        self._opened = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False)
+        conn.execute(f"PRAGMA busy_timeout = {int(self.timeout * 1000)}")
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KB}")
+        conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            can_open = self._opened < self.size
+            if can_open:
+                self._opened += 1
+        if can_open:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._opened -= 1
+                raise
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError("Timed out waiting for a pooled database connection")
+
+    def release(self, conn: sqlite3.Connection):
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put_nowait(conn)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        with self.connection() as conn:
+            try:
+                yield conn
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+    def close(self):
+        with self._lock:
+            while True:
+                try:
+                    self._idle.get_nowait().close()
+                except queue.Empty:
+                    break
+                self._opened -= 1
+
+class WriteBehindQueue:
+    def __init__(self, manager: "DatabaseManager", batch_size: int = WRITE_BATCH_SIZE,
+                 flush_interval: float = WRITE_FLUSH_INTERVAL):
+        self.manager = manager
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue[Tuple[str, tuple]]" = queue.Queue()
+        self._pending = 0
+        self._pending_sessions: Dict[str, int] = {}
+        self._pending_lock = threading.Lock()
+        self._idle = threading.Condition(self._pending_lock)
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="db-write-behind", daemon=True)
+        self._thread.start()
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def pending_for(self, session_id: str) -> int:
+        return self._pending_sessions.get(session_id, 0)
+
+    def submit(self, kind: str, args: tuple):
+        if self._stopped.is_set():
+            raise RuntimeError("Write-behind queue is closed")
+        with self._pending_lock:
+            self._pending += 1
+            self._pending_sessions[args[0]] = self._pending_sessions.get(args[0], 0) + 1
+        self._queue.put((kind, args))
+
+    def flush(self, timeout: Optional[float] = None, session_id: Optional[str] = None) -> bool:
+        # A marker wakes the writer so it commits what it has instead of waiting out the batching window.
+        self._queue.put(_FLUSH)
+        with self._idle:
+            if session_id is None:
+                return self._idle.wait_for(lambda: self._pending == 0, timeout=timeout)
+            return self._idle.wait_for(lambda: session_id not in self._pending_sessions, timeout=timeout)
+
+    def close(self, timeout: Optional[float] = None):
+        if self._stopped.is_set():
+            return
+        self.flush(timeout)
+        self._stopped.set()
+        self._thread.join(timeout)
+
+    def _take_batch(self) -> List[Tuple[str, tuple]]:
+        try:
+            item = self._queue.get(timeout=self.flush_interval)
+        except queue.Empty:
+            return []
+        if item is _FLUSH:
+            return []
+        batch = [item]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _FLUSH:
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while not (self._stopped.is_set() and self._queue.empty()):
+            batch = self._take_batch()
+            if not batch:
+                continue
+            written = []
+            try:
+                with self.manager.transaction() as conn:
+                    written = [self.manager._apply_write(conn, kind, args) for kind, args in batch]
+            except Exception:
+                logger.exception("Batched write of %d rows failed, retrying individually", len(batch))
+                written = []
+                for kind, args in batch:
+                    try:
+                        with self.manager.transaction() as conn:
+                            written.append(self.manager._apply_write(conn, kind, args))
+                    except Exception:
+                        logger.exception("Dropping %s write for session %s", kind, args[0])
+            finally:
+                with self._idle:
+                    self._pending -= len(batch)
+                    for _, args in batch:
+                        left = self._pending_sessions[args[0]] - 1
+                        if left:
+                            self._pending_sessions[args[0]] = left
+                        else:
+                            del self._pending_sessions[args[0]]
+                    self._idle.notify_all()
+            self.manager._notify_submission_listeners(written)
 
 class DatabaseManager:
-    def __init__(self, db_path: str = DB_PATH):
+    def __init__(self, db_path: str = DB_PATH, pool_size: int = POOL_SIZE, durable: bool = False):
         self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self.pool = ConnectionPool(db_path, size=pool_size)
         self.init_database()
+        self.writer: Optional[WriteBehindQueue] = None
+        self._submission_listeners: List[Callable[[List[Dict[str, Any]]], None]] = []
+        self.set_durable(durable)
+        atexit.register(self.close)
+
+    @property
+    def durable(self) -> bool:
+        return self.writer is None
+
+    def set_durable(self, durable: bool):
+        if durable and self.writer is not None:
+            self.writer.close()
+            self.writer = None
+        elif not durable and self.writer is None:
+            self.writer = WriteBehindQueue(self)
+
+    def flush(self, timeout: Optional[float] = None, session_id: Optional[str] = None) -> bool:
+        # With a session, only that session's queued writes are waited for (read-your-writes per session).
+        if self.writer is None:
+            return True
+        if session_id is not None:
+            return self.writer.pending_for(session_id) == 0 or self.writer.flush(timeout, session_id)
+        return self.writer.pending == 0 or self.writer.flush(timeout)
+
+    def connection(self):
+        return self.pool.connection()
+
+    def transaction(self):
+        return self.pool.transaction()
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.pool.close()
+
+    def add_submission_listener(self, callback: Callable[[List[Dict[str, Any]]], None]):
+        if callback not in self._submission_listeners:
+            self._submission_listeners.append(callback)
+
+    def _notify_submission_listeners(self, written: List[Optional[Dict[str, Any]]]):
+        rows = [row for row in written if row is not None]
+        if not rows:
+            return
+        for callback in list(self._submission_listeners):
+            try:
+                callback(rows)
+            except Exception:
+                logger.exception("Submission listener %r failed", callback)
+
+    def _write(self, kind: str, args: tuple):
+        if self.writer is None:
+            with self.transaction() as conn:
+                row = self._apply_write(conn, kind, args)
+            self._notify_submission_listeners([row])
+        else:
+            self.writer.submit(kind, args)
+
+    def _apply_write(self, conn: sqlite3.Connection, kind: str, args: tuple) -> Optional[Dict[str, Any]]:
+        if kind == "submission":
+            session_id, problem_name, code, analysis, feedback, submitted_at, structured = args
+            review = (structured or {}).get("feedback") or {}
+            patterns = (structured or {}).get("patterns") or {}
+            cursor = conn.execute("""
+            INSERT INTO submissions (session_id, problem_name, code, analysis, feedback, submitted_at,
+                                     category, difficulty, time_complexity, space_complexity,
+                                     primary_pattern, usage_quality)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                                  (session_id, problem_name, code,
+                                   json.dumps(analysis), feedback, submitted_at,
+                                   review.get("category"), review.get("difficulty"),
+                                   review.get("time_complexity"), review.get("space_complexity"),
+                                   patterns.get("primary_pattern"), patterns.get("usage_quality")))
+            self._record_insights(conn, cursor.lastrowid, review, patterns)
+            self._record_activity(conn, session_id, submitted_at)
+            return {'id': cursor.lastrowid, 'session_id': session_id,
+                    'problem_name': problem_name, 'code': code}
+        elif kind == "learning_plan":
+            session_id, plan_text, created_at = args
+            conn.execute("""
+            INSERT INTO learning_plans (session_id, plan_text, created_at)
+            VALUES (?, ?, ?)""", (session_id, plan_text, created_at))
+            return None
+        else:
+            raise ValueError(f"Unknown write kind: {kind}")
 
     def init_database(self):
-        import os
-        os.makedirs("data", exist_ok=True)
-        
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        
-        c.execute("""
-        CREATE TABLE IF NOT EXISTS user_sessions (
-            session_id TEXT PRIMARY KEY,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            user_data TEXT
-        )""")
-        
-        c.execute("""
-        CREATE TABLE IF NOT EXISTS submissions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            session_id TEXT,
-            problem_name TEXT,
-            code TEXT,
-            analysis TEXT,
-            feedback TEXT,
-            submitted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )""")
-        
-        c.execute("""
-        CREATE TABLE IF NOT EXISTS progress (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            session_id TEXT,
-            topic TEXT,
-            difficulty TEXT,
-            success_rate REAL,
-            problems_solved INTEGER,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )""")
-        
-        c.execute("""
-        CREATE TABLE IF NOT EXISTS learning_plans (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            session_id TEXT,
-            plan_text TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )""")
-        
-        conn.commit()
-        conn.close()
+        with self.connection() as conn:
+            migrate(conn)
 
     def save_submission(self, session_id: str, problem_name: str,
-                        code: str, analysis: Dict[str, Any], feedback: str):
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        c.execute("""
-        INSERT INTO submissions (session_id, problem_name, code, analysis, feedback)
-        VALUES (?, ?, ?, ?, ?)""",
-                  (session_id, problem_name, code,
-                   json.dumps(analysis), feedback))
-        conn.commit()
-        conn.close()
+                        code: str, analysis: Dict[str, Any], feedback: str,
+                        structured: Optional[Dict[str, Any]] = None):
+        self._write("submission", (session_id, problem_name, code, analysis, feedback, _utc_timestamp(),
+                                   structured))
+
+    def _record_insights(self, conn: sqlite3.Connection, submission_id: int,
+                         review: Dict[str, Any], patterns: Dict[str, Any]):
+        rows = []
+        for kind, items in (("strength", review.get("strengths")), ("improvement", review.get("improvements")),
+                            ("alternative", patterns.get("alternatives")),
+                            ("optimization", patterns.get("optimizations"))):
+            rows.extend((submission_id, kind, i, text, None) for i, text in enumerate(items or []) if text)
+        related = (review.get("related_problems") or []) + (patterns.get("related_problems") or [])
+        rows.extend((submission_id, "related_problem", i, problem["title"], problem.get("url") or None)
+                    for i, problem in enumerate(related) if isinstance(problem, dict) and problem.get("title"))
+        if rows:
+            conn.executemany("""
+            INSERT OR IGNORE INTO submission_insights (submission_id, kind, position, text, url)
+            VALUES (?, ?, ?, ?, ?)""", rows)
 
     def get_recent_submissions(self, session_id: str, limit: int = 5) -> pd.DataFrame:
-        conn = sqlite3.connect(self.db_path)
+        self.flush(session_id=session_id)
+        try:
+            with self.connection() as conn:
+                return pd.read_sql_query("""
+                SELECT problem_name, code, analysis, feedback, submitted_at
+                FROM submissions WHERE session_id = ?
+                ORDER BY submitted_at DESC LIMIT ?""",
+                                         conn, params=(session_id, limit))
+        except Exception:
+            return pd.DataFrame()
+
+    def iter_submissions(self, after_id: int = 0, chunk_size: int = 1000) -> Iterator[List[Dict[str, Any]]]:
+        self.flush()
+        with self.connection() as conn:
+            cursor = conn.execute("""
+            SELECT id, session_id, problem_name, code
+            FROM submissions
+            WHERE id > ? AND code IS NOT NULL AND TRIM(code) != ''
+            ORDER BY id""", (after_id,))
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield [{'id': r[0], 'session_id': r[1], 'problem_name': r[2], 'code': r[3]} for r in rows]
+
+    def get_submissions_by_ids(self, ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        if not ids:
+            return {}
+        with self.connection() as conn:
+            placeholders = ",".join("?" * len(ids))
+            rows = conn.execute(f"""
+            SELECT id, session_id, problem_name, code, submitted_at
+            FROM submissions WHERE id IN ({placeholders})""", list(ids)).fetchall()
+        return {r[0]: {'id': r[0], 'session_id': r[1], 'problem_name': r[2],
+                       'code': r[3], 'submitted_at': r[4]} for r in rows}
+
+    def get_feedback_breakdown(self, session_id: str) -> pd.DataFrame:
+        self.flush(session_id=session_id)
         try:
-            df = pd.read_sql_query("""
-            SELECT problem_name, code, analysis, feedback, submitted_at
-            FROM submissions WHERE session_id = ?
-            ORDER BY submitted_at DESC LIMIT ?""",
-                                   conn, params=(session_id, limit))
-            conn.close()
-            return df
+            with self.connection() as conn:
+                return pd.read_sql_query("""
+                SELECT category, difficulty, COUNT(*) AS submissions,
+                       AVG(usage_quality) AS avg_usage_quality
+                FROM submissions
+                WHERE session_id = ? AND category IS NOT NULL
+                GROUP BY category, difficulty
+                ORDER BY submissions DESC, category""",
+                                         conn, params=(session_id,))
         except Exception:
-            conn.close()
             return pd.DataFrame()
 
+    def get_common_insights(self, session_id: str, kind: str = "improvement", limit: int = 5) -> pd.DataFrame:
+        self.flush(session_id=session_id)
+        try:
+            with self.connection() as conn:
+                return pd.read_sql_query("""
+                SELECT i.text, MAX(i.url) AS url, COUNT(*) AS occurrences
+                FROM submission_insights i
+                JOIN submissions s ON s.id = i.submission_id
+                WHERE s.session_id = ? AND i.kind = ?
+                GROUP BY i.text
+                ORDER BY occurrences DESC, MAX(s.submitted_at) DESC
+                LIMIT ?""",
+                                         conn, params=(session_id, kind, limit))
+        except Exception:
+            return pd.DataFrame()
+
+    def get_topic_success_rates(self, session_id: str) -> Dict[str, float]:
+        self.flush(session_id=session_id)
+        try:
+            with self.connection() as conn:
+                rows = conn.execute("""
+                SELECT topic,
+                       COALESCE(SUM(success_rate * problems_solved) / NULLIF(SUM(problems_solved), 0),
+                                AVG(success_rate))
+                FROM progress
+                WHERE session_id = ?
+                GROUP BY topic""", (session_id,)).fetchall()
+            return {r[0]: float(r[1]) for r in rows if r[1] is not None}
+        except Exception:
+            return {}
+
+    def get_attempted_problems(self, session_id: str) -> List[str]:
+        self.flush(session_id=session_id)
+        try:
+            with self.connection() as conn:
+                rows = conn.execute("""
+                SELECT DISTINCT problem_name FROM submissions
+                WHERE session_id = ? AND problem_name IS NOT NULL""", (session_id,)).fetchall()
+            return [r[0] for r in rows]
+        except Exception:
+            return []
+
     def get_progress_data(self, session_id: str) -> pd.DataFrame:
-        conn = sqlite3.connect(self.db_path)
+        self.flush(session_id=session_id)
         try:
-            df = pd.read_sql_query("""
-            SELECT 
-                topic, 
-                difficulty, 
-                success_rate, 
-                problems_solved, 
-                DATE(updated_at) as date,
-                updated_at
-            FROM progress 
-            WHERE session_id = ?
-            ORDER BY updated_at DESC""",
-            conn, params=(session_id,))
-            conn.close()
-            return df
+            with self.connection() as conn:
+                return pd.read_sql_query("""
+                SELECT 
+                    topic, 
+                    difficulty, 
+                    success_rate, 
+                    problems_solved, 
+                    DATE(updated_at) as date,
+                    updated_at
+                FROM progress 
+                WHERE session_id = ?
+                ORDER BY updated_at DESC""",
+                conn, params=(session_id,))
         except Exception:
-            conn.close()
             return pd.DataFrame()
 
     def get_user_statistics(self, session_id: str) -> Dict[str, Any]:
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        
+        self.flush(session_id=session_id)
         try:
-            c.execute("SELECT COUNT(*) FROM submissions WHERE session_id = ?", (session_id,))
-            total_problems = c.fetchone()[0]
+            with self.connection() as conn:
+                row = conn.execute("""
+                SELECT
+                    COALESCE(s.total_submissions, 0),
+                    (SELECT difficulty FROM user_difficulty_stats d
+                     WHERE d.session_id = k.session_id AND d.entries > 0
+                     ORDER BY d.entries DESC, d.difficulty LIMIT 1),
+                    (SELECT COALESCE(SUM(a.submissions), 0) FROM user_activity a
+                     WHERE a.session_id = k.session_id AND a.day >= date('now', '-7 days')),
+                    CASE WHEN s.last_active_day >= date('now', '-1 day')
+                         THEN s.current_streak ELSE 0 END
+                FROM (SELECT ? AS session_id) k
+                LEFT JOIN user_stats s ON s.session_id = k.session_id""", (session_id,)).fetchone()
+            
+            total_problems, avg_difficulty, this_week, current_streak = row
             
             if total_problems > 0:
                 success_rate = min(100.0, 60 + (total_problems * 3))
             else:
                 success_rate = 0.0
             
-            c.execute("""
-            SELECT difficulty, COUNT(*) as count 
-            FROM progress 
-            WHERE session_id = ? 
-            GROUP BY difficulty""", (session_id,))
-            
-            difficulty_counts = c.fetchall()
-            if difficulty_counts:
-                avg_difficulty = max(difficulty_counts, key=lambda x: x[1])[0]
-            else:
-                avg_difficulty = "N/A"
-            
-            c.execute("""
-            SELECT COUNT(*) FROM submissions 
-            WHERE session_id = ? AND submitted_at >= date('now', '-7 days')""", (session_id,))
-            this_week = c.fetchone()[0]
-            
-            current_streak = min(total_problems, this_week + 2)
-            
-            conn.close()
-            
             return {
                 'total_problems': total_problems,
                 'success_rate': success_rate,
-                'avg_difficulty': avg_difficulty,
+                'avg_difficulty': avg_difficulty or "N/A",
                 'this_week': this_week,
-                'current_streak': current_streak
+                'current_streak': current_streak or 0
             }
             
         except Exception as e:
-            conn.close()
             return {
                 'total_problems': 0,
                 'success_rate': 0.0,
@@ -159,22 +469,75 @@ class DatabaseManager:
                 'current_streak': 0
             }
 
+    def _record_activity(self, conn: sqlite3.Connection, session_id: str, submitted_at: str = "now"):
+        day = conn.execute("SELECT date(?)", (submitted_at,)).fetchone()[0]
+        conn.execute("""
+        INSERT INTO user_activity (session_id, day, submissions) VALUES (?, ?, 1)
+        ON CONFLICT (session_id, day) DO UPDATE SET submissions = submissions + 1""",
+                     (session_id, day))
+        
+        row = conn.execute("SELECT last_active_day, current_streak FROM user_stats WHERE session_id = ?",
+                           (session_id,)).fetchone()
+        if row is None or row[0] is None:
+            last_day, streak = day, 1
+        else:
+            last_day, streak = row
+            if day == last_day:
+                pass
+            elif day > last_day:
+                gap = (datetime.fromisoformat(day) - datetime.fromisoformat(last_day)).days
+                last_day, streak = day, (streak + 1 if gap == 1 else 1)
+            else:
+                streak = self._count_streak(conn, session_id, last_day)
+        
+        conn.execute("""
+        INSERT INTO user_stats (session_id, total_submissions, last_active_day, current_streak)
+        VALUES (?, 1, ?, ?)
+        ON CONFLICT (session_id) DO UPDATE SET
+            total_submissions = total_submissions + 1,
+            last_active_day = excluded.last_active_day,
+            current_streak = excluded.current_streak""",
+                     (session_id, last_day, streak))
+
+    def _count_streak(self, conn: sqlite3.Connection, session_id: str, last_day: str) -> int:
+        streak = 0
+        expected = datetime.fromisoformat(last_day)
+        for (day,) in conn.execute("""
+        SELECT day FROM user_activity WHERE session_id = ? AND day <= ?
+        ORDER BY day DESC""", (session_id, last_day)):
+            if datetime.fromisoformat(day) != expected:
+                break
+            streak += 1
+            expected -= timedelta(days=1)
+        return streak
+
+    def _record_difficulty(self, conn: sqlite3.Connection, session_id: str, difficulty: str):
+        conn.execute("""
+        INSERT INTO user_difficulty_stats (session_id, difficulty, entries) VALUES (?, ?, 1)
+        ON CONFLICT (session_id, difficulty) DO UPDATE SET entries = entries + 1""",
+                     (session_id, difficulty))
+        conn.execute("INSERT OR IGNORE INTO user_stats (session_id) VALUES (?)", (session_id,))
+
     def save_learning_plan(self, session_id: str, plan_text: str):
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        c.execute("""
-        INSERT INTO learning_plans (session_id, plan_text)
-        VALUES (?, ?)""", (session_id, plan_text))
-        conn.commit()
-        conn.close()
+        self._write("learning_plan", (session_id, plan_text, _utc_timestamp()))
+
+    def clear_session_data(self, session_id: str):
+        self.flush(session_id=session_id)
+        with self.transaction() as conn:
+            self._clear_session_data(conn, session_id)
+
+    def _clear_session_data(self, conn: sqlite3.Connection, session_id: str):
+        conn.execute("DELETE FROM progress WHERE session_id = ?", (session_id,))
+        conn.execute("""
+        DELETE FROM submission_insights
+        WHERE submission_id IN (SELECT id FROM submissions WHERE session_id = ?)""", (session_id,))
+        conn.execute("DELETE FROM submissions WHERE session_id = ?", (session_id,))
+        conn.execute("DELETE FROM user_activity WHERE session_id = ?", (session_id,))
+        conn.execute("DELETE FROM user_difficulty_stats WHERE session_id = ?", (session_id,))
+        conn.execute("DELETE FROM user_stats WHERE session_id = ?", (session_id,))
 
     def add_sample_data(self, session_id: str):
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        
-        c.execute("DELETE FROM submissions WHERE session_id = ?", (session_id,))
-        c.execute("DELETE FROM progress WHERE session_id = ?", (session_id,))
-        
+        self.flush(session_id=session_id)
         sample_submissions = [
             ("Two Sum", "def twoSum(nums, target):\n    d = {}\n    for i, n in enumerate(nums):\n        if target - n in d:\n            return [d[target - n], i]\n        d[n] = i"),
             ("Three Sum", "def threeSum(nums):\n    nums.sort()\n    result = []\n    # implementation\n    return result"),
@@ -186,15 +549,6 @@ class DatabaseManager:
             ("Merge Two Lists", "def mergeTwoLists(l1, l2):\n    dummy = ListNode(0)\n    # merge logic\n    return dummy.next")
         ]
         
-        for i, (problem, code) in enumerate(sample_submissions):
-            timestamp = (datetime.now() - timedelta(days=i)).isoformat()
-            c.execute("""
-            INSERT INTO submissions (session_id, problem_name, code, analysis, feedback, submitted_at)
-            VALUES (?, ?, ?, ?, ?, ?)""", 
-            (session_id, problem, code, 
-             '{"complexity": {"time_complexity": "O(n)", "space_complexity": "O(1)"}, "patterns": ["algorithm"]}',
-             f"Great solution for {problem}! Your implementation shows good understanding.", timestamp))
-        
         sample_progress = [
             ('Array/String Manipulation', 'Easy', 85.0, 8, 1),
             ('Array/String Manipulation', 'Medium', 70.0, 4, 2),
@@ -210,16 +564,27 @@ class DatabaseManager:
             ('Backtracking', 'Medium', 58.0, 1, 12)
         ]
         
-        for topic, difficulty, success_rate, problems_solved, days_ago in sample_progress:
-            timestamp = (datetime.now() - timedelta(days=days_ago)).isoformat()
-            c.execute("""
-            INSERT INTO progress (session_id, topic, difficulty, success_rate, problems_solved, updated_at)
-            VALUES (?, ?, ?, ?, ?, ?)""", 
-            (session_id, topic, difficulty, success_rate, problems_solved, timestamp))
-        
-        conn.commit()
-        conn.close()
+        with self.transaction() as conn:
+            self._clear_session_data(conn, session_id)
+            c = conn.cursor()
+            for i, (problem, code) in enumerate(sample_submissions):
+                timestamp = (datetime.now() - timedelta(days=i)).isoformat()
+                c.execute("""
+                INSERT INTO submissions (session_id, problem_name, code, analysis, feedback, submitted_at)
+                VALUES (?, ?, ?, ?, ?, ?)""", 
+                (session_id, problem, code, 
+                 '{"complexity": {"time_complexity": "O(n)", "space_complexity": "O(1)"}, "patterns": ["algorithm"]}',
+                 f"Great solution for {problem}! Your implementation shows good understanding.", timestamp))
+                self._record_activity(conn, session_id, timestamp)
+
+            for topic, difficulty, success_rate, problems_solved, days_ago in sample_progress:
+                timestamp = (datetime.now() - timedelta(days=days_ago)).isoformat()
+                c.execute("""
+                INSERT INTO progress (session_id, topic, difficulty, success_rate, problems_solved, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)""", 
+                (session_id, topic, difficulty, success_rate, problems_solved, timestamp))
+                self._record_difficulty(conn, session_id, difficulty)
 
 @st.cache_resource
 def get_database() -> DatabaseManager:
-    return DatabaseManager()
+    return DatabaseManager(durable=get_bool_setting("DB_DURABLE_WRITES"))
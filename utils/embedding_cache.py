@@ -0,0 +1,171 @@
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Generic, Iterable, List, Optional, Tuple, TypeVar
+
+import numpy as np
+
+from .code_analyzer import code_fingerprint
+
+CACHE_PATH = Path("data/embeddings.db")
+MAX_MEMORY_ENTRIES = 2048
+MAX_DISK_ENTRIES = 200_000
+
+V = TypeVar("V")
+
+class BoundedLRU(Generic[V]):
+    # Not thread-safe on its own; every cache calls it under its own lock.
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._items: "OrderedDict[str, V]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[V]:
+        value = self._items.get(key)
+        if value is not None:
+            self._items.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: V) -> int:
+        self._items[key] = value
+        self._items.move_to_end(key)
+        evicted = 0
+        while len(self._items) > self.max_entries:
+            self._items.popitem(last=False)
+            evicted += 1
+        return evicted
+
+    def discard(self, key: str):
+        self._items.pop(key, None)
+
+    def clear(self):
+        self._items.clear()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+def trim_disk(conn, table: str, key_column: str, max_entries: int,
+              expired_before: Optional[float] = None) -> Tuple[int, int]:
+    # Drops expired rows, then the least recently used ones; returns (rows removed, rows left).
+    removed = 0
+    if expired_before is not None:
+        removed += conn.execute(f"DELETE FROM {table} WHERE created_at < ?", (expired_before,)).rowcount
+    count = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    if count > max_entries:
+        # Trim an extra 10% so eviction does not run on every insert once the cache is full.
+        trimmed = conn.execute(f"""
+        DELETE FROM {table} WHERE {key_column} IN (
+            SELECT {key_column} FROM {table} ORDER BY last_used LIMIT ?)""",
+                               (count - max_entries + max_entries // 10,)).rowcount
+        removed += trimmed
+        count -= trimmed
+    return removed, count
+
+def with_hit_rate(stats: Dict[str, Any], hit_keys: Iterable[str], miss_keys: Iterable[str]) -> Dict[str, Any]:
+    hits = sum(stats[name] for name in hit_keys)
+    lookups = hits + sum(stats[name] for name in miss_keys)
+    stats['hit_rate'] = hits / lookups if lookups else 0.0
+    return stats
+
+class EmbeddingCache:
+    def __init__(self, path: Optional[Path] = CACHE_PATH, namespace: str = "",
+                 max_memory_entries: int = MAX_MEMORY_ENTRIES, max_disk_entries: int = MAX_DISK_ENTRIES,
+                 canonicalize: bool = False):
+        self.namespace = namespace
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.canonicalize = canonicalize
+        self._memory: BoundedLRU[np.ndarray] = BoundedLRU(max_memory_entries)
+        self._lock = threading.Lock()
+        self._stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0,
+                       'memory_evictions': 0, 'disk_evictions': 0}
+        self._conn: Optional[sqlite3.Connection] = None
+        self._disk_entries = 0
+        if path is not None:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(path), check_same_thread=False, timeout=10.0)
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            self._conn.execute("PRAGMA synchronous = NORMAL")
+            self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                dim INTEGER NOT NULL,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL
+            )""")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings (last_used)")
+            self._conn.commit()
+            self._disk_entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def key_for(self, code: str) -> str:
+        return f"{self.namespace}:{code_fingerprint(code, self.canonicalize)}"
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._stats['memory_hits'] += 1
+                return vector
+            if self._conn is not None:
+                row = self._conn.execute("SELECT dim, vector FROM embeddings WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    self._conn.execute("UPDATE embeddings SET last_used = ? WHERE key = ?", (time.time(), key))
+                    self._conn.commit()
+                    vector = np.frombuffer(row[1], dtype='float32').reshape(row[0])
+                    self._remember(key, vector)
+                    self._stats['disk_hits'] += 1
+                    return vector
+            self._stats['misses'] += 1
+            return None
+
+    def put(self, key: str, vector: np.ndarray):
+        vector = np.asarray(vector, dtype='float32').reshape(-1)
+        with self._lock:
+            self._remember(key, vector)
+            if self._conn is not None:
+                row = (vector.shape[0], vector.tobytes(), time.time(), key)
+                # Only a new key grows the table; counting overwrites would make eviction run early.
+                if self._conn.execute("UPDATE embeddings SET dim = ?, vector = ?, last_used = ? WHERE key = ?",
+                                      row).rowcount == 0:
+                    self._conn.execute("INSERT INTO embeddings (dim, vector, last_used, key) VALUES (?, ?, ?, ?)",
+                                       row)
+                    self._disk_entries += 1
+                    self._evict_disk()
+                self._conn.commit()
+
+    def encode(self, codes: List[str], encoder: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        keys = [self.key_for(code) for code in codes]
+        found = [self.get(key) for key in keys]
+        missing = [i for i, vector in enumerate(found) if vector is None]
+        if missing:
+            fresh = encoder([codes[i] for i in missing])
+            for i, vector in zip(missing, fresh):
+                self.put(keys[i], vector)
+                found[i] = np.asarray(vector, dtype='float32').reshape(-1)
+        return np.vstack(found).astype('float32', copy=False)
+
+    def _remember(self, key: str, vector: np.ndarray):
+        self._stats['memory_evictions'] += self._memory.put(key, vector)
+
+    def _evict_disk(self):
+        if self._disk_entries <= self.max_disk_entries:
+            return
+        deleted, self._disk_entries = trim_disk(self._conn, "embeddings", "key", self.max_disk_entries)
+        self._stats['disk_evictions'] += deleted
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['memory_entries'] = len(self._memory)
+            stats['disk_entries'] = self._disk_entries
+        return with_hit_rate(stats, ('memory_hits', 'disk_hits'), ('misses',))
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
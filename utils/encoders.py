@@ -0,0 +1,133 @@
+import importlib.util
+import logging
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+ENCODER_BACKENDS = ("torch", "torch_int8", "onnx", "onnx_int8")
+ONNX_MODEL_DIR = Path("data/models")
+ONNX_OPSET = 17
+ONNX_PACKAGES = ("onnx", "onnxruntime")
+
+logger = logging.getLogger(__name__)
+
+def missing_onnx_packages() -> List[str]:
+    return [name for name in ONNX_PACKAGES if importlib.util.find_spec(name) is None]
+
+def _normalize(embeddings: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return embeddings / np.clip(norms, 1e-12, None)
+
+class TorchEncoder:
+    def __init__(self, model_name: str, max_seq_length: Optional[int] = None,
+                 threads: Optional[int] = None, quantize: bool = False):
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        if threads:
+            torch.set_num_threads(threads)
+        # Dynamic int8 quantization only has CPU kernels.
+        self.model = SentenceTransformer(model_name, device="cpu" if quantize else None)
+        if max_seq_length:
+            self.model.max_seq_length = max_seq_length
+        if quantize:
+            self.model = torch.ao.quantization.quantize_dynamic(self.model, {torch.nn.Linear}, dtype=torch.qint8)
+        self.backend = "torch_int8" if quantize else "torch"
+        self.max_seq_length = self.model.max_seq_length
+
+    def encode(self, texts: List[str], batch_size: int = 32, normalize_embeddings: bool = False) -> np.ndarray:
+        return np.asarray(self.model.encode(texts, batch_size=batch_size,
+                                            normalize_embeddings=normalize_embeddings), dtype='float32')
+
+def _hidden_state_module(model):
+    import torch
+
+    class HiddenState(torch.nn.Module):
+        def __init__(self, inner):
+            super().__init__()
+            self.inner = inner
+
+        def forward(self, input_ids, attention_mask):
+            return self.inner(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state
+
+    return HiddenState(model)
+
+def export_onnx_model(model_name: str, model_dir: Path = ONNX_MODEL_DIR, quantize: bool = False) -> Path:
+    target_dir = Path(model_dir) / model_name.replace("/", "__")
+    fp32_path = target_dir / "model.onnx"
+    int8_path = target_dir / "model.int8.onnx"
+    if not fp32_path.exists():
+        import torch
+        from transformers import AutoModel, AutoTokenizer
+
+        logger.info("Exporting %s to ONNX at %s", model_name, fp32_path)
+        target_dir.mkdir(parents=True, exist_ok=True)
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+        model = _hidden_state_module(AutoModel.from_pretrained(model_name)).eval()
+        sample = tokenizer(["def f(x): return x"], return_tensors="pt")
+        dynamic = {0: "batch", 1: "sequence"}
+        with torch.no_grad():
+            torch.onnx.export(
+                model,
+                (sample["input_ids"], sample["attention_mask"]),
+                str(fp32_path),
+                input_names=["input_ids", "attention_mask"],
+                output_names=["last_hidden_state"],
+                dynamic_axes={"input_ids": dynamic, "attention_mask": dynamic, "last_hidden_state": dynamic},
+                opset_version=ONNX_OPSET,
+                dynamo=False,
+            )
+    if not quantize:
+        return fp32_path
+    if not int8_path.exists():
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        logger.info("Quantizing %s to int8", fp32_path)
+        quantize_dynamic(str(fp32_path), str(int8_path), weight_type=QuantType.QInt8)
+    return int8_path
+
+class OnnxEncoder:
+    def __init__(self, model_name: str, max_seq_length: Optional[int] = None,
+                 threads: Optional[int] = None, quantize: bool = False, model_dir: Path = ONNX_MODEL_DIR):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        model_path = export_onnx_model(model_name, model_dir, quantize)
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = threads or 0
+        options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(str(model_path), options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.backend = "onnx_int8" if quantize else "onnx"
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        # SentenceTransformer caps sequences at the tokenizer limit; mirror that so vectors stay comparable.
+        self.max_seq_length = min(max_seq_length or self.tokenizer.model_max_length, self.tokenizer.model_max_length)
+
+    def encode(self, texts: List[str], batch_size: int = 32, normalize_embeddings: bool = False) -> np.ndarray:
+        chunks = []
+        for start in range(0, len(texts), batch_size):
+            batch = self.tokenizer(texts[start:start + batch_size], padding=True, truncation=True,
+                                   max_length=self.max_seq_length, return_tensors="np")
+            feeds = {name: batch[name].astype('int64') for name in self.input_names if name in batch}
+            hidden = self.session.run(None, feeds)[0]
+            mask = batch["attention_mask"][..., None].astype('float32')
+            chunks.append((hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None))
+        embeddings = np.vstack(chunks).astype('float32') if chunks else np.zeros((0, 0), dtype='float32')
+        return _normalize(embeddings) if normalize_embeddings and len(embeddings) else embeddings
+
+def load_encoder(model_name: str, backend: str = "torch", max_seq_length: Optional[int] = None,
+                 threads: Optional[int] = None, fallback: bool = True):
+    if backend not in ENCODER_BACKENDS:
+        raise ValueError(f"backend must be one of {ENCODER_BACKENDS}")
+    quantize = backend.endswith("_int8")
+    if backend.startswith("onnx"):
+        missing = missing_onnx_packages()
+        if not missing:
+            return OnnxEncoder(model_name, max_seq_length=max_seq_length, threads=threads, quantize=quantize)
+        message = f"EMBEDDING_BACKEND={backend} needs {', '.join(missing)} (pip install -r requirements-onnx.txt)"
+        if not fallback:
+            raise RuntimeError(message)
+        logger.warning("%s. Falling back to the torch backend.", message)
+    return TorchEncoder(model_name, max_seq_length=max_seq_length, threads=threads, quantize=quantize)
@@ -1,32 +1,113 @@
 import streamlit as st
 import json
-from typing import Dict, List
+import logging
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Union
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
+from langchain_core.output_parsers import JsonOutputParser, PydanticOutputParser, StrOutputParser
 from dotenv import load_dotenv
 import datetime
 from typing import Optional
 import os
 
+from .llm_gateway import LLMGateway, estimate_tokens, get_llm_gateway
+from .prompt_builder import compact_analysis, compact_code
+from .schemas import CodeFeedback, CombinedAnalysis, PatternAnalysis
+from .semantic_cache import SemanticCache, SemanticHit, get_semantic_cache
+
 load_dotenv()
 
+PROMPT_VERSION = "2"
+
+logger = logging.getLogger(__name__)
+
+ANALYSIS_ERROR_TEMPLATE = """## ❌ AI Analysis Failed
+**Error:** {error}
+"""
+
+FEEDBACK_DEPTH = {
+    "fast": "Keep it brief: a one-sentence summary, at most two strengths and the single most important improvement.",
+    "balanced": "Give a short summary, the main strengths and the most important improvements.",
+    "detailed": "Be thorough: cover correctness, edge cases, code quality and complexity trade-offs, and pick "
+                "related problems that make a good next challenge.",
+}
+
+LEARNING_PATH_ERROR_TEMPLATE = """
+## ❌ Learning Path Generation Failed
+
+**Error:** {error}
+
+Please try again later or adjust the profile information.
+"""
+
+class TimedStream:
+    def __init__(self, chunks: Iterable[Any], label: str, error_template: str,
+                 on_complete: Optional[Callable[[Any], None]] = None, hit: Optional[SemanticHit] = None):
+        self.chunks = chunks
+        self.label = label
+        self.error_template = error_template
+        self.on_complete = on_complete
+        self.hit = hit
+        self.ttft = None
+        self.total = None
+        self.error = None
+        self.parts: List[Any] = []
+
+    def __iter__(self) -> Iterator[Any]:
+        started = time.perf_counter()
+        try:
+            for chunk in self.chunks:
+                if not chunk:
+                    continue
+                if self.ttft is None:
+                    self.ttft = time.perf_counter() - started
+                self.parts.append(chunk)
+                yield chunk
+            if self.on_complete is not None and self.parts:
+                self.on_complete(self.result)
+        except Exception as e:
+            self.error = e
+            message = self.error_template.format(error=e)
+            self.parts.append(message)
+            yield message
+        finally:
+            self.total = time.perf_counter() - started
+            logger.info("%s stream: first token %s, total %.2fs", self.label,
+                        f"{self.ttft:.2f}s" if self.ttft is not None else "n/a", self.total)
+
+    @property
+    def text(self) -> str:
+        return "".join(part for part in self.parts if isinstance(part, str))
+
+    @property
+    def result(self) -> Any:
+        # Structured streams yield successively more complete objects, so the last one is the answer.
+        if self.parts and not isinstance(self.parts[-1], str):
+            return self.parts[-1]
+        return self.text
+
 class LangChainGeminiClient:
-    def __init__(self, analysis_mode="balanced"):
+    def __init__(self, analysis_mode="balanced", semantic_cache: Optional[SemanticCache] = None,
+                 llm=None, gateway: Optional[LLMGateway] = None):
         self.analysis_mode = analysis_mode.lower()
-        self.llm = ChatGoogleGenerativeAI(
+        self.semantic_cache = semantic_cache
+        self.gateway = gateway
+        # Any LangChain chat model can stand in for Gemini, e.g. FakeListChatModel in tests.
+        self.llm = llm or ChatGoogleGenerativeAI(
             model=st.secrets.get("GOOGLE_MODEL_NAME", "gemini-2.5-flash"),
             temperature=0.1,
             max_tokens=6000,
             timeout=30,
-            max_retries=2
+            # The gateway owns retries so they respect the shared rate limit.
+            max_retries=0 if gateway is not None else 2
         )
         self.output_parser = StrOutputParser()
         self._build_prompt_templates()
 
     def _build_prompt_templates(self):
         self.code_analysis_prompt_fast = ChatPromptTemplate.from_template("""
-You are a coding assistant. Analyze the given code briefly.
+You are a coding assistant. Review the given code briefly.
 
 PROBLEM: {problem_name}
 CODE:
@@ -34,14 +115,12 @@ CODE:
 INSIGHTS:
 {analysis}
 
-Respond with:
-- ✅ Summary
-- ⚠️ Major issues (if any)
-- 💡 Quick tip
+{depth}
+{format_instructions}
 """)
 
         self.code_analysis_prompt_balanced = ChatPromptTemplate.from_template("""
-You are an experienced coding mentor.
+You are an experienced coding mentor. Review the given code.
 
 PROBLEM: {problem_name}
 CODE:
@@ -49,14 +128,12 @@ CODE:
 INSIGHTS:
 {analysis}
 
-Please respond with:
-## Strengths
-## Improvements
-## Time & Space Complexity
+{depth}
+{format_instructions}
 """)
 
         self.code_analysis_prompt_detailed = ChatPromptTemplate.from_template("""
-You are a senior algorithm coach.
+You are a senior algorithm coach. Review the given code in depth.
 
 PROBLEM: {problem_name}
 CODE:
@@ -64,82 +141,221 @@ CODE:
 INSIGHTS:
 {analysis}
 
-Respond with:
-## 🧠 Category & Difficulty
-## 🎯 Strengths
-## 🔧 Areas for Improvement
-## 📊 Complexity
-## 📚 Resources
-## 🎯 Next Challenge
+{depth}
+{format_instructions}
 """)
 
         self.pattern_recognition_prompt = ChatPromptTemplate.from_template("""
 You are an expert in algorithmic design patterns.
 
-TASK: Given the code and identified algorithmic patterns, give an in-depth breakdown.
+TASK: Given the code and identified algorithmic patterns, give an in-depth breakdown: the primary pattern and how \
+it is applied, a 1-10 rating of how well it is implemented (mention critical flaws in the explanation), better or \
+alternative patterns, pattern-specific optimizations and 2-3 LeetCode problems that use the same pattern.
 
 CODE:
 {code}
 
 PATTERNS DETECTED: {detected_patterns}
+{format_instructions}
+""")
 
-Respond with:
+        self.combined_analysis_prompt = ChatPromptTemplate.from_template("""
+You are an experienced coding mentor and an expert in algorithmic design patterns.
 
-### 🧠 1. Primary Pattern Used
-Explain what algorithmic pattern is implemented, and how it's applied in the code.
+PROBLEM: {problem_name}
+CODE:
+{code}
+INSIGHTS:
+{analysis}
+PATTERNS DETECTED: {detected_patterns}
 
-### 🧪 2. Pattern Usage Quality (1-10)
-Rate the clarity, correctness, and structure of implementation. Mention any critical flaws.
+Review the code as "feedback" ({depth}) and break down its algorithmic patterns as "patterns".
+{format_instructions}
+""")
 
-### 🔁 3. Alternative Patterns
-Suggest any better or alternate patterns, if applicable.
+        self.learning_path_prompt = ChatPromptTemplate.from_template("""
+You are a coding mentor.
 
-### 🚀 4. Pattern-Specific Optimizations
-Recommend improvements specific to the pattern used.
+STUDENT PROFILE:
+- Problems solved: {problems_solved}
+- Strong areas: {strong_areas}
+- Weak areas: {weak_areas}
+- Recurring feedback on their code: {recurring_feedback}
+- Goal: {goal}
+- Daily study time: {time_per_day} minutes
 
-### 🔗 5. Related LeetCode Problems
-List 2-3 LeetCode problems that use the same pattern with clickable links.
-""")
+RECENT PROBLEMS ATTEMPTED:
+{recent_problems}
 
-    def analyze_code_with_ai(self, code: str, problem_name: str, analysis: Dict) -> str:
-        try:
-            prompt = {
-                "fast": self.code_analysis_prompt_fast,
-                "detailed": self.code_analysis_prompt_detailed
-            }.get(self.analysis_mode, self.code_analysis_prompt_balanced)
+Please generate a 7-day personalized study plan:
+- Focus topics per day
+- 2-3 LeetCode problems with links
+- Key tips or concepts for each day
 
-            chain = prompt | self.llm | self.output_parser
-            formatted = json.dumps(analysis, indent=2) if isinstance(analysis, dict) else str(analysis)
-            return chain.invoke({
-                "code": code.strip(),
-                "problem_name": problem_name.strip(),
-                "analysis": formatted
-            })
+Format it clearly using markdown. Use real LeetCode problem links.
+""")
 
+    def _code_analysis_prompt(self):
+        return {
+            "fast": self.code_analysis_prompt_fast,
+            "detailed": self.code_analysis_prompt_detailed
+        }.get(self.analysis_mode, self.code_analysis_prompt_balanced)
+
+    def _structured_llm(self, schema):
+        # Same binding with_structured_output(method="json_schema") uses, minus its Pydantic parser, so partial
+        # objects can be streamed and validated once complete. Other chat models get the schema in the prompt.
+        if isinstance(self.llm, ChatGoogleGenerativeAI):
+            return self.llm.bind(response_mime_type="application/json",
+                                 response_json_schema=schema.model_json_schema()), ""
+        return self.llm, PydanticOutputParser(pydantic_object=schema).get_format_instructions()
+
+    def _invoke(self, prompt, inputs: Dict, schema: Optional[type] = None):
+        if schema is None:
+            chain = prompt | self.llm | self.output_parser
+        else:
+            chain = prompt | self._structured_llm(schema)[0] | JsonOutputParser()
+        if self.gateway is None:
+            result = chain.invoke(inputs)
+        else:
+            result = self.gateway.invoke(chain, inputs, prompt.format(**inputs))
+        return result if schema is None else schema.model_validate(result).model_dump()
+
+    def _stream(self, prompt, inputs: Dict, schema: Optional[type] = None) -> Iterator[Any]:
+        if schema is None:
+            chain = prompt | self.llm | self.output_parser
+        else:
+            chain = prompt | self._structured_llm(schema)[0] | JsonOutputParser()
+        chunks = chain.stream(inputs) if self.gateway is None else \
+            self.gateway.stream(chain, inputs, prompt.format(**inputs))
+        return chunks if schema is None else self._validated(chunks, schema)
+
+    @staticmethod
+    def _validated(chunks: Iterable[Dict], schema) -> Iterator[Dict]:
+        final = None
+        for partial in chunks:
+            final = partial
+            yield partial
+        yield schema.model_validate(final or {}).model_dump()
+
+    def _semantic_lookup(self, stage: str, code: str, problem_name: str = "", mode: str = "",
+                         version: str = "") -> Optional[SemanticHit]:
+        if self.semantic_cache is None:
+            return None
+        try:
+            hit = self.semantic_cache.lookup(stage, code, problem_name, mode, f"{PROMPT_VERSION}:{version}")
+        except Exception:
+            logger.exception("Semantic cache lookup failed")
+            return None
+        if hit is not None:
+            logger.info("Semantic cache hit for %s (similarity %.3f, ~%d tokens saved)",
+                        stage, hit.similarity, hit.tokens)
+        return hit
+
+    def _semantic_store(self, stage: str, code: str, response: Any, prompt, inputs: Dict, problem_name: str = "",
+                        mode: str = "", version: str = ""):
+        if self.semantic_cache is None:
+            return
+        try:
+            text = response if isinstance(response, str) else json.dumps(response, ensure_ascii=False)
+            tokens = estimate_tokens(prompt.format(**inputs)) + estimate_tokens(text)
+            self.semantic_cache.add(stage, code, response, tokens, problem_name, mode, f"{PROMPT_VERSION}:{version}")
+        except Exception:
+            logger.exception("Semantic cache store failed")
+
+    @staticmethod
+    def _log_compaction(label: str, prompt, inputs: Dict, original: Dict):
+        before = estimate_tokens(prompt.format(**{**inputs, **original}))
+        after = estimate_tokens(prompt.format(**inputs))
+        logger.info("%s prompt: ~%d -> ~%d tokens (%.0f%% smaller)", label, before, after,
+                    100 * (before - after) / before if before else 0)
+
+    def _code_analysis_inputs(self, code: str, problem_name: str, analysis: Dict, prompt=None,
+                              label: str = "code analysis", schema=CodeFeedback, **extra) -> Dict:
+        language = analysis.get("language") if isinstance(analysis, dict) else None
+        inputs = {
+            "code": compact_code(code, language=language),
+            "problem_name": problem_name.strip(),
+            "analysis": compact_analysis(analysis),
+            "depth": FEEDBACK_DEPTH.get(self.analysis_mode, FEEDBACK_DEPTH["balanced"]),
+            "format_instructions": self._structured_llm(schema)[1],
+            **extra
+        }
+        prompt = prompt or self._code_analysis_prompt()
+        self._log_compaction(label, prompt, inputs, {
+            "code": code.strip(),
+            "analysis": json.dumps(analysis, indent=2) if isinstance(analysis, dict) else str(analysis)
+        })
+        return inputs
+
+    def analyze_code_with_ai(self, code: str, problem_name: str, analysis: Dict) -> Union[Dict, str]:
+        hit = self._semantic_lookup("feedback", code, problem_name, self.analysis_mode)
+        if hit is not None:
+            return hit.value
+        try:
+            inputs = self._code_analysis_inputs(code, problem_name, analysis)
+            response = self._invoke(self._code_analysis_prompt(), inputs, CodeFeedback)
         except Exception as e:
-            return f"""## ❌ AI Analysis Failed
-**Error:** {str(e)}
-"""
-
-    def identify_code_patterns(self, code: str, detected_patterns: List[str]) -> str:
+            return ANALYSIS_ERROR_TEMPLATE.format(error=e)
+        self._semantic_store("feedback", code, response, self._code_analysis_prompt(), inputs, problem_name,
+                             self.analysis_mode)
+        return response
+
+    def stream_code_analysis(self, code: str, problem_name: str, analysis: Dict) -> TimedStream:
+        hit = self._semantic_lookup("feedback", code, problem_name, self.analysis_mode)
+        if hit is not None:
+            return TimedStream([hit.value], "code analysis (cached)", ANALYSIS_ERROR_TEMPLATE, hit=hit)
+        inputs = self._code_analysis_inputs(code, problem_name, analysis)
+        return TimedStream(self._stream(self._code_analysis_prompt(), inputs, CodeFeedback), "code analysis",
+                           ANALYSIS_ERROR_TEMPLATE, on_complete=lambda response: self._semantic_store(
+                               "feedback", code, response, self._code_analysis_prompt(), inputs, problem_name,
+                               self.analysis_mode))
+
+    def identify_code_patterns(self, code: str, detected_patterns: List[str]) -> Union[Dict, str]:
         try:
             if not detected_patterns:
                 return "No known patterns were detected. This may be a custom or unique implementation."
 
-            chain = self.pattern_recognition_prompt | self.llm | self.output_parser
-            response = chain.invoke({
-                "code": code.strip(),
-                "detected_patterns": ", ".join(detected_patterns)
-            })
-
-            if not response or len(response.strip()) < 200:
-                return self._fallback_pattern_output(detected_patterns,error=None)
-
+            version = ",".join(detected_patterns)
+            hit = self._semantic_lookup("patterns", code, version=version)
+            if hit is not None:
+                return hit.value
+
+            inputs = {
+                "code": compact_code(code),
+                "detected_patterns": ", ".join(detected_patterns),
+                "format_instructions": self._structured_llm(PatternAnalysis)[1]
+            }
+            self._log_compaction("pattern", self.pattern_recognition_prompt, inputs, {"code": code.strip()})
+            response = self._invoke(self.pattern_recognition_prompt, inputs, PatternAnalysis)
+
+            self._semantic_store("patterns", code, response, self.pattern_recognition_prompt, inputs,
+                                 version=version)
             return response
 
         except Exception as e:
             return self._fallback_pattern_output(detected_patterns, error=str(e))
 
+    def analyze_code_combined(self, code: str, problem_name: str, analysis: Dict,
+                              detected_patterns: List[str]) -> Dict[str, Any]:
+        version = ",".join(detected_patterns)
+        hit = self._semantic_lookup("combined", code, problem_name, self.analysis_mode, version)
+        if hit is not None:
+            return hit.value
+        prompt = self.combined_analysis_prompt
+        try:
+            inputs = self._code_analysis_inputs(code, problem_name, analysis, prompt, "combined analysis",
+                                                schema=CombinedAnalysis,
+                                                detected_patterns=", ".join(detected_patterns) or "None")
+            response = self._invoke(prompt, inputs, CombinedAnalysis)
+        except Exception as e:
+            return {
+                "feedback": ANALYSIS_ERROR_TEMPLATE.format(error=e),
+                "patterns": self._fallback_pattern_output(detected_patterns, error=str(e)),
+                "error": str(e),
+            }
+        self._semantic_store("combined", code, response, prompt, inputs, problem_name, self.analysis_mode, version)
+        return response
+
     def _fallback_pattern_output(self, patterns: List[str], error: Optional[str] = None) -> str:
         return f"""
 ## 🔍 Pattern Analysis (Fallback)
@@ -158,51 +374,30 @@ The system was unable to generate a full AI response.
 You can retry with a simpler version of your code for better results.
 """
 
-    def generate_learning_path(self, user_data: Dict) -> str:
-        learning_prompt = ChatPromptTemplate.from_template("""
-You are a coding mentor.
-
-STUDENT PROFILE:
-- Problems solved: {problems_solved}
-- Strong areas: {strong_areas}
-- Weak areas: {weak_areas}
-- Goal: {goal}
-- Daily study time: {time_per_day} minutes
-
-RECENT PROBLEMS ATTEMPTED:
-{recent_problems}
-
-Please generate a 7-day personalized study plan:
-- Focus topics per day
-- 2-3 LeetCode problems with links
-- Key tips or concepts for each day
-
-Format it clearly using markdown. Use real LeetCode problem links.
-""")
+    def _learning_path_inputs(self, user_data: Dict) -> Dict:
+        return {
+            "problems_solved": user_data.get("problems_solved", 0),
+            "strong_areas": ", ".join(user_data.get("strong_areas", [])) or "None",
+            "weak_areas": ", ".join(user_data.get("weak_areas", [])) or "Unknown",
+            "recurring_feedback": "; ".join(user_data.get("recurring_improvements", [])) or "None yet",
+            "goal": user_data.get("target_goal", "Improve coding interview skills"),
+            "time_per_day": user_data.get("time_per_day", 60),
+            "recent_problems": "\n".join(f"- {p.get('problem_name', 'Unknown')}" for p in user_data.get("recent_submissions", []))
+        }
 
+    def generate_learning_path(self, user_data: Dict) -> str:
         try:
-            chain = learning_prompt | self.llm | self.output_parser
-
-            result = chain.invoke({
-                "problems_solved": user_data.get("problems_solved", 0),
-                "strong_areas": ", ".join(user_data.get("strong_areas", [])) or "None",
-                "weak_areas": ", ".join(user_data.get("weak_areas", [])) or "Unknown",
-                "goal": user_data.get("target_goal", "Improve coding interview skills"),
-                "time_per_day": user_data.get("time_per_day", 60),
-                "recent_problems": "\n".join(f"- {p.get('problem_name', 'Unknown')}" for p in user_data.get("recent_submissions", []))
-            })
+            result = self._invoke(self.learning_path_prompt, self._learning_path_inputs(user_data))
 
             return result
 
         except Exception as e:
-            return f"""
-## ❌ Learning Path Generation Failed
-
-**Error:** {str(e)}
+            return LEARNING_PATH_ERROR_TEMPLATE.format(error=e)
 
-Please try again later or adjust the profile information.
-"""
+    def stream_learning_path(self, user_data: Dict) -> TimedStream:
+        return TimedStream(self._stream(self.learning_path_prompt, self._learning_path_inputs(user_data)),
+                           "learning path", LEARNING_PATH_ERROR_TEMPLATE)
 
 @st.cache_resource
 def get_langchain_gemini_client(analysis_mode: str = "balanced") -> LangChainGeminiClient:
-    return LangChainGeminiClient(analysis_mode)
+    return LangChainGeminiClient(analysis_mode, semantic_cache=get_semantic_cache(), gateway=get_llm_gateway())
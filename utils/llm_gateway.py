@@ -0,0 +1,248 @@
+import streamlit as st
+import asyncio
+import hashlib
+import logging
+import queue
+import random
+import re
+import threading
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, Optional
+
+from .config import get_float_setting
+
+REQUESTS_PER_MINUTE = 10
+TOKENS_PER_MINUTE = 250_000
+MAX_CONCURRENCY = 4
+MAX_RETRIES = 4
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 30.0
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+CHARS_PER_TOKEN = 4
+
+logger = logging.getLogger(__name__)
+
+_RETRY_HINT_RE = re.compile(r"retry(?:Delay)?[\"']?\s*(?:in|:)\s*[\"']?(\d+(?:\.\d+)?)s", re.IGNORECASE)
+_STATUS_RE = re.compile(r"\b(408|429|500|502|503|504)\b|RESOURCE_EXHAUSTED|UNAVAILABLE|DEADLINE_EXCEEDED")
+_DONE = object()
+
+def estimate_tokens(text: str) -> int:
+    return -(-len(text) // CHARS_PER_TOKEN) if text else 0
+
+def status_code_of(error: BaseException) -> Optional[int]:
+    # LangChain re-raises provider errors, so look through the cause chain for an HTTP status.
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        for attr in ("status_code", "code"):
+            value = getattr(error, attr, None)
+            if isinstance(value, int) and 100 <= value < 600:
+                return value
+        response = getattr(error, "response", None)
+        value = getattr(response, "status_code", None)
+        if isinstance(value, int):
+            return value
+        error = error.__cause__ or error.__context__
+    return None
+
+def is_retryable(error: BaseException) -> bool:
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    status = status_code_of(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    return bool(_STATUS_RE.search(str(error)))
+
+def is_rate_limited(error: BaseException) -> bool:
+    return status_code_of(error) == 429 or "RESOURCE_EXHAUSTED" in str(error)
+
+class TokenBucket:
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay_for(self, amount: float) -> float:
+        self._refill()
+        # Oversized requests wait for a full bucket instead of forever.
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def consume(self, amount: float):
+        # Output tokens are only known afterwards, so the level may go negative and delay later callers.
+        self._refill()
+        self.level -= amount
+
+class RateLimiter:
+    def __init__(self, requests_per_minute: float = REQUESTS_PER_MINUTE,
+                 tokens_per_minute: float = TOKENS_PER_MINUTE):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens: int):
+        # Held while waiting so callers are admitted in arrival order.
+        async with self._lock:
+            while True:
+                delay = max(self.blocked_until - time.monotonic(),
+                            self.requests.delay_for(1), self.tokens.delay_for(tokens))
+                if delay <= 0:
+                    break
+                await asyncio.sleep(delay)
+            self.requests.consume(1)
+            self.tokens.consume(tokens)
+
+    def record(self, tokens: int):
+        self.tokens.consume(tokens)
+
+    def pause(self, seconds: float):
+        # A 429 means the shared quota is gone, so every caller waits rather than retrying at once.
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+class LLMGateway:
+    def __init__(self, requests_per_minute: float = REQUESTS_PER_MINUTE,
+                 tokens_per_minute: float = TOKENS_PER_MINUTE, max_concurrency: int = MAX_CONCURRENCY,
+                 max_retries: int = MAX_RETRIES, backoff_base: float = BACKOFF_BASE,
+                 backoff_max: float = BACKOFF_MAX, seed: Optional[int] = None):
+        self.limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._random = random.Random(seed)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._stats = {'calls': 0, 'streams': 0, 'coalesced': 0, 'retries': 0, 'rate_limited': 0, 'failures': 0}
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name="llm-gateway", daemon=True)
+                self._thread.start()
+            return self._loop
+
+    def backoff(self, attempt: int, error: Optional[BaseException] = None) -> float:
+        # Full jitter keeps sessions that failed together from retrying together.
+        delay = self._random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        hint = _RETRY_HINT_RE.search(str(error)) if error is not None else None
+        return max(delay, min(float(hint.group(1)), self.backoff_max)) if hint else delay
+
+    async def _with_retries(self, call: Callable[[], Awaitable[Any]], tokens: int) -> Any:
+        attempt = 0
+        while True:
+            await self.limiter.acquire(tokens)
+            async with self._semaphore:
+                try:
+                    return await call()
+                except Exception as e:
+                    if attempt >= self.max_retries or not is_retryable(e):
+                        self._stats['failures'] += 1
+                        raise
+                    delay = self._retry_delay(attempt, e)
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    def _retry_delay(self, attempt: int, error: BaseException) -> float:
+        delay = self.backoff(attempt, error)
+        self._stats['retries'] += 1
+        if is_rate_limited(error):
+            self._stats['rate_limited'] += 1
+            self.limiter.pause(delay)
+        logger.warning("LLM call failed (%s), retry %d in %.1fs", error, attempt + 1, delay)
+        return delay
+
+    async def ainvoke(self, runnable, inputs: Dict, prompt: str = "") -> Any:
+        self._stats['calls'] += 1
+        key = hashlib.sha256(prompt.encode("utf-8")).hexdigest() if prompt else None
+        shared = self._inflight.get(key) if key else None
+        if shared is not None:
+            self._stats['coalesced'] += 1
+            return await asyncio.shield(shared)
+
+        async def call():
+            result = await self._with_retries(lambda: runnable.ainvoke(inputs), estimate_tokens(prompt))
+            self.limiter.record(estimate_tokens(result if isinstance(result, str) else str(result)))
+            return result
+
+        task = asyncio.ensure_future(call())
+        if key:
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shielded so one caller going away does not cancel the call the others are waiting on.
+        return await asyncio.shield(task)
+
+    async def astream(self, runnable, inputs: Dict, prompt: str = "") -> AsyncIterator[Any]:
+        self._stats['streams'] += 1
+        tokens = estimate_tokens(prompt)
+        attempt = 0
+        while True:
+            await self.limiter.acquire(tokens)
+            started = False
+            async with self._semaphore:
+                try:
+                    async for chunk in runnable.astream(inputs):
+                        started = True
+                        if isinstance(chunk, str):
+                            self.limiter.record(estimate_tokens(chunk))
+                        yield chunk
+                    return
+                except Exception as e:
+                    # Chunks already shown to the user cannot be taken back, so only retry before the first one.
+                    if started or attempt >= self.max_retries or not is_retryable(e):
+                        self._stats['failures'] += 1
+                        raise
+                    delay = self._retry_delay(attempt, e)
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    def invoke(self, runnable, inputs: Dict, prompt: str = "", timeout: Optional[float] = None) -> Any:
+        future = asyncio.run_coroutine_threadsafe(self.ainvoke(runnable, inputs, prompt), self._ensure_loop())
+        try:
+            return future.result(timeout)
+        finally:
+            future.cancel()
+
+    def stream(self, runnable, inputs: Dict, prompt: str = "") -> Iterator[Any]:
+        chunks: "queue.Queue" = queue.Queue()
+
+        async def pump():
+            error = None
+            try:
+                async for chunk in self.astream(runnable, inputs, prompt):
+                    chunks.put((chunk, None))
+            except Exception as e:
+                error = e
+            finally:
+                chunks.put((_DONE, error))
+
+        future = asyncio.run_coroutine_threadsafe(pump(), self._ensure_loop())
+        try:
+            while True:
+                chunk, error = chunks.get()
+                if chunk is _DONE:
+                    if error is not None:
+                        raise error
+                    return
+                yield chunk
+        finally:
+            future.cancel()
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self._stats)
+
+@st.cache_resource
+def get_llm_gateway() -> LLMGateway:
+    return LLMGateway(requests_per_minute=get_float_setting("LLM_REQUESTS_PER_MINUTE", REQUESTS_PER_MINUTE),
+                      tokens_per_minute=get_float_setting("LLM_TOKENS_PER_MINUTE", TOKENS_PER_MINUTE),
+                      max_concurrency=int(get_float_setting("LLM_MAX_CONCURRENCY", MAX_CONCURRENCY)),
+                      max_retries=int(get_float_setting("LLM_MAX_RETRIES", MAX_RETRIES)))
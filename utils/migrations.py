@@ -0,0 +1,192 @@
+import sqlite3
+from typing import Callable, List, Optional, Tuple, Union
+
+Migration = Tuple[int, str, Union[List[str], Callable[[sqlite3.Connection], None]]]
+
+def _create_user_stats_rollup(conn: sqlite3.Connection):
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS user_stats (
+        session_id TEXT PRIMARY KEY,
+        total_submissions INTEGER NOT NULL DEFAULT 0,
+        last_active_day TEXT,
+        current_streak INTEGER NOT NULL DEFAULT 0
+    )""")
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS user_activity (
+        session_id TEXT NOT NULL,
+        day TEXT NOT NULL,
+        submissions INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (session_id, day)
+    ) WITHOUT ROWID""")
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS user_difficulty_stats (
+        session_id TEXT NOT NULL,
+        difficulty TEXT NOT NULL,
+        entries INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (session_id, difficulty)
+    ) WITHOUT ROWID""")
+
+    conn.execute("""
+    INSERT OR REPLACE INTO user_activity (session_id, day, submissions)
+    SELECT session_id, date(submitted_at), COUNT(*)
+    FROM submissions
+    WHERE session_id IS NOT NULL AND date(submitted_at) IS NOT NULL
+    GROUP BY session_id, date(submitted_at)""")
+    conn.execute("""
+    INSERT OR REPLACE INTO user_difficulty_stats (session_id, difficulty, entries)
+    SELECT session_id, difficulty, COUNT(*)
+    FROM progress
+    WHERE session_id IS NOT NULL AND difficulty IS NOT NULL
+    GROUP BY session_id, difficulty""")
+    conn.execute("""
+    INSERT OR REPLACE INTO user_stats (session_id, total_submissions, last_active_day, current_streak)
+    WITH islands AS (
+        SELECT session_id, day,
+               julianday(day) - ROW_NUMBER() OVER (PARTITION BY session_id ORDER BY day) AS island
+        FROM user_activity
+    ),
+    last_island AS (
+        SELECT session_id, MAX(day) AS last_day, COUNT(*) AS streak
+        FROM islands
+        GROUP BY session_id, island
+    )
+    SELECT a.session_id, a.total, a.last_day, l.streak
+    FROM (SELECT session_id, SUM(submissions) AS total, MAX(day) AS last_day
+          FROM user_activity GROUP BY session_id) a
+    JOIN last_island l ON l.session_id = a.session_id AND l.last_day = a.last_day""")
+    conn.execute("""
+    INSERT OR IGNORE INTO user_stats (session_id)
+    SELECT DISTINCT session_id FROM user_difficulty_stats""")
+
+MIGRATIONS: List[Migration] = [
+    (1, "initial schema", [
+        """
+        CREATE TABLE IF NOT EXISTS user_sessions (
+            session_id TEXT PRIMARY KEY,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            user_data TEXT
+        )""",
+        """
+        CREATE TABLE IF NOT EXISTS submissions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT,
+            problem_name TEXT,
+            code TEXT,
+            analysis TEXT,
+            feedback TEXT,
+            submitted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )""",
+        """
+        CREATE TABLE IF NOT EXISTS progress (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT,
+            topic TEXT,
+            difficulty TEXT,
+            success_rate REAL,
+            problems_solved INTEGER,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )""",
+        """
+        CREATE TABLE IF NOT EXISTS learning_plans (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT,
+            plan_text TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )""",
+    ]),
+    (2, "session lookup indexes", [
+        "CREATE INDEX IF NOT EXISTS idx_submissions_session_submitted ON submissions (session_id, submitted_at)",
+        "CREATE INDEX IF NOT EXISTS idx_progress_session_topic_difficulty ON progress (session_id, topic, difficulty)",
+        "CREATE INDEX IF NOT EXISTS idx_progress_session_updated ON progress (session_id, updated_at)",
+        "CREATE INDEX IF NOT EXISTS idx_learning_plans_session_created ON learning_plans (session_id, created_at)",
+        "ANALYZE",
+    ]),
+    (3, "user statistics rollup", _create_user_stats_rollup),
+    (4, "analysis result cache", [
+        """
+        CREATE TABLE IF NOT EXISTS analysis_cache (
+            key TEXT PRIMARY KEY,
+            stage TEXT NOT NULL,
+            value TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            last_used REAL NOT NULL,
+            hits INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID""",
+        "CREATE INDEX IF NOT EXISTS idx_analysis_cache_last_used ON analysis_cache (last_used)",
+        "CREATE INDEX IF NOT EXISTS idx_analysis_cache_created ON analysis_cache (created_at)",
+    ]),
+    (5, "semantic response cache", [
+        """
+        CREATE TABLE IF NOT EXISTS semantic_cache (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            scope TEXT NOT NULL,
+            stage TEXT NOT NULL,
+            vector BLOB NOT NULL,
+            value TEXT NOT NULL,
+            tokens INTEGER NOT NULL DEFAULT 0,
+            created_at REAL NOT NULL,
+            last_used REAL NOT NULL,
+            hits INTEGER NOT NULL DEFAULT 0
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_semantic_cache_scope_created ON semantic_cache (scope, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_semantic_cache_last_used ON semantic_cache (last_used)",
+    ]),
+    (6, "structured AI feedback", [
+        "ALTER TABLE submissions ADD COLUMN category TEXT",
+        "ALTER TABLE submissions ADD COLUMN difficulty TEXT",
+        "ALTER TABLE submissions ADD COLUMN time_complexity TEXT",
+        "ALTER TABLE submissions ADD COLUMN space_complexity TEXT",
+        "ALTER TABLE submissions ADD COLUMN primary_pattern TEXT",
+        "ALTER TABLE submissions ADD COLUMN usage_quality INTEGER",
+        """
+        CREATE TABLE IF NOT EXISTS submission_insights (
+            submission_id INTEGER NOT NULL,
+            kind TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            text TEXT NOT NULL,
+            url TEXT,
+            PRIMARY KEY (submission_id, kind, position)
+        ) WITHOUT ROWID""",
+        "CREATE INDEX IF NOT EXISTS idx_submission_insights_kind_text ON submission_insights (kind, text)",
+        "CREATE INDEX IF NOT EXISTS idx_submissions_session_category ON submissions (session_id, category)",
+        "CREATE INDEX IF NOT EXISTS idx_submissions_session_difficulty ON submissions (session_id, difficulty)",
+    ]),
+    (7, "semantic cache structure signatures", [
+        "ALTER TABLE semantic_cache ADD COLUMN signature TEXT",
+    ]),
+]
+
+def _ensure_version_table(conn: sqlite3.Connection):
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        description TEXT,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""")
+
+def current_version(conn: sqlite3.Connection) -> int:
+    _ensure_version_table(conn)
+    row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return row[0] or 0
+
+def migrate(conn: sqlite3.Connection, target: Optional[int] = None) -> List[int]:
+    applied = []
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        version = current_version(conn)
+        for number, description, steps in sorted(MIGRATIONS, key=lambda m: m[0]):
+            if number <= version or (target is not None and number > target):
+                continue
+            if callable(steps):
+                steps(conn)
+            else:
+                for statement in steps:
+                    conn.execute(statement)
+            conn.execute("INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                         (number, description))
+            applied.append(number)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return applied
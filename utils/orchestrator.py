@@ -0,0 +1,109 @@
+import threading
+import time
+import logging
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional
+
+STAGE_TIMEOUT = 60.0
+MAX_WORKERS = 8
+
+logger = logging.getLogger(__name__)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+def get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # Shared across reruns so a timed-out stage never blocks the next script run on shutdown.
+            _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="analysis-stage")
+        return _executor
+
+class Stage:
+    def __init__(self, name: str, func: Callable[[], Any], timeout: float = STAGE_TIMEOUT):
+        self.name = name
+        self.func = func
+        self.timeout = timeout
+
+class StageResult:
+    def __init__(self, name: str, status: str, value: Any = None, error: Optional[BaseException] = None,
+                 elapsed: float = 0.0):
+        self.name = name
+        self.status = status
+        self.value = value
+        self.error = error
+        self.elapsed = elapsed
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "done"
+
+class StageOrchestrator:
+    def __init__(self, executor: Optional[ThreadPoolExecutor] = None):
+        self.executor = executor or get_executor()
+        self.results: Dict[str, StageResult] = {}
+        self._futures: Dict[Future, Stage] = {}
+        self._deadlines: Dict[Future, float] = {}
+        self._pending: set = set()
+        self._started = 0.0
+
+    def start(self, stages: List[Stage]):
+        self._started = time.monotonic()
+        self.results = {}
+        self._futures = {self.executor.submit(stage.func): stage for stage in stages}
+        self._deadlines = {future: self._started + stage.timeout for future, stage in self._futures.items()}
+        self._pending = set(self._futures)
+
+    def cancel(self):
+        for future in self._pending:
+            future.cancel()
+
+    @property
+    def pending(self) -> bool:
+        return bool(self._pending)
+
+    def poll(self, on_complete: Optional[Callable[[StageResult], None]] = None,
+             timeout: float = 0.0) -> Dict[str, StageResult]:
+        # Returns every stage finished so far, keyed by name; check `pending` for whether any are still running.
+        if not self._pending:
+            return self.results
+        timeout = min(timeout, max(0.0, min(self._deadlines[f] for f in self._pending) - time.monotonic()))
+        done, self._pending = wait(self._pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        for future in done:
+            stage = self._futures[future]
+            elapsed = time.monotonic() - self._started
+            error = future.exception()
+            if error is None:
+                self._finish(StageResult(stage.name, "done", future.result(), elapsed=elapsed), on_complete)
+            else:
+                self._finish(StageResult(stage.name, "failed", error=error, elapsed=elapsed), on_complete)
+        now = time.monotonic()
+        for future in [f for f in self._pending if self._deadlines[f] <= now]:
+            self._pending.discard(future)
+            stage = self._futures[future]
+            # A running call cannot be interrupted; its late result is simply discarded.
+            status = "cancelled" if future.cancel() else "timeout"
+            self._finish(StageResult(stage.name, status, error=TimeoutError(
+                f"{stage.name} did not finish within {stage.timeout:.0f}s"), elapsed=now - self._started), on_complete)
+        return self.results
+
+    def wait(self, on_complete: Optional[Callable[[StageResult], None]] = None) -> Dict[str, StageResult]:
+        try:
+            while self.pending:
+                self.poll(on_complete, timeout=float("inf"))
+        finally:
+            # Streamlit stops a rerun by raising in the script thread; drop any stage that has not started.
+            self.cancel()
+        return self.results
+
+    def run(self, stages: List[Stage],
+            on_complete: Optional[Callable[[StageResult], None]] = None) -> Dict[str, StageResult]:
+        self.start(stages)
+        return self.wait(on_complete)
+
+    def _finish(self, result: StageResult, on_complete: Optional[Callable[[StageResult], None]]):
+        self.results[result.name] = result
+        logger.info("Stage %s %s in %.2fs", result.name, result.status, result.elapsed)
+        if on_complete is not None:
+            on_complete(result)
@@ -0,0 +1,169 @@
+import streamlit as st
+import json
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+from .problem_store import get_problem_store
+
+CATALOG_PATH = Path("data/patterns/leetcode_problems.json")
+PROBLEM_URL = "https://leetcode.com/problems/{slug}/"
+_PUNCTUATION_RE = re.compile(r"[\W_]+")
+
+CATEGORY_TAGS = {
+    "Array/String Manipulation": ["array", "string", "hash table"],
+    "Linked Lists": ["linked list"],
+    "Trees & Graphs": ["tree", "graph", "depth-first search", "breadth-first search"],
+    "Dynamic Programming": ["dynamic programming"],
+    "Sorting & Searching": ["sorting", "binary search"],
+    "Two Pointers": ["two pointers"],
+    "Sliding Window": ["sliding window"],
+    "Backtracking": ["backtracking"],
+    "Greedy Algorithms": ["greedy"],
+    "Divide & Conquer": ["divide and conquer"]
+}
+# Synced problems carry tags but no category; the most specific matching category wins.
+CATEGORY_PRIORITY = ["Sliding Window", "Two Pointers", "Backtracking", "Dynamic Programming", "Greedy Algorithms",
+                     "Divide & Conquer", "Linked Lists", "Trees & Graphs", "Sorting & Searching",
+                     "Array/String Manipulation"]
+
+class Problem:
+    __slots__ = ("id", "title", "slug", "difficulty", "category", "tags")
+
+    def __init__(self, id: str, title: str, slug: str, difficulty: str, category: str, tags: Iterable[str]):
+        self.id = id
+        self.title = title
+        self.slug = slug
+        self.difficulty = difficulty
+        self.category = category
+        self.tags = tuple(tags)
+
+    @property
+    def url(self) -> str:
+        return PROBLEM_URL.format(slug=self.slug)
+
+    def to_dict(self) -> Dict:
+        return {"id": self.id, "title": self.title, "slug": self.slug, "difficulty": self.difficulty,
+                "category": self.category, "tags": list(self.tags), "url": self.url}
+
+def _slugify(title: str) -> str:
+    return "-".join("".join(c if c.isalnum() else " " for c in title.lower()).split())
+
+@lru_cache(maxsize=8192)
+def _title_key(title: str) -> str:
+    return _PUNCTUATION_RE.sub("", title.lower())
+
+def category_for_tags(tags: Iterable[str]) -> str:
+    tags = {tag.lower() for tag in tags}
+    return next((category for category in CATEGORY_PRIORITY if tags.intersection(CATEGORY_TAGS[category])), "")
+
+class ProblemCatalog:
+    def __init__(self, problems: Iterable[Dict]):
+        self.problems: List[Problem] = []
+        self._by_id: Dict[str, int] = {}
+        self._by_slug: Dict[str, int] = {}
+        self._by_title: Dict[str, int] = {}
+        self._by_tag: Dict[str, List[int]] = {}
+        self._by_category: Dict[str, List[int]] = {}
+        self._by_difficulty: Dict[str, List[int]] = {}
+        for raw in problems:
+            self.add(raw)
+
+    @classmethod
+    def from_file(cls, path: Path = CATALOG_PATH) -> "ProblemCatalog":
+        return cls(json.loads(Path(path).read_text(encoding="utf-8")))
+
+    def add(self, raw: Dict):
+        problem_id = str(raw["id"])
+        slug = raw.get("slug") or _slugify(raw["title"])
+        if problem_id in self._by_id or slug in self._by_slug:
+            return
+        tags = [tag.lower() for tag in raw.get("tags", [])]
+        problem = Problem(problem_id, raw["title"], slug, raw.get("difficulty") or "Medium",
+                          raw.get("category") or category_for_tags(tags), tags)
+        position = len(self.problems)
+        self.problems.append(problem)
+        self._by_id[problem_id] = position
+        self._by_slug[slug] = position
+        self._by_title.setdefault(_title_key(problem.title), position)
+        for tag in problem.tags:
+            self._by_tag.setdefault(tag, []).append(position)
+        self._by_category.setdefault(problem.category.lower(), []).append(position)
+        self._by_difficulty.setdefault(problem.difficulty.lower(), []).append(position)
+
+    def __len__(self) -> int:
+        return len(self.problems)
+
+    @property
+    def categories(self) -> List[str]:
+        return sorted({problem.category for problem in self.problems if problem.category})
+
+    def get(self, problem_id: str) -> Optional[Dict]:
+        position = self._by_id.get(str(problem_id))
+        return self.problems[position].to_dict() if position is not None else None
+
+    def by_slug(self, slug: str) -> Optional[Dict]:
+        position = self._by_slug.get(slug)
+        return self.problems[position].to_dict() if position is not None else None
+
+    def lookup(self, names: Iterable[str]) -> Set[int]:
+        # Submissions record whatever the user typed, so accept titles in any case or punctuation, slugs and ids.
+        positions = set()
+        for name in names:
+            name = str(name).strip()
+            position = self._by_title.get(_title_key(name), self._by_slug.get(name.lower(), self._by_id.get(name)))
+            if position is not None:
+                positions.add(position)
+        return positions
+
+    def _with_tags(self, tags: Iterable[str]) -> Set[int]:
+        positions = set()
+        for tag in tags:
+            positions.update(self._by_tag.get(tag.lower(), ()))
+        return positions
+
+    def positions(self, category: Optional[str] = None, tags: Optional[Iterable[str]] = None,
+                  difficulty: Optional[str] = None) -> List[int]:
+        # Each filter is one index lookup; the result is their intersection in catalog order.
+        selected: Optional[Set[int]] = None
+        for positions in (set(self._by_category.get(category.lower(), ())) if category else None,
+                          self._with_tags(tags) if tags is not None else None,
+                          set(self._by_difficulty.get(difficulty.lower(), ())) if difficulty else None):
+            if positions is not None:
+                selected = positions if selected is None else selected & positions
+        return sorted(selected) if selected is not None else list(range(len(self.problems)))
+
+    def find(self, category: Optional[str] = None, tags: Optional[Iterable[str]] = None,
+             difficulty: Optional[str] = None, limit: Optional[int] = None) -> List[Dict]:
+        positions = self.positions(category, tags, difficulty)
+        return [self.problems[i].to_dict() for i in positions[:limit]]
+
+    def matching(self, areas: Iterable[str], difficulty: Optional[str] = None) -> List[int]:
+        # Areas may be category names ("Two Pointers") or raw tags ("two pointers"); match either.
+        positions: Set[int] = set()
+        for area in areas:
+            positions.update(self._by_category.get(area.lower(), ()))
+            positions.update(self._with_tags(CATEGORY_TAGS.get(area, [area])))
+        if difficulty:
+            positions &= set(self._by_difficulty.get(difficulty.lower(), ()))
+        return sorted(positions)
+
+    def by_category(self, category: str, difficulty: Optional[str] = None,
+                    limit: Optional[int] = None) -> List[Dict]:
+        positions = self.positions(category=category, difficulty=difficulty)
+        if not positions:
+            positions = self.matching([category], difficulty)
+        return [self.problems[i].to_dict() for i in positions[:limit]]
+
+    def all(self) -> List[Dict]:
+        return [problem.to_dict() for problem in self.problems]
+
+@st.cache_resource
+def get_problem_catalog() -> ProblemCatalog:
+    catalog = ProblemCatalog.from_file()
+    # Curated entries come first; anything `python -m utils.catalog_sync` stored locally fills in the rest.
+    for problem in get_problem_store().problems():
+        if problem["id"] and not problem["paid_only"]:
+            catalog.add(problem)
+    return catalog
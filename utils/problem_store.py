@@ -0,0 +1,259 @@
+import streamlit as st
+import difflib
+import html
+import json
+import math
+import re
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+STORE_PATH = Path("data/leetcode.db")
+SEARCH_LIMIT = 20
+# Each tier is only searched when the ones before it match nothing; ranking every description hit is what costs
+# time. Titles outweigh tags within the second tier.
+SEARCH_TIERS = (("problem_search", "{title} : ", "10.0, 4.0"), ("problem_search", "", "10.0, 4.0"),
+                ("problem_text", "", "1.0"))
+FUZZY_CUTOFF = 0.75
+FUZZY_CANDIDATES = 3
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_WORD_RE = re.compile(r"\w+")
+
+def _description(detail: Dict[str, Any]) -> str:
+    text = detail.get("content") or detail.get("description") or ""
+    return " ".join(html.unescape(_TAG_RE.sub(" ", text)).split()) if isinstance(text, str) else ""
+
+class ProblemStore:
+    def __init__(self, path: Path = STORE_PATH):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, timeout=10.0)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.execute("""
+        CREATE TABLE IF NOT EXISTS http_cache (
+            url TEXT PRIMARY KEY,
+            etag TEXT,
+            last_modified TEXT,
+            body TEXT NOT NULL,
+            fetched_at REAL NOT NULL
+        ) WITHOUT ROWID""")
+        self._conn.execute("""
+        CREATE TABLE IF NOT EXISTS problems (
+            slug TEXT PRIMARY KEY,
+            id TEXT,
+            title TEXT NOT NULL,
+            difficulty TEXT,
+            tags TEXT NOT NULL DEFAULT '[]',
+            paid_only INTEGER NOT NULL DEFAULT 0,
+            detail TEXT,
+            updated_at REAL NOT NULL,
+            detail_fetched_at REAL,
+            description TEXT NOT NULL DEFAULT ''
+        )""")
+        if "description" not in {row[1] for row in self._conn.execute("PRAGMA table_info(problems)")}:
+            self._conn.execute("ALTER TABLE problems ADD COLUMN description TEXT NOT NULL DEFAULT ''")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_problems_id ON problems (id)")
+        self._create_search_index()
+        self._conn.commit()
+        self._vocabulary: Optional[Dict[Tuple[str, int], List[str]]] = None
+
+    def _create_search_index(self):
+        # Two external-content FTS5 tables over problems, kept in sync by triggers. Titles and tags get their own
+        # small index so the common lookups never touch the much larger description postings.
+        created = []
+        for table, columns in (("problem_search", "title, tags"), ("problem_text", "description")):
+            if self._conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (table,)).fetchone() is None:
+                created.append(table)
+            self._conn.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5(
+                {columns},
+                content = 'problems', content_rowid = 'rowid',
+                tokenize = 'porter unicode61 remove_diacritics 2', prefix = '2 3'
+            )""")
+        self._conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS problems_search_insert AFTER INSERT ON problems BEGIN
+            INSERT INTO problem_search (rowid, title, tags) VALUES (new.rowid, new.title, new.tags);
+            INSERT INTO problem_text (rowid, description) VALUES (new.rowid, new.description);
+        END""")
+        self._conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS problems_search_delete AFTER DELETE ON problems BEGIN
+            INSERT INTO problem_search (problem_search, rowid, title, tags) VALUES ('delete', old.rowid, old.title, old.tags);
+            INSERT INTO problem_text (problem_text, rowid, description) VALUES ('delete', old.rowid, old.description);
+        END""")
+        self._conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS problems_search_update AFTER UPDATE OF title, tags ON problems BEGIN
+            INSERT INTO problem_search (problem_search, rowid, title, tags) VALUES ('delete', old.rowid, old.title, old.tags);
+            INSERT INTO problem_search (rowid, title, tags) VALUES (new.rowid, new.title, new.tags);
+        END""")
+        self._conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS problems_text_update AFTER UPDATE OF description ON problems BEGIN
+            INSERT INTO problem_text (problem_text, rowid, description) VALUES ('delete', old.rowid, old.description);
+            INSERT INTO problem_text (rowid, description) VALUES (new.rowid, new.description);
+        END""")
+        self._conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS problem_terms USING fts5vocab(problem_search, 'row')")
+        for table in created:
+            self._conn.execute(f"INSERT INTO {table} ({table}) VALUES ('rebuild')")
+
+    def validators(self, url: str) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+        with self._lock:
+            row = self._conn.execute("SELECT etag, last_modified, body FROM http_cache WHERE url = ?",
+                                     (url,)).fetchone()
+        return row if row is not None else (None, None, None)
+
+    def save_response(self, url: str, etag: Optional[str], last_modified: Optional[str], body: str):
+        with self._lock:
+            self._conn.execute("""
+            INSERT INTO http_cache (url, etag, last_modified, body, fetched_at) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (url) DO UPDATE SET etag = excluded.etag, last_modified = excluded.last_modified,
+                                            body = excluded.body, fetched_at = excluded.fetched_at""",
+                               (url, etag, last_modified, body, time.time()))
+            self._conn.commit()
+
+    def touch(self, url: str):
+        with self._lock:
+            self._conn.execute("UPDATE http_cache SET fetched_at = ? WHERE url = ?", (time.time(), url))
+            self._conn.commit()
+
+    def upsert_problems(self, problems: List[Dict[str, Any]]) -> int:
+        now = time.time()
+        with self._lock:
+            # Keeps any fetched detail; only the listing fields are refreshed.
+            self._conn.executemany("""
+            INSERT INTO problems (slug, id, title, difficulty, tags, paid_only, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (slug) DO UPDATE SET id = excluded.id, title = excluded.title,
+                difficulty = excluded.difficulty, tags = excluded.tags, paid_only = excluded.paid_only,
+                updated_at = excluded.updated_at""",
+                                   [(p["slug"], p.get("id"), p["title"], p.get("difficulty"),
+                                     json.dumps(p.get("tags", [])), int(bool(p.get("paid_only"))), now)
+                                    for p in problems])
+            self._conn.commit()
+            self._vocabulary = None
+        return len(problems)
+
+    def save_detail(self, slug: str, detail: Dict[str, Any]):
+        with self._lock:
+            self._conn.execute("""
+            UPDATE problems SET detail = ?, detail_fetched_at = ?, description = ? WHERE slug = ?""",
+                               (json.dumps(detail, ensure_ascii=False), time.time(), _description(detail), slug))
+            self._conn.commit()
+            self._vocabulary = None
+
+    def stale_details(self, max_age: float, limit: int = 0) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute("""
+            SELECT slug FROM problems
+            WHERE detail_fetched_at IS NULL OR detail_fetched_at < ?
+            ORDER BY detail_fetched_at IS NOT NULL, detail_fetched_at, CAST(id AS INTEGER)
+            LIMIT ?""", (time.time() - max_age, limit or -1)).fetchall()
+        return [r[0] for r in rows]
+
+    @staticmethod
+    def _record(row) -> Dict[str, Any]:
+        slug, problem_id, title, difficulty, tags, paid_only = row[:6]
+        return {"id": problem_id, "title": title, "slug": slug, "difficulty": difficulty,
+                "tags": json.loads(tags), "paid_only": bool(paid_only),
+                "url": f"https://leetcode.com/problems/{slug}/"}
+
+    def get_problem(self, slug: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("""
+            SELECT slug, id, title, difficulty, tags, paid_only, detail FROM problems WHERE slug = ?""",
+                                     (slug,)).fetchone()
+        if row is None:
+            return None
+        return {**json.loads(row[6]), **self._record(row)} if row[6] else self._record(row)
+
+    def problems(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute("""
+            SELECT slug, id, title, difficulty, tags, paid_only FROM problems
+            ORDER BY CAST(id AS INTEGER)""").fetchall()
+        return [self._record(row) for row in rows]
+
+    def _terms(self) -> Dict[Tuple[str, int], List[str]]:
+        # Built once per change to the store and bucketed by first letter and length.
+        if self._vocabulary is None:
+            vocabulary = defaultdict(list)
+            for (term,) in self._conn.execute("SELECT term FROM problem_terms"):
+                vocabulary[term[0], len(term)].append(term)
+            self._vocabulary = dict(vocabulary)
+        return self._vocabulary
+
+    def _close_terms(self, word: str) -> List[str]:
+        # difflib's ratio cannot reach the cutoff once one length exceeds the other by (2 - cutoff) / cutoff, so only
+        # terms in that band are compared. Requiring the same first letter keeps this well under a millisecond on a
+        # full catalog, at the cost of not correcting a typo in the first letter.
+        vocabulary = self._terms()
+        stretch = (2 - FUZZY_CUTOFF) / FUZZY_CUTOFF
+        candidates = [term for length in range(math.ceil(len(word) / stretch - 1e-9), int(len(word) * stretch) + 1)
+                      for term in vocabulary.get((word[0], length), ())]
+        return difflib.get_close_matches(word, candidates, n=FUZZY_CANDIDATES, cutoff=FUZZY_CUTOFF)
+
+    def _match_expression(self, words: List[str], fuzzy: bool) -> str:
+        clauses = []
+        for word in words:
+            options = [f'"{word}"*']
+            if fuzzy:
+                # Vocabulary terms are already stemmed, so match them as prefixes rather than re-stemming them.
+                options += [f'"{term}"*' for term in self._close_terms(word) if term != word]
+            clauses.append(options[0] if len(options) == 1 else f"({' OR '.join(options)})")
+        return " AND ".join(clauses)
+
+    def _ranked(self, table: str, expression: str, weights: str, query: str, limit: int) -> List[Tuple]:
+        return self._conn.execute(f"""
+        SELECT p.slug, p.id, p.title, p.difficulty, p.tags, p.paid_only
+        FROM {table} f
+        JOIN problems p ON p.rowid = f.rowid
+        WHERE {table} MATCH ?
+        ORDER BY p.title LIKE ? DESC, bm25({table}, {weights})
+        LIMIT ?""", (expression, f"{query}%", limit)).fetchall()
+
+    def _tiered(self, expression: str, query: str, limit: int) -> List[Tuple]:
+        for table, columns, weights in SEARCH_TIERS:
+            rows = self._ranked(table, f"{columns}({expression})", weights, query, limit)
+            if rows:
+                return rows
+        return []
+
+    def search(self, query: str, limit: int = SEARCH_LIMIT) -> List[Dict[str, Any]]:
+        # Every word must match as a prefix; if nothing does, misspelled words also try close title/tag terms.
+        query = query.strip()
+        words = _WORD_RE.findall(query.lower())
+        if not words:
+            return []
+        with self._lock:
+            exact = self._conn.execute("""
+            SELECT slug, id, title, difficulty, tags, paid_only FROM problems WHERE id = ? OR slug = ?""",
+                                       (query, query.lower())).fetchall()
+            rows = self._tiered(self._match_expression(words, fuzzy=False), query, limit)
+            if not rows and not exact:
+                rows = self._tiered(self._match_expression(words, fuzzy=True), query, limit)
+        results = {row[0]: self._record(row) for row in exact + rows}
+        return list(results.values())[:limit]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM problems").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+@st.cache_resource
+def get_problem_store() -> ProblemStore:
+    from .problem_catalog import CATALOG_PATH
+
+    store = ProblemStore()
+    if not store.count():
+        # Until `python -m utils.catalog_sync` has run, search the bundled problems.
+        try:
+            store.upsert_problems(json.loads(CATALOG_PATH.read_text(encoding="utf-8")))
+        except (OSError, ValueError):
+            pass
+    return store
@@ -0,0 +1,172 @@
+import ast
+import io
+import json
+import tokenize
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .code_analyzer import _C_COMMENT_RE, c_family_language, detect_language
+
+MAX_CODE_CHARS = 12_000
+ANALYSIS_KEYS = ("complexity", "patterns", "quality_metrics", "language", "code_structure")
+DROPPED_STRUCTURE_KEYS = ("analysis_ms", "language")
+HEAD_SHARE = 0.7
+
+def _drop_blank_lines(lines: List[str]) -> str:
+    return "\n".join(line.rstrip() for line in lines if line.strip())
+
+def _docstring_lines(tree: ast.AST) -> Set[int]:
+    lines = set()
+    for node in ast.walk(tree):
+        if not isinstance(node, (ast.Module, ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)):
+            continue
+        body = node.body
+        # A docstring that is the whole body keeps the block syntactically valid, so leave it.
+        if len(body) < 2 or not isinstance(body[0], ast.Expr) or not isinstance(body[0].value, ast.Constant) \
+                or not isinstance(body[0].value.value, str):
+            continue
+        alone = body[0].lineno > getattr(node, "lineno", 0) and body[1].lineno > body[0].end_lineno
+        if alone:
+            lines.update(range(body[0].lineno, body[0].end_lineno + 1))
+    return lines
+
+def _strip_python(code: str) -> Optional[str]:
+    try:
+        tree = ast.parse(code)
+        comments = [tok.start for tok in tokenize.generate_tokens(io.StringIO(code).readline)
+                    if tok.type == tokenize.COMMENT]
+    except (SyntaxError, ValueError, tokenize.TokenError):
+        return None
+    lines = code.splitlines()
+    for row, col in comments:
+        lines[row - 1] = lines[row - 1][:col]
+    docstrings = _docstring_lines(tree)
+    return _drop_blank_lines([line for i, line in enumerate(lines, 1) if i not in docstrings])
+
+def strip_code(code: str) -> str:
+    code = code.strip() if code else ""
+    if not code:
+        return ""
+    # Anything that parses is Python whatever the detected language, and there "//" is floor division, not a comment.
+    stripped = _strip_python(code)
+    if stripped is not None:
+        return stripped
+    if c_family_language(code):
+        return _drop_blank_lines(_C_COMMENT_RE.sub(lambda m: m.group(1) or "", code).splitlines())
+    return _drop_blank_lines(code.splitlines())
+
+def compact_analysis(analysis: Any) -> str:
+    if not isinstance(analysis, dict):
+        return str(analysis)
+    payload = {key: analysis[key] for key in ANALYSIS_KEYS if analysis.get(key) not in (None, "", [], {})}
+    if isinstance(payload.get("code_structure"), dict):
+        payload["code_structure"] = {key: value for key, value in payload["code_structure"].items()
+                                     if key not in DROPPED_STRUCTURE_KEYS and value not in (None, [], {})}
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False, default=str)
+
+def _functions(tree: ast.AST) -> List[Tuple[ast.AST, Optional[str]]]:
+    found = []
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            found.append((node, None))
+        elif isinstance(node, ast.ClassDef):
+            found.extend((child, node.name) for child in node.body
+                         if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)))
+    return found
+
+def _called_names(node: ast.AST) -> Set[str]:
+    names = set()
+    for child in ast.walk(node):
+        if isinstance(child, ast.Call):
+            func = child.func
+            names.add(func.attr if isinstance(func, ast.Attribute) else getattr(func, "id", ""))
+    return names
+
+def _relevant_functions(tree: ast.AST) -> Tuple[Set[str], Set[str]]:
+    functions = _functions(tree)
+    calls = {node.name: _called_names(node) for node, _ in functions}
+    # LeetCode-style entry points are the Solution methods; otherwise anything no other function calls.
+    entries = {node.name for node, owner in functions if owner == "Solution" and not node.name.startswith("_")}
+    if not entries:
+        called = set().union(*calls.values()) if calls else set()
+        entries = {node.name for node, _ in functions
+                   if node.name not in called and node.name != "main" and not node.name.startswith("test")}
+    relevant, frontier = set(), list(entries)
+    while frontier:
+        name = frontier.pop()
+        if name in relevant or name not in calls:
+            continue
+        relevant.add(name)
+        frontier.extend(calls[name])
+    return entries, relevant
+
+def _is_main_guard(node: ast.AST) -> bool:
+    return isinstance(node, ast.If) and "__main__" in ast.unparse(node.test)
+
+def _elide_python(code: str, max_chars: int) -> Optional[str]:
+    try:
+        tree = ast.parse(code)
+    except (SyntaxError, ValueError):
+        return None
+    lines = code.splitlines()
+    entries, relevant = _relevant_functions(tree)
+    candidates = [node for node, _ in _functions(tree) if node.name not in entries and node.body]
+    # Unreachable helpers go first, then reachable helpers from the largest down; entry points are kept.
+    candidates.sort(key=lambda n: (n.name in relevant, -(n.end_lineno - n.lineno)))
+    spans: Dict[int, Tuple[int, str]] = {}
+    for node in tree.body:
+        if _is_main_guard(node):
+            spans[node.lineno] = (node.end_lineno,
+                                  f"# ... __main__ block elided ({node.end_lineno - node.lineno + 1} lines)")
+    size = len(_render(lines, spans))
+    for node in candidates:
+        if size <= max_chars:
+            break
+        start = node.body[0].lineno
+        indent = " " * node.body[0].col_offset
+        spans[start] = (node.end_lineno, f"{indent}...  # {node.end_lineno - start + 1} lines elided")
+        size = len(_render(lines, spans))
+    return _render(lines, spans)
+
+def _render(lines: List[str], spans: Dict[int, Tuple[int, str]]) -> str:
+    out, row = [], 1
+    while row <= len(lines):
+        if row in spans:
+            end, marker = spans[row]
+            out.append(marker)
+            row = end + 1
+        else:
+            out.append(lines[row - 1])
+            row += 1
+    return "\n".join(out)
+
+def _truncate(code: str, max_chars: int, comment: str = "//") -> str:
+    lines = code.splitlines()
+    head, tail, used = [], [], 0
+    for line in lines:
+        if used + len(line) + 1 > max_chars * HEAD_SHARE:
+            break
+        head.append(line)
+        used += len(line) + 1
+    for line in reversed(lines[len(head):]):
+        if used + len(line) + 1 > max_chars:
+            break
+        tail.insert(0, line)
+        used += len(line) + 1
+    omitted = len(lines) - len(head) - len(tail)
+    return "\n".join(head + [f"{comment} ... {omitted} lines omitted ..."] + tail)
+
+def fit_code(code: str, max_chars: int = MAX_CODE_CHARS, language: Optional[str] = None) -> str:
+    if len(code) <= max_chars:
+        return code
+    language = language or detect_language(code)
+    if language == "python":
+        elided = _elide_python(code, max_chars)
+        if elided is not None:
+            code = elided
+    if len(code) <= max_chars:
+        return code
+    return _truncate(code, max_chars, "#" if language == "python" else "//")
+
+def compact_code(code: str, max_chars: int = MAX_CODE_CHARS, language: Optional[str] = None) -> str:
+    language = language or detect_language(code or "")
+    return fit_code(strip_code(code), max_chars, language)
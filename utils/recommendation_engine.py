@@ -1,19 +1,136 @@
-import random
-from typing import List, Dict
+import streamlit as st
+import numpy as np
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+from .problem_catalog import CATEGORY_TAGS, ProblemCatalog, get_problem_catalog
+
+DIFFICULTY_LEVELS = {"easy": 0, "medium": 1, "hard": 2}
+# Topic names the pages use that are plural or shortened forms of catalog tags.
+TOPIC_ALIASES = {"arrays": "array", "strings": "string", "trees": "tree", "graphs": "graph",
+                 "dp": "dynamic programming"}
+
+FOCUS_WEIGHT = 1.0
+WEAKNESS_WEIGHT = 0.6
+DIFFICULTY_WEIGHT = 0.4
+DEFAULT_WEAKNESS = 0.3
+DECLARED_WEAKNESS = 0.8
+# Lower is greedier: at 0 the top scores always win, higher spreads picks across near-ties.
+TEMPERATURE = 0.15
+
+Seed = Union[None, int, Sequence[int]]
 
 class RecommendationEngine:
-    def __init__(self, catalog: List[Dict]):
-        self.catalog = catalog
+    # Scores every problem at once from an area-by-problem membership matrix built when the engine is created.
+    def __init__(self, catalog: Optional[ProblemCatalog] = None):
+        self.catalog = catalog if catalog is not None else get_problem_catalog()
+        self._columns: Dict[str, int] = {}
+        rows, cols = [], []
+        for position, problem in enumerate(self.catalog.problems):
+            for name in {problem.category.lower(), *problem.tags} - {""}:
+                rows.append(position)
+                cols.append(self._columns.setdefault(name, len(self._columns)))
+        self._matrix = np.zeros((len(self.catalog), max(len(self._columns), 1)), dtype=np.float32)
+        self._matrix[rows, cols] = 1.0
+        self._levels = np.array([DIFFICULTY_LEVELS.get(p.difficulty.lower(), 1) for p in self.catalog.problems],
+                                dtype=np.float32)
+
+    def _area_columns(self, area: str) -> List[int]:
+        names = {area.lower(), TOPIC_ALIASES.get(area.lower(), ""), *CATEGORY_TAGS.get(area, [])}
+        return [self._columns[name] for name in names if name in self._columns]
+
+    def _relevance(self, areas: Iterable[str]) -> np.ndarray:
+        columns = sorted({column for area in areas for column in self._area_columns(area)})
+        if not columns:
+            return np.zeros(len(self.catalog), dtype=np.float32)
+        return self._matrix[:, columns].max(axis=1)
+
+    def weakness(self, weak_areas: Iterable[str] = (), success_rates: Optional[Dict[str, float]] = None) -> np.ndarray:
+        # Per problem: the weakest of its topics, where a topic's weakness is its failure rate.
+        weights = np.full(self._matrix.shape[1], np.nan, dtype=np.float32)
+        for topic, rate in (success_rates or {}).items():
+            columns = self._area_columns(topic)
+            weights[columns] = np.fmax(weights[columns], np.clip(1.0 - rate / 100.0, 0.0, 1.0))
+        for area in weak_areas:
+            columns = self._area_columns(area)
+            weights[columns] = np.fmax(weights[columns], DECLARED_WEAKNESS)
+        weights = np.nan_to_num(weights, nan=DEFAULT_WEAKNESS)
+        return (self._matrix * weights).max(axis=1)
 
-    def recommend_problems(self, weak_areas: List[str], count: int = 5) -> List[Dict]:
-        matches = [p for p in self.catalog if any(tag in weak_areas for tag in p.get("tags", []))]
-        source = matches if matches else self.catalog
-        return random.sample(source, min(count, len(source)))
+    @staticmethod
+    def target_level(success_rates: Optional[Dict[str, float]] = None) -> float:
+        # 0 = Easy, 2 = Hard; moves up as the overall success rate climbs from 50% to 90%.
+        if not success_rates:
+            return 0.5
+        return float(np.clip((np.mean(list(success_rates.values())) - 50.0) / 20.0, 0.0, 2.0))
 
-    def generate_study_schedule(self, weak_areas: List[str], time_per_day: int, days: int = 7) -> Dict[str, List[str]]:
+    def _fit(self, targets: np.ndarray) -> np.ndarray:
+        return 1.0 - np.abs(self._levels[None, :] - targets[:, None]) / 2.0
+
+    def score(self, focus_areas: Sequence[Sequence[str]], targets: Sequence[float], weak_areas: Iterable[str] = (),
+              success_rates: Optional[Dict[str, float]] = None) -> np.ndarray:
+        # One row per (focus areas, target level) pair, one column per catalog problem.
+        relevance: Dict[tuple, np.ndarray] = {}
+        for areas in map(tuple, focus_areas):
+            if areas not in relevance:
+                relevance[areas] = self._relevance(areas)
+        focus = np.vstack([relevance[tuple(areas)] for areas in focus_areas])
+        weakness = self.weakness(weak_areas, success_rates)
+        return (FOCUS_WEIGHT * focus + WEAKNESS_WEIGHT * weakness[None, :]
+                + DIFFICULTY_WEIGHT * self._fit(np.asarray(targets, dtype=np.float32)))
+
+    def _select(self, scores: np.ndarray, count: int, attempted: Iterable[str], seed: Seed) -> List[List[Dict]]:
+        # Gumbel top-k: adding Gumbel noise to score / temperature and keeping the k largest samples k problems
+        # without replacement, each in proportion to exp(score / temperature).
+        rng = np.random.default_rng(seed)
+        keys = scores / TEMPERATURE + rng.gumbel(size=scores.shape)
+        keys[:, sorted(self.catalog.lookup(attempted))] = -np.inf
+        picks = []
+        for row in keys:
+            k = min(count, int(np.isfinite(row).sum()))
+            if k <= 0:
+                picks.append([])
+                continue
+            top = np.argpartition(-row, k - 1)[:k]
+            top = top[np.argsort(-row[top])]
+            # Later rows never repeat a problem an earlier row already picked.
+            keys[:, top] = -np.inf
+            picks.append([self.catalog.problems[i].to_dict() for i in top])
+        return picks
+
+    def recommend_problems(self, weak_areas: List[str], count: int = 5,
+                           success_rates: Optional[Dict[str, float]] = None, attempted: Iterable[str] = (),
+                           difficulty: Optional[str] = None, seed: Seed = None) -> List[Dict]:
+        if not len(self.catalog):
+            return []
+        target = DIFFICULTY_LEVELS.get((difficulty or "").lower(), self.target_level(success_rates))
+        scores = self.score([weak_areas], [target], weak_areas, success_rates)
+        return self._select(scores, count, attempted, seed)[0]
+
+    def plan(self, topics: Sequence[str], difficulties: Optional[Sequence[Optional[str]]] = None,
+             per_day: int = 1, weak_areas: Iterable[str] = (), success_rates: Optional[Dict[str, float]] = None,
+             attempted: Iterable[str] = (), seed: Seed = None) -> List[List[Dict]]:
+        # Days without a recognised difficulty ("Review") ramp around the user's own level.
+        if not topics or not len(self.catalog):
+            return [[] for _ in topics]
+        target = self.target_level(success_rates)
+        ramp = np.clip(target + np.linspace(-0.5, 0.5, len(topics)), 0.0, 2.0)
+        targets = [DIFFICULTY_LEVELS.get((difficulties[i] or "").lower(), ramp[i]) if difficulties else ramp[i]
+                   for i in range(len(topics))]
+        scores = self.score([[topic] for topic in topics], targets, weak_areas, success_rates)
+        return self._select(scores, per_day, attempted, seed)
+
+    def generate_study_schedule(self, weak_areas: List[str], time_per_day: int, days: int = 7,
+                                success_rates: Optional[Dict[str, float]] = None, attempted: Iterable[str] = (),
+                                seed: Seed = None) -> Dict[str, List[str]]:
+        success_rates = success_rates or {}
+        areas = list(weak_areas) or sorted(success_rates, key=success_rates.get) or self.catalog.categories
+        topics = [areas[i % len(areas)] for i in range(days)] if areas else []
+        plan = self.plan(topics, weak_areas=weak_areas, success_rates=success_rates, attempted=attempted, seed=seed)
         schedule = {}
-        for i in range(days):
-            topic = weak_areas[i % len(weak_areas)]
-            problem = random.choice(self.recommend_problems([topic], 3))["title"]
-            schedule[f"Day {i+1}"] = [f"Review {topic}", f"Solve {problem}"]
+        for i, (topic, problems) in enumerate(zip(topics, plan)):
+            schedule[f"Day {i+1}"] = [f"Review {topic}"] + [f"Solve {problem['title']}" for problem in problems]
         return schedule
+
+@st.cache_resource
+def get_recommendation_engine() -> RecommendationEngine:
+    return RecommendationEngine(get_problem_catalog())
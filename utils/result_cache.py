@@ -0,0 +1,117 @@
+import streamlit as st
+import hashlib
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .code_analyzer import code_fingerprint
+from .embedding_cache import BoundedLRU, trim_disk, with_hit_rate
+
+RESULT_TTL = 7 * 24 * 3600
+MAX_MEMORY_ENTRIES = 512
+MAX_DISK_ENTRIES = 20_000
+
+class ResultCache:
+    def __init__(self, db=None, ttl: float = RESULT_TTL, max_memory_entries: int = MAX_MEMORY_ENTRIES,
+                 max_disk_entries: int = MAX_DISK_ENTRIES):
+        self.db = db
+        self.ttl = ttl
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        # Values are kept serialized so callers always get a private copy they can mutate.
+        self._memory: BoundedLRU[Tuple[float, str]] = BoundedLRU(max_memory_entries)
+        self._lock = threading.Lock()
+        self._stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0}
+        self._disk_entries = 0
+        if db is not None:
+            with db.connection() as conn:
+                self._disk_entries = conn.execute("SELECT COUNT(*) FROM analysis_cache").fetchone()[0]
+
+    @staticmethod
+    def key_for(stage: str, code: str, problem_name: str = "", mode: str = "", version: str = "") -> str:
+        parts = [stage, code_fingerprint(code), " ".join(problem_name.lower().split()), mode.lower(), version]
+        return hashlib.sha256(json.dumps(parts).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if now - entry[0] <= self.ttl:
+                    self._stats['memory_hits'] += 1
+                    return json.loads(entry[1])
+                self._memory.discard(key)
+                self._stats['expired'] += 1
+        if self.db is not None:
+            with self.db.transaction() as conn:
+                row = conn.execute("SELECT value, created_at FROM analysis_cache WHERE key = ?", (key,)).fetchone()
+                if row is not None and now - row[1] <= self.ttl:
+                    conn.execute("UPDATE analysis_cache SET last_used = ?, hits = hits + 1 WHERE key = ?",
+                                 (now, key))
+                    with self._lock:
+                        self._remember(key, row[1], row[0])
+                        self._stats['disk_hits'] += 1
+                    return json.loads(row[0])
+                if row is not None:
+                    conn.execute("DELETE FROM analysis_cache WHERE key = ?", (key,))
+                    with self._lock:
+                        self._disk_entries -= 1
+                        self._stats['expired'] += 1
+        with self._lock:
+            self._stats['misses'] += 1
+        return None
+
+    def put(self, key: str, stage: str, value: Any):
+        now = time.time()
+        payload = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._remember(key, now, payload)
+        if self.db is None:
+            return
+        with self.db.transaction() as conn:
+            # Only a new key grows the table; counting overwrites would make eviction run early.
+            if conn.execute("UPDATE analysis_cache SET value = ?, created_at = ?, last_used = ? WHERE key = ?",
+                            (payload, now, now, key)).rowcount:
+                return
+            conn.execute("""
+            INSERT INTO analysis_cache (key, stage, value, created_at, last_used, hits) VALUES (?, ?, ?, ?, ?, 0)""",
+                         (key, stage, payload, now, now))
+            with self._lock:
+                self._disk_entries += 1
+                overflow = self._disk_entries > self.max_disk_entries
+            if overflow:
+                self._evict_disk(conn, now)
+
+    def get_or_compute(self, stage: str, compute: Callable[[], Any], code: str, problem_name: str = "",
+                       mode: str = "", version: str = "",
+                       cacheable: Callable[[Any], bool] = lambda value: True) -> Tuple[Any, bool]:
+        key = self.key_for(stage, code, problem_name, mode, version)
+        value = self.get(key)
+        if value is not None:
+            return value, True
+        value = compute()
+        if value is not None and cacheable(value):
+            self.put(key, stage, value)
+        return value, False
+
+    def _remember(self, key: str, created_at: float, payload: str):
+        self._memory.put(key, (created_at, payload))
+
+    def _evict_disk(self, conn, now: float):
+        removed, remaining = trim_disk(conn, "analysis_cache", "key", self.max_disk_entries, now - self.ttl)
+        with self._lock:
+            self._disk_entries = remaining
+            self._stats['evictions'] += removed
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['memory_entries'] = len(self._memory)
+            stats['disk_entries'] = self._disk_entries
+        return with_hit_rate(stats, ('memory_hits', 'disk_hits'), ('misses',))
+
+@st.cache_resource
+def get_result_cache() -> ResultCache:
+    from .database import get_database
+    return ResultCache(get_database())
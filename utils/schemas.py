@@ -0,0 +1,81 @@
+from typing import Any, Dict, List, Literal
+
+from pydantic import BaseModel, Field, field_validator
+
+class RelatedProblem(BaseModel):
+    title: str = Field(description="LeetCode problem title")
+    url: str = Field(default="", description="Full https://leetcode.com/problems/... link")
+
+class CodeFeedback(BaseModel):
+    category: str = Field(description="Problem category, e.g. 'Dynamic Programming' or 'Two Pointers'")
+    difficulty: Literal["Easy", "Medium", "Hard"] = Field(description="LeetCode difficulty of the problem")
+    time_complexity: str = Field(description="Big-O time complexity of the submitted code, e.g. 'O(n log n)'")
+    space_complexity: str = Field(description="Big-O auxiliary space of the submitted code")
+    summary: str = Field(description="One or two sentence overall assessment")
+    strengths: List[str] = Field(default_factory=list, description="What the solution does well")
+    improvements: List[str] = Field(default_factory=list, description="Concrete, actionable improvements")
+    related_problems: List[RelatedProblem] = Field(default_factory=list,
+                                                   description="2-3 LeetCode problems to practise next")
+
+    @field_validator("difficulty", mode="before")
+    @classmethod
+    def _normalize_difficulty(cls, value: Any) -> Any:
+        return value.strip().capitalize() if isinstance(value, str) else value
+
+class PatternAnalysis(BaseModel):
+    primary_pattern: str = Field(description="Main algorithmic pattern implemented, e.g. 'Sliding Window'")
+    explanation: str = Field(description="How the pattern is applied in the code")
+    usage_quality: int = Field(ge=1, le=10, description="Clarity, correctness and structure of the implementation")
+    alternatives: List[str] = Field(default_factory=list, description="Better or alternative patterns")
+    optimizations: List[str] = Field(default_factory=list, description="Pattern-specific optimizations")
+    related_problems: List[RelatedProblem] = Field(default_factory=list,
+                                                   description="2-3 LeetCode problems using the same pattern")
+
+class CombinedAnalysis(BaseModel):
+    feedback: CodeFeedback
+    patterns: PatternAnalysis
+
+def _bullets(items: List[str]) -> str:
+    return "\n".join(f"- {item}" for item in items if item)
+
+def _problem_links(problems: List[Dict[str, Any]]) -> str:
+    lines = []
+    for problem in problems:
+        if not isinstance(problem, dict) or not problem.get("title"):
+            continue
+        lines.append(f"- [{problem['title']}]({problem['url']})" if problem.get("url") else f"- {problem['title']}")
+    return "\n".join(lines)
+
+def feedback_markdown(data: Dict[str, Any]) -> str:
+    # Also used on partially streamed objects, so every field is optional here.
+    parts = []
+    heading = " · ".join(str(data[key]) for key in ("category", "difficulty") if data.get(key))
+    if heading:
+        parts.append(f"**{heading}**")
+    if data.get("summary"):
+        parts.append(data["summary"])
+    complexity = [f"- Time: `{data['time_complexity']}`" if data.get("time_complexity") else "",
+                  f"- Space: `{data['space_complexity']}`" if data.get("space_complexity") else ""]
+    if any(complexity):
+        parts.append("## 📊 Complexity\n" + "\n".join(line for line in complexity if line))
+    if data.get("strengths"):
+        parts.append("## 🎯 Strengths\n" + _bullets(data["strengths"]))
+    if data.get("improvements"):
+        parts.append("## 🔧 Areas for Improvement\n" + _bullets(data["improvements"]))
+    if data.get("related_problems"):
+        parts.append("## 📚 Related Problems\n" + _problem_links(data["related_problems"]))
+    return "\n\n".join(parts)
+
+def pattern_markdown(data: Dict[str, Any]) -> str:
+    parts = []
+    if data.get("primary_pattern"):
+        parts.append(f"### 🔍 Primary Pattern: {data['primary_pattern']}\n{data.get('explanation', '')}".strip())
+    if data.get("usage_quality"):
+        parts.append(f"### 🧪 Pattern Usage Quality: {data['usage_quality']}/10")
+    if data.get("alternatives"):
+        parts.append("### 🔁 Alternative Patterns\n" + _bullets(data["alternatives"]))
+    if data.get("optimizations"):
+        parts.append("### 🚀 Pattern-Specific Optimizations\n" + _bullets(data["optimizations"]))
+    if data.get("related_problems"):
+        parts.append("### 🔗 Related LeetCode Problems\n" + _problem_links(data["related_problems"]))
+    return "\n\n".join(parts)
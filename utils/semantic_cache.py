@@ -0,0 +1,216 @@
+import streamlit as st
+import hashlib
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from .code_analyzer import analyze_code, normalize_code
+from .config import get_bool_setting, get_float_setting
+from .embedding_cache import BoundedLRU, trim_disk, with_hit_rate
+
+# Mean-pooled CodeBERT vectors are anisotropic: a brute-force and an optimal solution to the same problem can
+# both clear this, so it only shortlists candidates and structure_signature() decides whether a hit is served.
+SIMILARITY_THRESHOLD = 0.98
+SEMANTIC_TTL = 7 * 24 * 3600
+MAX_SCOPE_ENTRIES = 256
+MAX_MEMORY_SCOPES = 256
+MAX_DISK_ENTRIES = 20_000
+
+def structure_signature(code: str) -> str:
+    # Solutions only share cached feedback when the local analysis agrees on their complexity and patterns.
+    analysis = analyze_code(code)
+    complexity = analysis.get('complexity', {})
+    return json.dumps([analysis.get('language'), complexity.get('time_complexity'),
+                       complexity.get('space_complexity'), sorted(analysis.get('patterns', []))])
+
+class SemanticHit:
+    def __init__(self, value: Any, similarity: float, tokens: int):
+        self.value = value
+        self.similarity = similarity
+        self.tokens = tokens
+
+class _ScopeEntries:
+    def __init__(self, dim: int):
+        self.ids: List[int] = []
+        self.vectors = np.zeros((0, dim), dtype='float32')
+        self.created: List[float] = []
+        self.values: List[str] = []
+        self.tokens: List[int] = []
+        self.signatures: List[Optional[str]] = []
+
+    def append(self, entry_id: int, vector: np.ndarray, created_at: float, value: str, tokens: int,
+               signature: Optional[str]):
+        self.ids.append(entry_id)
+        self.vectors = np.vstack([self.vectors, vector.reshape(1, -1)])
+        self.created.append(created_at)
+        self.values.append(value)
+        self.tokens.append(tokens)
+        self.signatures.append(signature)
+
+    def keep(self, positions: List[int]):
+        self.ids = [self.ids[i] for i in positions]
+        self.vectors = self.vectors[positions]
+        self.created = [self.created[i] for i in positions]
+        self.values = [self.values[i] for i in positions]
+        self.tokens = [self.tokens[i] for i in positions]
+        self.signatures = [self.signatures[i] for i in positions]
+
+class SemanticCache:
+    def __init__(self, db=None, embedder: Optional[Callable[[], Any]] = None,
+                 threshold: float = SIMILARITY_THRESHOLD, ttl: float = SEMANTIC_TTL, enabled: bool = True,
+                 max_scope_entries: int = MAX_SCOPE_ENTRIES, max_memory_scopes: int = MAX_MEMORY_SCOPES,
+                 max_disk_entries: int = MAX_DISK_ENTRIES):
+        self.db = db
+        # Returns the vector store once it has warmed up, or None; lookups are plain misses until then.
+        self.embedder = embedder
+        self.threshold = threshold
+        self.ttl = ttl
+        self.enabled = enabled
+        self.max_scope_entries = max_scope_entries
+        self.max_memory_scopes = max_memory_scopes
+        self.max_disk_entries = max_disk_entries
+        self._scopes: BoundedLRU[_ScopeEntries] = BoundedLRU(max_memory_scopes)
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self._stats = {'hits': 0, 'misses': 0, 'rejected': 0, 'stale': 0, 'unavailable': 0, 'stores': 0,
+                       'saved_tokens': 0}
+        self._disk_entries = 0
+        if db is not None:
+            with db.connection() as conn:
+                self._disk_entries = conn.execute("SELECT COUNT(*) FROM semantic_cache").fetchone()[0]
+
+    @staticmethod
+    def scope_for(stage: str, encoder_id: str, problem_name: str = "", mode: str = "", version: str = "") -> str:
+        parts = [stage, encoder_id, " ".join(problem_name.lower().split()), mode.lower(), version]
+        return hashlib.sha256(json.dumps(parts).encode("utf-8")).hexdigest()
+
+    def _embed(self, code: str):
+        store = self.embedder() if self.enabled and self.embedder is not None else None
+        if store is None:
+            return None, None
+        # Canonical ASTs drop comments and formatting so only the solution itself is compared.
+        vector = store.encode([normalize_code(code, canonicalize=True)])[0]
+        return store.encoder_id, np.asarray(vector, dtype='float32').reshape(-1)
+
+    def lookup(self, stage: str, code: str, problem_name: str = "", mode: str = "",
+               version: str = "") -> Optional[SemanticHit]:
+        encoder_id, vector = self._embed(code)
+        if vector is None:
+            with self._lock:
+                self._stats['unavailable'] += 1
+            return None
+        scope = self.scope_for(stage, encoder_id, problem_name, mode, version)
+        now = time.time()
+        with self._lock:
+            entries = self._entries(scope, vector.shape[0])
+            fresh = [i for i, created in enumerate(entries.created) if now - created <= self.ttl]
+            stale = [entries.ids[i] for i, created in enumerate(entries.created) if now - created > self.ttl]
+            if stale:
+                entries.keep(fresh)
+                self._stats['stale'] += len(stale)
+            similarities = entries.vectors @ vector if entries.ids else np.zeros(0, dtype='float32')
+            candidates = [(float(similarities[i]), entries.ids[i], entries.signatures[i], entries.values[i],
+                           entries.tokens[i]) for i in np.argsort(-similarities) if similarities[i] >= self.threshold]
+        signature = structure_signature(code) if candidates else None
+        match = next((c for c in candidates if c[2] == signature), None)
+        hit = SemanticHit(json.loads(match[3]), match[0], match[4]) if match else None
+        with self._lock:
+            if hit is None:
+                self._stats['rejected' if candidates else 'misses'] += 1
+            else:
+                self._stats['hits'] += 1
+                self._stats['saved_tokens'] += hit.tokens
+        if self.db is not None and (stale or hit is not None):
+            with self.db.transaction() as conn:
+                if stale:
+                    conn.executemany("DELETE FROM semantic_cache WHERE id = ?", [(i,) for i in stale])
+                if hit is not None:
+                    conn.execute("UPDATE semantic_cache SET last_used = ?, hits = hits + 1 WHERE id = ?",
+                                 (now, match[1]))
+            with self._lock:
+                self._disk_entries -= len(stale)
+        return hit
+
+    def add(self, stage: str, code: str, value: Any, tokens: int = 0, problem_name: str = "", mode: str = "",
+            version: str = ""):
+        encoder_id, vector = self._embed(code)
+        if vector is None:
+            return
+        scope = self.scope_for(stage, encoder_id, problem_name, mode, version)
+        signature = structure_signature(code)
+        now = time.time()
+        payload = json.dumps(value, ensure_ascii=False)
+        entry_id = None
+        if self.db is not None:
+            with self.db.transaction() as conn:
+                entry_id = conn.execute("""
+                INSERT INTO semantic_cache (scope, stage, vector, value, tokens, signature, created_at, last_used,
+                                            hits)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0)""",
+                                        (scope, stage, vector.tobytes(), payload, tokens, signature, now,
+                                         now)).lastrowid
+                with self._lock:
+                    self._disk_entries += 1
+                    overflow = self._disk_entries > self.max_disk_entries
+                if overflow:
+                    self._evict_disk(conn)
+        with self._lock:
+            self._stats['stores'] += 1
+            # A scope that is not loaded yet picks the new row up from disk on first use.
+            if self.db is not None and scope not in self._scopes:
+                return
+            if entry_id is None:
+                self._next_id += 1
+                entry_id = self._next_id
+            entries = self._entries(scope, vector.shape[0])
+            entries.append(entry_id, vector, now, payload, tokens, signature)
+            if len(entries.ids) > self.max_scope_entries:
+                entries.keep(list(range(len(entries.ids) - self.max_scope_entries, len(entries.ids))))
+
+    def _entries(self, scope: str, dim: int) -> _ScopeEntries:
+        entries = self._scopes.get(scope)
+        if entries is None:
+            entries = _ScopeEntries(dim)
+            if self.db is not None:
+                with self.db.connection() as conn:
+                    rows = conn.execute("""
+                    SELECT id, vector, created_at, value, tokens, signature FROM semantic_cache
+                    WHERE scope = ? ORDER BY created_at DESC LIMIT ?""", (scope, self.max_scope_entries)).fetchall()
+                for entry_id, blob, created_at, value, tokens, signature in reversed(rows):
+                    entries.append(entry_id, np.frombuffer(blob, dtype='float32'), created_at, value, tokens,
+                                   signature)
+            self._scopes.put(scope, entries)
+        return entries
+
+    def _evict_disk(self, conn):
+        _, remaining = trim_disk(conn, "semantic_cache", "id", self.max_disk_entries, time.time() - self.ttl)
+        with self._lock:
+            self._disk_entries = remaining
+            # Evicted rows may still sit in loaded scopes; reload them on next use.
+            self._scopes.clear()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['disk_entries'] = self._disk_entries
+        with_hit_rate(stats, ('hits',), ('misses', 'rejected'))
+        stats['threshold'] = self.threshold
+        stats['ttl_hours'] = self.ttl / 3600
+        if self.db is not None:
+            with self.db.connection() as conn:
+                stats['saved_tokens_total'] = conn.execute(
+                    "SELECT COALESCE(SUM(hits * tokens), 0) FROM semantic_cache").fetchone()[0]
+        return stats
+
+@st.cache_resource
+def get_semantic_cache() -> SemanticCache:
+    from .database import get_database
+    from .vector_store import get_vector_store_loader
+    loader = get_vector_store_loader()
+    return SemanticCache(get_database(), embedder=lambda: loader.get(timeout=0),
+                         threshold=get_float_setting("SEMANTIC_CACHE_THRESHOLD", SIMILARITY_THRESHOLD),
+                         ttl=get_float_setting("SEMANTIC_CACHE_TTL_HOURS", SEMANTIC_TTL / 3600) * 3600,
+                         enabled=get_bool_setting("SEMANTIC_CACHE_ENABLED", True))
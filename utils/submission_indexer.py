@@ -0,0 +1,124 @@
+import argparse
+import logging
+import queue
+import threading
+import time
+from typing import Dict, List, Optional
+
+from .database import DatabaseManager, DB_PATH
+from .vector_store import CodeVectorStore, ENCODE_BATCH_SIZE, INDEX_PATH
+
+CHECKPOINT_KEY = "submissions"
+CHUNK_SIZE = 2000
+QUEUE_SIZE = 256
+
+logger = logging.getLogger(__name__)
+
+def backfill_submissions(db: DatabaseManager, store: CodeVectorStore, chunk_size: int = CHUNK_SIZE,
+                         batch_size: int = ENCODE_BATCH_SIZE, limit: int = 0) -> int:
+    start_after = store.checkpoints.get(CHECKPOINT_KEY, 0)
+    indexed = 0
+    started = time.perf_counter()
+    for chunk in db.iter_submissions(after_id=start_after, chunk_size=chunk_size):
+        if limit:
+            chunk = chunk[:max(0, limit - indexed)]
+            if not chunk:
+                break
+        added = store.index_submissions(chunk, batch_size=batch_size, persist=False)
+        indexed += len(added)
+        store.checkpoints[CHECKPOINT_KEY] = chunk[-1]["id"]
+        store.save()
+        logger.info("Indexed %d submissions (checkpoint id %d, %.1f rows/s)",
+                    indexed, chunk[-1]["id"], indexed / max(time.perf_counter() - started, 1e-9))
+    return indexed
+
+class SubmissionIndexQueue:
+    # Database listeners only hand rows over; one worker thread does all the encoding and index writes.
+    def __init__(self, db: DatabaseManager, store: CodeVectorStore, maxsize: int = QUEUE_SIZE,
+                 batch_size: int = ENCODE_BATCH_SIZE):
+        self.db = db
+        self.store = store
+        self.batch_size = batch_size
+        self._queue: "queue.Queue[List[Dict]]" = queue.Queue(maxsize)
+        self._behind = threading.Event()
+        self._behind.set()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="submission-indexer", daemon=True)
+                self._thread.start()
+
+    def submit(self, rows: List[Dict]):
+        try:
+            self._queue.put_nowait(list(rows))
+        except queue.Full:
+            # The rows are already in the database; the next catch-up pass picks them up from the checkpoint.
+            self.dropped += len(rows)
+            self._behind.set()
+            logger.warning("Submission index queue full, deferring %d rows", len(rows))
+        self.start()
+
+    def join(self):
+        self._queue.join()
+
+    def _take_rows(self) -> List[List[Dict]]:
+        chunks = [self._queue.get()]
+        while sum(len(chunk) for chunk in chunks) < self.batch_size:
+            try:
+                chunks.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return chunks
+
+    def _catch_up(self):
+        self._behind.clear()
+        try:
+            backfill_submissions(self.db, self.store, batch_size=self.batch_size)
+        except Exception:
+            self._behind.set()
+            logger.exception("Submission backfill failed")
+
+    def _run(self):
+        while True:
+            if self._behind.is_set():
+                self._catch_up()
+            chunks = self._take_rows()
+            rows = [row for chunk in chunks for row in chunk]
+            try:
+                self.store.index_submissions(rows, batch_size=self.batch_size)
+                if rows and not self._behind.is_set():
+                    # Nothing was skipped since the last backfill, so everything up to here is indexed.
+                    latest = max(row["id"] for row in rows)
+                    self.store.checkpoints[CHECKPOINT_KEY] = max(self.store.checkpoints.get(CHECKPOINT_KEY, 0),
+                                                                 latest)
+            except Exception:
+                self._behind.set()
+                logger.exception("Indexing %d submissions failed", len(rows))
+            finally:
+                for _ in chunks:
+                    self._queue.task_done()
+
+def main():
+    parser = argparse.ArgumentParser(description="Embed stored submissions into the similarity index")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--index", default=str(INDEX_PATH))
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--batch-size", type=int, default=ENCODE_BATCH_SIZE)
+    parser.add_argument("--limit", type=int, default=0, help="stop after this many rows (0 = all)")
+    parser.add_argument("--restart", action="store_true", help="ignore the saved checkpoint")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    db = DatabaseManager(args.db, durable=True)
+    store = CodeVectorStore(index_path=args.index)
+    if args.restart:
+        store.checkpoints.pop(CHECKPOINT_KEY, None)
+    total = backfill_submissions(db, store, args.chunk_size, args.batch_size, args.limit)
+    logger.info("Backfill finished: %d new submissions, %d vectors in index", total, store.index.ntotal if store.index else 0)
+
+if __name__ == "__main__":
+    main()
@@ -1,44 +1,580 @@
 import streamlit as st
+import atexit
 import numpy as np
-from sentence_transformers import SentenceTransformer
-import faiss
+import hashlib
 import json
+import math
+import os
+import queue
+import threading
+import time
+import logging
+from concurrent.futures import Future
 from pathlib import Path
-from typing import List, Tuple, Dict
+from typing import Callable, List, Tuple, Dict, Optional, Iterable, Iterator
+
+from .config import get_int_setting, get_setting
+from .embedding_cache import EmbeddingCache, CACHE_PATH
+from .encoders import ENCODER_BACKENDS, load_encoder
+
+MODEL_NAME = 'microsoft/codebert-base'
+INDEX_PATH = Path("data/vectors/patterns.faiss")
+
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+FLAT_MAX_VECTORS = 20_000
+IVF_PQ_MIN_VECTORS = 1_000_000
+TRAIN_SAMPLE_SIZE = 100_000
+DEFAULT_NPROBE = 16
+DEFAULT_EF_SEARCH = 64
+HNSW_M = 32
+ENCODE_BATCH_SIZE = 64
+SAVE_INTERVAL = 30.0
+BATCH_MAX_SIZE = 32
+BATCH_MAX_WAIT = 0.005
+SEARCH_TIMEOUT = 15.0
+
+logger = logging.getLogger(__name__)
+
+def corpus_hash(items: Iterable[Dict]) -> str:
+    payload = json.dumps(list(items), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def choose_index_type(n_vectors: int) -> str:
+    if n_vectors < FLAT_MAX_VECTORS:
+        return "flat"
+    if n_vectors < IVF_PQ_MIN_VECTORS:
+        return "ivf_flat"
+    return "ivf_pq"
+
+def _nlist_for(n_vectors: int) -> int:
+    return int(min(65536, max(16, 4 * math.sqrt(max(n_vectors, 1)))))
+
+def _pq_subquantizers(dim: int) -> int:
+    return max(m for m in range(1, max(1, min(dim // 8, 64)) + 1) if dim % m == 0)
+
+def build_index(index_type: str, dim: int, n_vectors: int = 0):
+    import faiss
+
+    if index_type == "flat":
+        return faiss.IndexIDMap2(faiss.IndexFlatIP(dim))
+    if index_type == "hnsw":
+        return faiss.IndexIDMap2(faiss.IndexHNSWFlat(dim, HNSW_M, faiss.METRIC_INNER_PRODUCT))
+    nlist = _nlist_for(n_vectors)
+    if index_type == "ivf_flat":
+        spec = f"IVF{nlist},Flat"
+    elif index_type == "ivf_pq":
+        spec = f"IVF{nlist},PQ{_pq_subquantizers(dim)}"
+    else:
+        raise ValueError(f"Unknown index type: {index_type}")
+    index = faiss.index_factory(dim, spec, faiss.METRIC_INNER_PRODUCT)
+    faiss.extract_index_ivf(index).set_direct_map_type(faiss.DirectMap.Hashtable)
+    return index
+
+def train_index(index, vectors: np.ndarray, sample_size: int = TRAIN_SAMPLE_SIZE, seed: int = 0):
+    if index.is_trained:
+        return
+    if len(vectors) > sample_size:
+        rng = np.random.default_rng(seed)
+        vectors = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+    index.train(np.ascontiguousarray(vectors, dtype='float32'))  # type: ignore[arg-type]
+
+def tune_index(index, nprobe: int = DEFAULT_NPROBE, ef_search: int = DEFAULT_EF_SEARCH):
+    import faiss
+
+    try:
+        faiss.extract_index_ivf(index).nprobe = nprobe
+    except RuntimeError:
+        pass
+    base = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+    if hasattr(base, "hnsw"):
+        base.hnsw.efSearch = ef_search
+
+def index_type_of(index) -> str:
+    import faiss
+
+    base = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+    if hasattr(base, "hnsw"):
+        return "hnsw"
+    try:
+        ivf = faiss.extract_index_ivf(index)
+    except RuntimeError:
+        return "flat"
+    return "ivf_pq" if isinstance(faiss.downcast_index(ivf), faiss.IndexIVFPQ) else "ivf_flat"
 
 class CodeVectorStore:
-    def __init__(self):
-        self.model = SentenceTransformer('microsoft/codebert-base')
+    def __init__(self, index_path: Optional[Path] = INDEX_PATH, model_name: str = MODEL_NAME,
+                 index_type: str = "auto", nprobe: int = DEFAULT_NPROBE, ef_search: int = DEFAULT_EF_SEARCH,
+                 cache_path: Optional[Path] = CACHE_PATH, encoder_backend: str = "torch",
+                 encoder_threads: Optional[int] = None, max_seq_length: Optional[int] = None,
+                 batch_max_wait: float = BATCH_MAX_WAIT, batch_max_size: int = BATCH_MAX_SIZE):
+        if index_type != "auto" and index_type not in INDEX_TYPES:
+            raise ValueError(f"index_type must be 'auto' or one of {INDEX_TYPES}")
+        if encoder_backend not in ENCODER_BACKENDS:
+            raise ValueError(f"encoder_backend must be one of {ENCODER_BACKENDS}")
+
+        self.model_name = model_name
+        self.index_type = index_type
+        self.nprobe = nprobe
+        self.ef_search = ef_search
+        self.model = load_encoder(model_name, encoder_backend, max_seq_length=max_seq_length,
+                                  threads=encoder_threads)
+        # The ONNX backends fall back to torch when their packages are missing; record what actually loaded.
+        self.encoder_backend = self.model.backend
+        self.index_path = Path(index_path) if index_path else None
+        # Quantized or truncated encoders produce slightly different vectors, so keep their cache entries apart.
+        self.embedding_cache = EmbeddingCache(
+            cache_path, namespace=f"{model_name}:{self.encoder_backend}:{self.model.max_seq_length}")
         self.index = None
-        self.database: List[Dict] = []
-
-    def add_code_patterns(self, patterns: List[Dict]):
-        texts = [p["description"] + " " + p["code"] for p in patterns]
-        self.database.extend(patterns)
-        embeddings = np.array(self.model.encode(texts), dtype='float32')
-        dim = embeddings.shape[1]
-        self.index = faiss.IndexFlatIP(dim)
-        self.index.add(embeddings)  # type: ignore[arg-type]
-
-    def find_similar_patterns(self, code: str, k: int = 3) -> List[Tuple[Dict, float]]:
-        if self.index is None:
+        self.records: Dict[int, Dict] = {}
+        self.corpora: Dict[str, Dict] = {}
+        self.next_id = 0
+        self.tombstones = 0
+        self.checkpoints: Dict[str, int] = {}
+        self.submission_ids: Dict[int, int] = {}
+        self.record_loader: Optional[Callable[[List[int]], Dict[int, Dict]]] = None
+        self.indexer = None
+        self._mmapped = False
+        self._dirty = False
+        self._last_save = 0.0
+        # Records added since the sidecar was last written; saves append them to the records log instead of
+        # rewriting every record, unless something else in the metadata changed.
+        self._appended: List[int] = []
+        self._meta_changed = True
+        self._generation = 0
+        self._logged = 0
+        self._lock = threading.RLock()
+        self.batcher = QueryBatcher(self, batch_max_size, batch_max_wait) if batch_max_wait > 0 else None
+        self._load()
+        atexit.register(self.flush)
+
+    @property
+    def meta_path(self) -> Optional[Path]:
+        return self.index_path.with_suffix(".meta.json") if self.index_path else None
+
+    @property
+    def log_path(self) -> Optional[Path]:
+        return self.index_path.with_suffix(".records.jsonl") if self.index_path else None
+
+    @property
+    def encoder_id(self) -> str:
+        return self.embedding_cache.namespace
+
+    def _embed(self, texts: List[str], batch_size: int = ENCODE_BATCH_SIZE) -> np.ndarray:
+        return np.asarray(self.model.encode(texts, batch_size=batch_size, normalize_embeddings=True),
+                          dtype='float32')
+
+    def encode(self, codes: List[str]) -> np.ndarray:
+        return self.embedding_cache.encode(codes, self._embed)
+
+    def _target_index_type(self, n_vectors: int) -> str:
+        index_type = choose_index_type(n_vectors) if self.index_type == "auto" else self.index_type
+        if index_type.startswith("ivf") and n_vectors < 39 * _nlist_for(n_vectors):
+            return "flat"
+        return index_type
+
+    def set_search_params(self, nprobe: Optional[int] = None, ef_search: Optional[int] = None):
+        with self._lock:
+            self.nprobe = nprobe if nprobe is not None else self.nprobe
+            self.ef_search = ef_search if ef_search is not None else self.ef_search
+            if self.index is not None:
+                tune_index(self.index, self.nprobe, self.ef_search)
+
+    def _stored_vectors(self) -> Tuple[np.ndarray, np.ndarray]:
+        ids = np.fromiter(self.records.keys(), dtype='int64', count=len(self.records))
+        if self.index is None or len(ids) == 0:
+            return ids, np.zeros((0, self.index.d if self.index is not None else 0), dtype='float32')
+        return ids, self.index.reconstruct_batch(ids)
+
+    def rebuild_index(self, index_type: Optional[str] = None, extra: Optional[Tuple[np.ndarray, np.ndarray]] = None):
+        with self._lock:
+            self._ensure_writable()
+            ids, vectors = self._stored_vectors()
+            if extra is not None:
+                ids = np.concatenate([ids, extra[0]])
+                vectors = np.vstack([vectors, extra[1]]) if len(vectors) else extra[1]
+            if len(vectors) == 0:
+                return
+            index_type = index_type or self._target_index_type(len(ids))
+            index = build_index(index_type, vectors.shape[1], len(ids))
+            train_index(index, vectors)
+            index.add_with_ids(vectors, ids)  # type: ignore[arg-type]
+            tune_index(index, self.nprobe, self.ef_search)
+            self.index = index
+            self.tombstones = 0
+            self._meta_changed = True
+
+    def _load(self):
+        if not self.index_path or not self.index_path.exists() or not self.meta_path.exists():
+            return
+        try:
+            meta = json.loads(self.meta_path.read_text())
+            if meta.get("model") != self.model_name:
+                return
+            import faiss
+
+            mmap_flag = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP)
+            try:
+                index = faiss.read_index(str(self.index_path), mmap_flag)
+                self._mmapped = True
+            except RuntimeError:
+                index = faiss.read_index(str(self.index_path))
+                self._mmapped = False
+            records = {int(k): v for k, v in meta["records"].items()}
+            next_id = meta.get("next_id", max(records, default=-1) + 1)
+            checkpoints = meta.get("checkpoints", {})
+            generation, logged = meta.get("generation", 0), 0
+            for entry in self._read_log():
+                # Lines left from before the last full write belong to an older generation.
+                if entry.get("generation") != generation:
+                    continue
+                records.update((int(k), v) for k, v in entry["records"].items())
+                next_id, checkpoints = entry["next_id"], entry["checkpoints"]
+                logged += len(entry["records"])
+            if index.ntotal != len(records) + meta.get("tombstones", 0):
+                return
+            self.tombstones = meta.get("tombstones", 0)
+            tune_index(index, self.nprobe, self.ef_search)
+            self.index = index
+            self.records = records
+            self.corpora = meta.get("corpora", {})
+            self.next_id = next_id
+            self.checkpoints = checkpoints
+            self.submission_ids = {r["submission_id"]: idx for idx, r in self.records.items()
+                                   if r.get("source") == "submission"}
+            self._generation, self._logged, self._meta_changed = generation, logged, False
+        except Exception:
+            self.index = None
+            self.records, self.corpora, self.next_id = {}, {}, 0
+            self.checkpoints, self.submission_ids = {}, {}
+
+    def _read_log(self) -> Iterator[Dict]:
+        if not self.log_path.exists():
+            return
+        with open(self.log_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # A save interrupted mid-append leaves a partial last line; the index check catches the rest.
+                    return
+
+    def _ensure_writable(self):
+        # Memory-mapped flat codes cannot grow in place, so copy into RAM before mutating.
+        if self._mmapped and self.index is not None:
+            import faiss
+
+            self.index = faiss.read_index(str(self.index_path))
+            self._mmapped = False
+
+    def save(self):
+        if not self.index_path or self.index is None:
+            return
+        import faiss
+
+        with self._lock:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_index = self.index_path.with_suffix(".faiss.tmp")
+            faiss.write_index(self.index, str(tmp_index))
+            os.replace(tmp_index, self.index_path)
+            # Compacting once the log outgrows half the records keeps both the log and full rewrites amortized.
+            if self._meta_changed or self._logged + len(self._appended) > len(self.records) // 2:
+                self._write_meta()
+            else:
+                self._append_log()
+            self._appended = []
+            self._meta_changed = False
+            self._dirty = False
+            self._last_save = time.monotonic()
+
+    def _write_meta(self):
+        self._generation += 1
+        tmp_meta = self.meta_path.with_suffix(".tmp")
+        tmp_meta.write_text(json.dumps({
+            "model": self.model_name,
+            "encoder": self.encoder_backend,
+            "dim": self.index.d,
+            "index_type": index_type_of(self.index),
+            "generation": self._generation,
+            "tombstones": self.tombstones,
+            "next_id": self.next_id,
+            "corpora": self.corpora,
+            "checkpoints": self.checkpoints,
+            "records": {str(k): v for k, v in self.records.items()},
+        }))
+        os.replace(tmp_meta, self.meta_path)
+        self.log_path.unlink(missing_ok=True)
+        self._logged = 0
+
+    def _append_log(self):
+        entry = {"generation": self._generation, "next_id": self.next_id, "checkpoints": self.checkpoints,
+                 "records": {str(idx): self.records[idx] for idx in self._appended if idx in self.records}}
+        with open(self.log_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+        self._logged += len(entry["records"])
+
+    def flush(self):
+        if self._dirty:
+            self.save()
+
+    def _mark_dirty(self):
+        self._dirty = True
+        if time.monotonic() - self._last_save >= SAVE_INTERVAL:
+            self.save()
+
+    def add_code_patterns(self, patterns: List[Dict], persist: bool = True,
+                          batch_size: int = ENCODE_BATCH_SIZE) -> List[int]:
+        if not patterns:
             return []
-        query_emb = np.array(self.model.encode([code]), dtype='float32')
-        distances, indices = self.index.search(query_emb, k)  # type: ignore[arg-type]
-        results: List[Tuple[Dict, float]] = []
-        for row_idx, row_ids in enumerate(indices):
-            for j, idx in enumerate(row_ids):
-                if idx < len(self.database):
-                    results.append((self.database[idx], float(distances[row_idx][j])))
-        return results
+        texts = [p.get("description", "") + " " + p.get("code", "") for p in patterns]
+        return self._add_embeddings(patterns, self._embed(texts, batch_size), persist)
 
-@st.cache_resource
-def get_vector_store() -> CodeVectorStore:
-    store = CodeVectorStore()
+    def _add_embeddings(self, patterns: List[Dict], embeddings: np.ndarray, persist: bool) -> List[int]:
+        with self._lock:
+            self._ensure_writable()
+            ids = np.arange(self.next_id, self.next_id + len(patterns), dtype='int64')
+            total = len(self.records) + len(patterns)
+            target = self._target_index_type(total)
+            if self.index is None or index_type_of(self.index) != target or not self.index.is_trained:
+                self.rebuild_index(target, extra=(ids, embeddings))
+            else:
+                self.index.add_with_ids(embeddings, ids)  # type: ignore[arg-type]
+            self.next_id += len(patterns)
+            self._appended.extend(ids.tolist())
+            for idx, pattern in zip(ids.tolist(), patterns):
+                self.records[idx] = pattern
+                if pattern.get("source") == "submission":
+                    self.submission_ids[pattern["submission_id"]] = idx
+            if persist:
+                self.save()
+        return ids.tolist()
+
+    def index_submissions(self, rows: List[Dict], batch_size: int = ENCODE_BATCH_SIZE,
+                          persist: bool = False) -> List[int]:
+        fresh = [r for r in rows if r.get("code") and r["id"] not in self.submission_ids]
+        if not fresh:
+            return []
+        records = [{
+            "source": "submission",
+            "submission_id": r["id"],
+            "name": r.get("problem_name") or "Untitled",
+            "description": f"Submitted solution for {r.get('problem_name') or 'an unnamed problem'}",
+        } for r in fresh]
+        texts = [rec["description"] + " " + r["code"] for rec, r in zip(records, fresh)]
+        ids = self._add_embeddings(records, self._embed(texts, batch_size), persist=False)
+        if persist:
+            self.save()
+        else:
+            self._mark_dirty()
+        return ids
+
+    def _hydrate(self, records: List[Dict]) -> List[Dict]:
+        wanted = [r["submission_id"] for r in records if r.get("source") == "submission" and "code" not in r]
+        if not wanted or self.record_loader is None:
+            return records
+        try:
+            loaded = self.record_loader(wanted)
+        except Exception:
+            return records
+        return [{**r, "code": loaded.get(r.get("submission_id"), {}).get("code", "")}
+                if r.get("source") == "submission" else r for r in records]
+
+    def remove(self, ids: List[int], persist: bool = True) -> int:
+        if not ids or self.index is None:
+            return 0
+        with self._lock:
+            self._ensure_writable()
+            dropped = set(ids) & set(self.records)
+            self._meta_changed = True
+            if index_type_of(self.index) == "hnsw":
+                # HNSW graphs cannot delete nodes; hide them and compact on the next rebuild.
+                removed = len(dropped)
+                self.tombstones += removed
+            else:
+                removed = self.index.remove_ids(np.asarray(ids, dtype='int64'))
+            for idx in dropped:
+                record = self.records.pop(idx, None)
+                if record and record.get("source") == "submission":
+                    self.submission_ids.pop(record["submission_id"], None)
+            for corpus in self.corpora.values():
+                corpus["ids"] = [i for i in corpus.get("ids", []) if i not in dropped]
+            if self.tombstones > len(self.records):
+                self.rebuild_index()
+            if persist:
+                self.save()
+        return int(removed)
+
+    def sync_corpus(self, name: str, items: List[Dict]) -> bool:
+        digest = corpus_hash(items)
+        with self._lock:
+            current = self.corpora.get(name)
+            if current and current.get("hash") == digest:
+                return False
+            if current:
+                self.remove(current.get("ids", []), persist=False)
+            ids = self.add_code_patterns(items, persist=False)
+            self.corpora[name] = {"hash": digest, "ids": ids}
+            self._meta_changed = True
+            self.save()
+        return True
+
+    def search_many(self, codes: List[str], k: int = 3) -> List[List[Tuple[Dict, float]]]:
+        if not codes:
+            return []
+        if self.index is None or self.index.ntotal == 0:
+            return [[] for _ in codes]
+        query_emb = self.encode(codes)
+        with self._lock:
+            distances, indices = self.index.search(query_emb, k + self.tombstones)  # type: ignore[arg-type]
+            batches: List[List[Tuple[Dict, float]]] = []
+            for row_idx, row_ids in enumerate(indices):
+                results = []
+                for j, idx in enumerate(row_ids):
+                    if idx in self.records:
+                        results.append((self.records[idx], float(distances[row_idx][j])))
+                batches.append(results[:k])
+        hydrated = iter(self._hydrate([r for results in batches for r, _ in results]))
+        return [[(next(hydrated), score) for _, score in results] for results in batches]
+
+    def find_similar_patterns(self, code: str, k: int = 3,
+                              timeout: Optional[float] = SEARCH_TIMEOUT) -> List[Tuple[Dict, float]]:
+        if self.batcher is not None:
+            future = self.batcher.submit(code, k)
+            try:
+                return future.result(timeout)
+            except TimeoutError:
+                # Not started yet means the batcher is stuck; drop the query so it is never run.
+                future.cancel()
+                raise TimeoutError(f"Similarity search did not finish within {timeout:g}s") from None
+        return self.search_many([code], k)[0]
+
+class QueryBatcher:
+    def __init__(self, store: CodeVectorStore, max_batch_size: int = BATCH_MAX_SIZE,
+                 max_wait: float = BATCH_MAX_WAIT):
+        self.store = store
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue: "queue.Queue[Tuple[str, int, Future]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.queries = 0
+
+    def submit(self, code: str, k: int = 3) -> Future:
+        future: Future = Future()
+        self._queue.put((code, k, future))
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="vector-query-batcher", daemon=True)
+                    self._thread.start()
+        return future
+
+    def _take_batch(self) -> List[Tuple[str, int, Future]]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = [item for item in self._take_batch() if item[2].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                # One encode and one index search for the whole batch, at the largest requested k.
+                results = self.store.search_many([code for code, _, _ in batch], max(k for _, k, _ in batch))
+            except Exception as e:
+                for _, _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.queries += len(batch)
+            for (_, k, future), found in zip(batch, results):
+                future.set_result(found[:k])
+
+def build_vector_store(db=None) -> CodeVectorStore:
+    store = CodeVectorStore(encoder_backend=get_setting("EMBEDDING_BACKEND", "torch"),
+                            encoder_threads=get_int_setting("EMBEDDING_THREADS"),
+                            max_seq_length=get_int_setting("EMBEDDING_MAX_SEQ_LENGTH"))
     try:
         patterns_path = Path("data/patterns/algorithm_patterns.json")
         patterns = json.loads(patterns_path.read_text())
-        store.add_code_patterns(patterns)
+        store.sync_corpus("patterns", patterns)
     except Exception:
         pass
+    if db is not None:
+        from .submission_indexer import SubmissionIndexQueue
+
+        store.record_loader = db.get_submissions_by_ids
+        # Starts with a backfill from the checkpoint, so rows saved before this point are indexed too.
+        store.indexer = SubmissionIndexQueue(db, store)
+        db.add_submission_listener(store.indexer.submit)
+        store.indexer.start()
+    return store
+
+class VectorStoreLoader:
+    def __init__(self, db=None):
+        self.db = db
+        self.store: Optional[CodeVectorStore] = None
+        self.error: Optional[Exception] = None
+        self._ready = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._load, name="vector-store-warmup", daemon=True)
+                self._thread.start()
+
+    def _load(self):
+        started = time.perf_counter()
+        try:
+            self.store = build_vector_store(self.db)
+            logger.info("Vector store ready in %.1fs", time.perf_counter() - started)
+        except Exception as e:
+            self.error = e
+            logger.exception("Vector store warm-up failed")
+        finally:
+            self._ready.set()
+
+    @property
+    def status(self) -> str:
+        if self._thread is None:
+            return "idle"
+        if not self._ready.is_set():
+            return "loading"
+        return "ready" if self.store is not None else "failed"
+
+    def get(self, timeout: Optional[float] = None) -> Optional[CodeVectorStore]:
+        self.start()
+        self._ready.wait(timeout)
+        return self.store
+
+@st.cache_resource
+def get_vector_store_loader() -> VectorStoreLoader:
+    try:
+        from .database import get_database
+        db = get_database()
+    except Exception:
+        db = None
+    loader = VectorStoreLoader(db)
+    loader.start()
+    return loader
+
+def start_vector_store_warmup() -> VectorStoreLoader:
+    return get_vector_store_loader()
+
+def get_vector_store(wait: bool = True) -> Optional[CodeVectorStore]:
+    loader = get_vector_store_loader()
+    store = loader.get(timeout=None if wait else 0)
+    if wait and store is None and loader.error is not None:
+        raise loader.error
     return store